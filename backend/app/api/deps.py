@@ -1,16 +1,34 @@
 """Dependency injection for API routes."""
-from typing import Annotated
+from dataclasses import dataclass
+from typing import Annotated, Optional
 
-from fastapi import Depends, Header
+from fastapi import Cookie, Depends, Header, Response
 from jose import JWTError
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.core.exceptions import AuthenticationError, UserNotFoundError
-from app.core.security import decode_access_token
+from app.core.security import create_cart_token, decode_access_token, verify_cart_token, verify_service_token
 from app.database import get_db
 from app.models.user import User
 
+# Guest cart tokens are accepted from this header or cookie, and returned in both
+CART_TOKEN_HEADER = "X-Cart-Token"
+CART_TOKEN_COOKIE = "cart_token"
+
+
+@dataclass
+class CartOwner:
+    """Owner of the cart a request operates on: a user, or a guest identified by cart token."""
+
+    user: Optional[User] = None
+    guest_id: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the owner, e.g. for rows it owns outside its cart."""
+        return f"user:{self.user.id}" if self.user else f"guest:{self.guest_id}"
+
 
 def get_current_user(
     authorization: Annotated[str | None, Header()] = None,
@@ -73,3 +91,103 @@ def get_current_active_user(
         raise AuthenticationError("User account is inactive")
 
     return current_user
+
+
+def get_guest_id(
+    x_cart_token: Annotated[str | None, Header()] = None,
+    cart_token: Annotated[str | None, Cookie()] = None,
+) -> Optional[str]:
+    """
+    Dependency to get the guest cart id from a signed cart token, if any.
+
+    Args:
+        x_cart_token: Cart token from the X-Cart-Token header
+        cart_token: Cart token from the cart_token cookie
+
+    Returns:
+        Guest cart id, or None if no valid token was sent
+    """
+    return verify_cart_token(x_cart_token or cart_token)
+
+
+def is_checkout_service(
+    x_service_token: Annotated[str | None, Header()] = None,
+) -> bool:
+    """
+    Dependency telling whether the checkout service sent the request.
+
+    Args:
+        x_service_token: Service token from the X-Service-Token header
+
+    Returns:
+        True if the header holds the checkout service's token
+    """
+    return verify_service_token(x_service_token, "checkout")
+
+
+def get_cart_viewer(
+    guest_id: Annotated[Optional[str], Depends(get_guest_id)],
+    authorization: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_db)
+) -> CartOwner:
+    """
+    Dependency to get the owner of the cart for a read, without minting a cart token.
+
+    Unlike get_cart_owner(), guests without a valid cart token get a
+    CartOwner with no guest_id, and no token is set on the response.
+
+    Args:
+        guest_id: Guest cart id from the request's cart token
+        authorization: Authorization header with Bearer token
+        db: Database session
+
+    Returns:
+        Cart owner
+
+    Raises:
+        AuthenticationError: If an Authorization header is sent and invalid
+        UserNotFoundError: If the token's user doesn't exist
+    """
+    if authorization:
+        return CartOwner(user=get_current_user(authorization, db))
+    return CartOwner(guest_id=guest_id)
+
+
+def get_cart_owner(
+    response: Response,
+    guest_id: Annotated[Optional[str], Depends(get_guest_id)],
+    authorization: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_db)
+) -> CartOwner:
+    """
+    Dependency to get the owner of the cart: the authenticated user, else a guest.
+
+    Guests without a valid cart token get a new one. The token is returned in
+    the X-Cart-Token header and the cart_token cookie of every guest response.
+
+    Args:
+        response: Response to attach the cart token to
+        guest_id: Guest cart id from the request's cart token
+        authorization: Authorization header with Bearer token
+        db: Database session
+
+    Returns:
+        Cart owner
+
+    Raises:
+        AuthenticationError: If an Authorization header is sent and invalid
+        UserNotFoundError: If the token's user doesn't exist
+    """
+    if authorization:
+        return CartOwner(user=get_current_user(authorization, db))
+
+    guest_id, token = create_cart_token(guest_id)
+    response.headers[CART_TOKEN_HEADER] = token
+    response.set_cookie(
+        CART_TOKEN_COOKIE,
+        token,
+        max_age=settings.GUEST_CART_TTL_DAYS * 24 * 3600,
+        httponly=True,
+        samesite="lax",
+    )
+    return CartOwner(guest_id=guest_id)
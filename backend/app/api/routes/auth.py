@@ -1,11 +1,13 @@
 """Authentication API routes."""
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import CART_TOKEN_COOKIE, get_current_user, get_guest_id
 from app.config import settings
+from app.core import cart_store
+from app.core.cart_buffer import cart_buffer
 from app.core.exceptions import (
     InvalidCredentialsError,
     PasswordValidationError,
@@ -72,12 +74,22 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+def login(
+    credentials: LoginRequest,
+    response: Response,
+    guest_id: Annotated[Optional[str], Depends(get_guest_id)],
+    db: Session = Depends(get_db)
+):
     """
     Authenticate user and return JWT token.
 
+    If a guest cart token is sent (X-Cart-Token header or cart_token cookie),
+    the guest cart is merged into the user's cart in SQL and the cookie cleared.
+
     Args:
         credentials: Login credentials (username/email and password)
+        response: Response, to clear the cart token cookie
+        guest_id: Guest cart id from the cart token, if any
         db: Database session
 
     Returns:
@@ -102,6 +114,14 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     if not user.is_active:
         raise InvalidCredentialsError("Account is inactive")
 
+    # Fold the guest cart into the user's cart
+    cart_merged = False
+    if guest_id:
+        cart_buffer.flush_user(user.id)
+        cart_merged = cart_store.merge_guest_cart(db, guest_id, user.id)
+        db.commit()
+        response.delete_cookie(CART_TOKEN_COOKIE)
+
     # Create access token
     access_token = create_access_token(data={"sub": str(user.id)})
 
@@ -110,6 +130,7 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
         token_type="bearer",
         expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         user=UserResponse.model_validate(user),
+        cart_merged=cart_merged,
     )
 
 
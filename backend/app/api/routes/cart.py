@@ -1,82 +1,180 @@
-"""Cart API routes."""
-from typing import Annotated
+"""Cart API routes for users and guests (see app.api.deps.get_cart_owner)."""
+from datetime import datetime
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import CartOwner, get_cart_owner, get_cart_viewer, get_current_user
+from app.core import cart_store
+from app.core.cart_buffer import cart_buffer
 from app.core.exceptions import OutOfStockError, CartNotFoundError
+from app.core.pricing import cart_pricer, price_subtotal
+from app.core.product_cache import product_cache
 from app.database import get_db
 from app.models.cart import Cart
 from app.models.cart_item import CartItem
 from app.models.saved_item import SavedItem
-from app.models.product import Product
 from app.models.user import User
 from app.schemas.cart import (
+    CartBatchRequest,
     CartItemCreate,
     CartItemUpdate,
     CartResponse,
+    CartTotals,
     GuestCartMerge,
 )
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
 
-def get_or_create_cart(db: Session, user: User) -> Cart:
+def find_cart(db: Session, owner: CartOwner) -> Optional[Cart]:
     """
-    Get user's cart or create one if it doesn't exist.
+    Get the user's or guest's cart for a read.
+
+    A missing user cart is created with the same upsert mutations use, so
+    concurrent first requests of a user share one cart instead of racing to
+    insert it. Guest carts are only created by mutations (see mutable_cart()),
+    so reads by visitors who never add anything don't write.
 
     Args:
         db: Database session
-        user: Current user
+        owner: Current user, or guest (possibly without a guest id)
 
     Returns:
-        User's cart
+        Owner's cart, or None if the guest has no unexpired cart
     """
-    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+    if owner.user is None:
+        if owner.guest_id is None:
+            return None
+        return db.query(Cart)\
+            .filter(Cart.guest_id == owner.guest_id, Cart.expires_at > datetime.utcnow())\
+            .first()
 
+    cart = db.query(Cart).filter(Cart.user_id == owner.user.id).first()
     if not cart:
-        cart = Cart(user_id=user.id)
-        db.add(cart)
+        cart_id = cart_store.upsert_cart(db, owner.user.id).id
         db.commit()
-        db.refresh(cart)
-
+        cart = db.get(Cart, cart_id)
     return cart
 
 
+def mutable_cart(db: Session, owner: CartOwner) -> cart_store.CartVersion:
+    """
+    Get or create the user's or guest's cart for a mutation, bumping its version.
+
+    Buffered quantity updates of a user's cart are written first, so the
+    mutation applies on top of them. Guest carts have their expiry extended.
+
+    Args:
+        db: Database session
+        owner: Current user or guest
+
+    Returns:
+        Cart ID and the version the mutation writes at
+    """
+    if owner.user is None:
+        return cart_store.upsert_guest_cart(db, owner.guest_id)
+
+    cart_buffer.flush_user(owner.user.id)
+    return cart_store.upsert_cart(db, owner.user.id)
+
+
+def cart_response(db: Session, cart_id: int, since: Optional[int]):
+    """
+    Build a cart response, in full or as the changes after a version.
+
+    Args:
+        db: Database session
+        cart_id: Cart ID
+        since: Cart version the client already has, or None for the full cart
+
+    Returns:
+        Cart with all lines, or a delta CartResponse if since is set and
+        the cart still has its removals (see cart_store.load_cart_changes)
+    """
+    if since is not None:
+        # Deltas are computed from row versions, with buffered updates applied
+        changes = cart_buffer.load_cart_changes(db, cart_id, since)
+        if changes is not None:
+            return CartResponse(
+                id=changes.cart.id,
+                user_id=changes.cart.user_id,
+                expires_at=changes.cart.expires_at,
+                version=changes.cart.version,
+                delta=True,
+                items=changes.items,
+                saved_items=changes.saved_items,
+                removed_item_ids=changes.removed_item_ids,
+                removed_saved_item_ids=changes.removed_saved_item_ids,
+                created_at=changes.cart.created_at,
+                updated_at=changes.cart.updated_at,
+            )
+
+    # Load items and saved items with their products
+    return cart_buffer.overlay(cart_store.load_cart(db, cart_id))
+
+
 @router.get("", response_model=CartResponse)
 def get_cart(
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_viewer)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
+    zip_code: Optional[str] = Query(None, min_length=5, max_length=10, description="Shipping ZIP code, to include tax"),
+    promo_code: Optional[str] = Query(None, max_length=50, description="Promo code to apply to the totals"),
     db: Session = Depends(get_db)
 ):
     """
-    Get current user's cart with all items.
+    Get current user's cart with all items and priced totals, or only the changes after a version.
+
+    Guests without a cart (or cart token) get an empty cart with id 0 and
+    version 0; no cart or token is created until their first mutation.
 
     Args:
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
+        zip_code: Shipping ZIP code used for tax
+        promo_code: Promo code to apply
         db: Database session
 
     Returns:
-        User's cart with items and saved items
-    """
-    cart = get_or_create_cart(db, current_user)
+        User's cart with items, saved items and totals
 
-    # Eagerly load relationships
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
+    Raises:
+        HTTPException: If the ZIP code is invalid
+        InvalidPromoCodeError: If the promo code cannot be applied
+    """
+    cart = find_cart(db, owner)
+    pending = cart_buffer.pending(cart.id) if cart is not None else None
+
+    try:
+        if cart is None:
+            quote = price_subtotal(db, 0.0, zip_code, promo_code)
+        elif pending is None:
+            quote = cart_pricer.quote(db, cart.id, cart.version, zip_code, promo_code)
+        else:
+            # Price buffered quantities without flushing them
+            quantities = {item_id: quantity for item_id, (quantity, _) in pending.lines.items()}
+            quote = cart_pricer.quote(db, cart.id, pending.version, zip_code, promo_code, quantities)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-    return cart
+    if cart is None:
+        now = datetime.utcnow()
+        response = CartResponse(id=0, version=0, items=[], saved_items=[], created_at=now, updated_at=now)
+    else:
+        response = CartResponse.model_validate(cart_response(db, cart.id, since))
+    response.totals = CartTotals.model_validate(quote)
+    return response
 
 
 @router.post("/items", response_model=CartResponse, status_code=status.HTTP_201_CREATED)
 def add_to_cart(
     item_data: CartItemCreate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -84,7 +182,8 @@ def add_to_cart(
 
     Args:
         item_data: Item to add (product_id and quantity)
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -93,59 +192,37 @@ def add_to_cart(
     Raises:
         OutOfStockError: If requested quantity exceeds available stock
     """
-    # Get or create cart
-    cart = get_or_create_cart(db, current_user)
-
-    # Check if product exists and has sufficient stock
-    product = db.query(Product).filter(Product.id == item_data.product_id).first()
-    if not product:
-        raise OutOfStockError("Product not found")
-
-    # Check if item already exists in cart
-    existing_item = db.query(CartItem)\
-        .filter(CartItem.cart_id == cart.id, CartItem.product_id == item_data.product_id)\
-        .first()
-
-    if existing_item:
-        # Increment quantity
-        new_quantity = existing_item.quantity + item_data.quantity
-        if new_quantity > product.stock:
+    # Get or create cart, then insert or increment the item with the stock guard
+    cart = mutable_cart(db, owner)
+
+    if not cart_store.add_cart_item(db, cart, item_data.product_id, item_data.quantity):
+        # Re-read the product and existing quantity to explain the failure
+        db.rollback()
+        product = product_cache.load(db, item_data.product_id)
+        if not product:
+            raise OutOfStockError("Product not found")
+
+        existing_quantity = db.query(CartItem.quantity)\
+            .filter(CartItem.cart_id == cart.id, CartItem.product_id == item_data.product_id)\
+            .scalar()
+        if existing_quantity:
             raise OutOfStockError(
-                f"Only {product.stock} units available. You already have {existing_item.quantity} in your cart."
+                f"Only {product.stock} units available. You already have {existing_quantity} in your cart."
             )
-        existing_item.quantity = new_quantity
-    else:
-        # Check stock availability
-        if item_data.quantity > product.stock:
-            raise OutOfStockError(f"Only {product.stock} units available")
-
-        # Create new cart item
-        new_item = CartItem(
-            cart_id=cart.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity
-        )
-        db.add(new_item)
+        raise OutOfStockError(f"Only {product.stock} units available")
 
     db.commit()
 
-    # Return updated cart with eager loading
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    # Return updated cart
+    return cart_response(db, cart.id, since)
 
 
 @router.put("/items/{item_id}", response_model=CartResponse)
 def update_cart_item(
     item_id: int,
     item_data: CartItemUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -154,7 +231,8 @@ def update_cart_item(
     Args:
         item_id: Cart item ID
         item_data: Updated quantity
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -164,42 +242,36 @@ def update_cart_item(
         OutOfStockError: If requested quantity exceeds available stock
         CartNotFoundError: If cart item not found
     """
-    # Get user's cart
-    cart = get_or_create_cart(db, current_user)
-
-    # Find cart item
-    cart_item = db.query(CartItem)\
-        .filter(CartItem.id == item_id, CartItem.cart_id == cart.id)\
-        .first()
-
-    if not cart_item:
-        raise CartNotFoundError("Cart item not found")
+    if cart_buffer.enabled and owner.user is not None:
+        # Validate with reads only and leave the write to the background flush
+        cart_id = cart_buffer.set_item_quantity(db, owner.user.id, item_id, item_data.quantity)
+        return cart_response(db, cart_id, since)
+
+    # Get user's cart, then update the quantity with the stock guard
+    cart = mutable_cart(db, owner)
+
+    if not cart_store.set_cart_item_quantity(db, cart, item_id, item_data.quantity):
+        db.rollback()
+        cart_item = db.query(CartItem)\
+            .filter(CartItem.id == item_id, CartItem.cart_id == cart.id)\
+            .first()
+        if not cart_item:
+            raise CartNotFoundError("Cart item not found")
 
-    # Check stock availability
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-    if item_data.quantity > product.stock:
+        product = product_cache.load(db, cart_item.product_id)
         raise OutOfStockError(f"Only {product.stock} units available")
 
-    # Update quantity
-    cart_item.quantity = item_data.quantity
     db.commit()
 
     # Return updated cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    return cart_response(db, cart.id, since)
 
 
 @router.delete("/items/{item_id}", response_model=CartResponse)
 def remove_cart_item(
     item_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -207,7 +279,8 @@ def remove_cart_item(
 
     Args:
         item_id: Cart item ID
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -217,44 +290,34 @@ def remove_cart_item(
         CartNotFoundError: If cart item not found
     """
     # Get user's cart
-    cart = get_or_create_cart(db, current_user)
-
-    # Find and delete cart item
-    cart_item = db.query(CartItem)\
-        .filter(CartItem.id == item_id, CartItem.cart_id == cart.id)\
-        .first()
+    cart = mutable_cart(db, owner)
 
-    if not cart_item:
+    # Delete cart item
+    if not cart_store.delete_cart_item(db, cart, item_id):
+        db.rollback()
         raise CartNotFoundError("Cart item not found")
 
-    db.delete(cart_item)
     db.commit()
 
     # Return updated cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    return cart_response(db, cart.id, since)
 
 
 @router.post("/merge", response_model=CartResponse)
 def merge_guest_cart(
     guest_cart_data: GuestCartMerge,
     current_user: Annotated[User, Depends(get_current_user)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
     Merge guest cart with user's cart on login.
-    Combines quantities for duplicate products.
+    Combines quantities for duplicate products, capped at available stock.
 
     Args:
         guest_cart_data: Guest cart items from localStorage
         current_user: Authenticated user
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -264,61 +327,26 @@ def merge_guest_cart(
         OutOfStockError: If merged quantity exceeds available stock
     """
     # Get or create cart
-    cart = get_or_create_cart(db, current_user)
+    cart = mutable_cart(db, CartOwner(user=current_user))
 
-    # Merge each guest cart item
+    # Combine duplicate products from the guest payload
+    quantities: dict[int, int] = {}
     for guest_item in guest_cart_data.items:
-        # Check if product exists and has sufficient stock
-        product = db.query(Product).filter(Product.id == guest_item.product_id).first()
-        if not product:
-            continue  # Skip invalid products
-
-        # Check if item already exists in cart
-        existing_item = db.query(CartItem)\
-            .filter(CartItem.cart_id == cart.id, CartItem.product_id == guest_item.product_id)\
-            .first()
-
-        if existing_item:
-            # Combine quantities
-            new_quantity = existing_item.quantity + guest_item.quantity
-            if new_quantity > product.stock:
-                # Cap at available stock
-                existing_item.quantity = product.stock
-            else:
-                existing_item.quantity = new_quantity
-        else:
-            # Add new item
-            if guest_item.quantity > product.stock:
-                # Cap at available stock
-                quantity = product.stock
-            else:
-                quantity = guest_item.quantity
-
-            new_item = CartItem(
-                cart_id=cart.id,
-                product_id=guest_item.product_id,
-                quantity=quantity
-            )
-            db.add(new_item)
+        quantities[guest_item.product_id] = quantities.get(guest_item.product_id, 0) + guest_item.quantity
 
+    # Add to existing quantities, capped at available stock; invalid products are skipped
+    cart_store.merge_cart_items(db, cart, quantities)
     db.commit()
 
     # Return merged cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    return cart_response(db, cart.id, since)
 
 
 @router.post("/items/{item_id}/save", response_model=CartResponse)
 def save_for_later(
     item_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -326,7 +354,8 @@ def save_for_later(
 
     Args:
         item_id: Cart item ID
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -336,53 +365,24 @@ def save_for_later(
         CartNotFoundError: If cart item not found
     """
     # Get user's cart
-    cart = get_or_create_cart(db, current_user)
-
-    # Find cart item
-    cart_item = db.query(CartItem)\
-        .filter(CartItem.id == item_id, CartItem.cart_id == cart.id)\
-        .first()
+    cart = mutable_cart(db, owner)
 
-    if not cart_item:
+    # Upsert the saved item from the cart item, then remove it from the cart
+    if not cart_store.save_cart_item(db, cart, item_id):
+        db.rollback()
         raise CartNotFoundError("Cart item not found")
 
-    # Check if already saved
-    existing_saved = db.query(SavedItem)\
-        .filter(SavedItem.cart_id == cart.id, SavedItem.product_id == cart_item.product_id)\
-        .first()
-
-    if existing_saved:
-        # Update quantity
-        existing_saved.quantity = cart_item.quantity
-    else:
-        # Create saved item
-        saved_item = SavedItem(
-            cart_id=cart.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity
-        )
-        db.add(saved_item)
-
-    # Remove from cart
-    db.delete(cart_item)
     db.commit()
 
     # Return updated cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    return cart_response(db, cart.id, since)
 
 
 @router.post("/saved/{saved_id}/restore", response_model=CartResponse)
 def restore_saved_item(
     saved_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -390,7 +390,8 @@ def restore_saved_item(
 
     Args:
         saved_id: Saved item ID
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -401,61 +402,31 @@ def restore_saved_item(
         OutOfStockError: If product is out of stock
     """
     # Get user's cart
-    cart = get_or_create_cart(db, current_user)
-
-    # Find saved item
-    saved_item = db.query(SavedItem)\
-        .filter(SavedItem.id == saved_id, SavedItem.cart_id == cart.id)\
-        .first()
+    cart = mutable_cart(db, owner)
 
-    if not saved_item:
-        raise CartNotFoundError("Saved item not found")
+    # Upsert the cart item with the stock guard, then remove it from saved items
+    if not cart_store.restore_saved_item(db, cart, saved_id):
+        db.rollback()
+        saved_item = db.query(SavedItem)\
+            .filter(SavedItem.id == saved_id, SavedItem.cart_id == cart.id)\
+            .first()
+        if not saved_item:
+            raise CartNotFoundError("Saved item not found")
 
-    # Check stock availability
-    product = db.query(Product).filter(Product.id == saved_item.product_id).first()
-    if saved_item.quantity > product.stock:
+        product = product_cache.load(db, saved_item.product_id)
         raise OutOfStockError(f"Only {product.stock} units available")
 
-    # Check if already in cart
-    existing_item = db.query(CartItem)\
-        .filter(CartItem.cart_id == cart.id, CartItem.product_id == saved_item.product_id)\
-        .first()
-
-    if existing_item:
-        # Add to existing quantity
-        new_quantity = existing_item.quantity + saved_item.quantity
-        if new_quantity > product.stock:
-            raise OutOfStockError(f"Only {product.stock} units available")
-        existing_item.quantity = new_quantity
-    else:
-        # Create cart item
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=saved_item.product_id,
-            quantity=saved_item.quantity
-        )
-        db.add(cart_item)
-
-    # Remove from saved
-    db.delete(saved_item)
     db.commit()
 
     # Return updated cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
-
-    return cart
+    return cart_response(db, cart.id, since)
 
 
 @router.delete("/saved/{saved_id}", response_model=CartResponse)
 def remove_saved_item(
     saved_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
     db: Session = Depends(get_db)
 ):
     """
@@ -463,7 +434,8 @@ def remove_saved_item(
 
     Args:
         saved_id: Saved item ID
-        current_user: Authenticated user
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
         db: Database session
 
     Returns:
@@ -473,48 +445,78 @@ def remove_saved_item(
         CartNotFoundError: If saved item not found
     """
     # Get user's cart
-    cart = get_or_create_cart(db, current_user)
+    cart = mutable_cart(db, owner)
 
-    # Find and delete saved item
-    saved_item = db.query(SavedItem)\
-        .filter(SavedItem.id == saved_id, SavedItem.cart_id == cart.id)\
-        .first()
-
-    if not saved_item:
+    # Delete saved item
+    if not cart_store.delete_saved_item(db, cart, saved_id):
+        db.rollback()
         raise CartNotFoundError("Saved item not found")
 
-    db.delete(saved_item)
     db.commit()
 
     # Return updated cart
-    cart = db.query(Cart)\
-        .filter(Cart.id == cart.id)\
-        .options(
-            joinedload(Cart.items).joinedload(CartItem.product),
-            joinedload(Cart.saved_items).joinedload(SavedItem.product)
-        )\
-        .first()
+    return cart_response(db, cart.id, since)
 
-    return cart
+
+@router.post("/batch", response_model=CartResponse)
+def apply_cart_batch(
+    batch: CartBatchRequest,
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    since: Optional[int] = Query(None, ge=0, description="Return only changes after this cart version"),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply several add/update/remove/save/restore operations in one transaction.
+
+    Operations run in order with the same rules as the individual endpoints;
+    if any fails, none are applied.
+
+    Args:
+        batch: Ordered cart operations
+        owner: Authenticated user or guest
+        since: Cart version the client already has, for a delta response
+        db: Database session
+
+    Returns:
+        Updated cart
+
+    Raises:
+        OutOfStockError: If an operation exceeds available stock (detail is
+            prefixed with the operation index)
+        CartNotFoundError: If an operation references a missing item
+    """
+    # Get user's cart
+    cart = mutable_cart(db, owner)
+
+    try:
+        cart_store.apply_cart_operations(db, cart, batch.operations)
+    except (OutOfStockError, CartNotFoundError):
+        db.rollback()
+        raise
+
+    db.commit()
+
+    # Return updated cart
+    return cart_response(db, cart.id, since)
 
 
 @router.post("/clear", status_code=status.HTTP_204_NO_CONTENT)
 def clear_cart(
-    current_user: Annotated[User, Depends(get_current_user)],
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
     db: Session = Depends(get_db)
 ):
     """
     Clear all items from cart.
 
     Args:
-        current_user: Authenticated user
+        owner: Authenticated user or guest
         db: Database session
     """
     # Get user's cart
-    cart = get_or_create_cart(db, current_user)
+    cart = mutable_cart(db, owner)
 
     # Delete all cart items
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    cart_store.clear_cart_items(db, cart)
     db.commit()
 
     return None
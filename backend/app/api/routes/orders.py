@@ -1,40 +1,155 @@
 """Order API routes."""
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.api.deps import get_current_user
+from app.api.deps import CartOwner, get_current_user, get_guest_id
 from app.core.exceptions import OutOfStockError, OrderNotFoundError
+from app.core.idempotency import caller_scope, find_stored_response, request_fingerprint, store_response
+from app.core.inventory import decrement_stock
+from app.core.order_numbers import order_numbers
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.pricing import PriceQuote, price_lines
+from app.core.reservations import owned_reservation, release_reservation
 from app.database import get_db
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.product import Product
 from app.models.user import User
-from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.order import OrderCreate, OrderResponse, OrderSummaryResponse
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 def generate_order_number() -> str:
-    """Generate a unique order number."""
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    return f"ORD-{timestamp}"
+    """Generate a unique order number (see app.core.order_numbers)."""
+    return order_numbers.generate()
+
+
+def price_order(db: Session, order_data: OrderCreate) -> tuple[list[tuple[Product, int]], PriceQuote]:
+    """
+    Price an order's items at current product prices.
+
+    Client-supplied prices and totals are ignored. Stock is checked when it
+    is decremented (see app.core.inventory.decrement_stock).
+
+    Args:
+        db: Database session
+        order_data: Order details
+
+    Returns:
+        Tuple of ((product, quantity) per item, priced totals)
+
+    Raises:
+        OutOfStockError: If any product is missing
+        InvalidPromoCodeError: If the promo code cannot be applied
+        HTTPException: If the shipping ZIP code is invalid
+    """
+    # One query for all products, bypassing the cache
+    products = {
+        product.id: product
+        for product in db.query(Product)
+            .filter(Product.id.in_({item_data.product_id for item_data in order_data.items}))
+            .all()
+    }
+
+    lines = []
+    for item_data in order_data.items:
+        product = products.get(item_data.product_id)
+        if not product:
+            raise OutOfStockError(f"Product {item_data.product_id} not found")
+        lines.append((product, item_data.quantity))
+
+    try:
+        quote = price_lines(
+            db,
+            [(product.price, quantity) for product, quantity in lines],
+            order_data.shipping_zip_code,
+            order_data.promo_code,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return lines, quote
+
+
+def commit_order(
+    db: Session,
+    order: Order,
+    scope: str,
+    idempotency_key: Optional[str],
+    fingerprint: str,
+) -> Order | JSONResponse:
+    """
+    Commit a new order, storing its response under the idempotency key if given.
+
+    Args:
+        db: Database session holding the order's uncommitted writes
+        order: New order, flushed with its items
+        scope: Idempotency key scope of the endpoint and caller
+        idempotency_key: Idempotency-Key header, if sent
+        fingerprint: Fingerprint of the request body
+
+    Returns:
+        Created order with items, or the stored response of a concurrent
+        request with the same key (this order is then rolled back)
+    """
+    if idempotency_key:
+        db.flush()
+        db.refresh(order, ["items"])
+        store_response(
+            db, scope, idempotency_key, fingerprint,
+            status.HTTP_201_CREATED,
+            OrderResponse.model_validate(order).model_dump(mode="json"),
+        )
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key committed first
+        db.rollback()
+        replayed = find_stored_response(db, scope, idempotency_key, fingerprint) if idempotency_key else None
+        if replayed is None:
+            raise
+        return replayed
+
+    # Load relationships
+    return db.query(Order)\
+        .filter(Order.id == order.id)\
+        .options(joinedload(Order.items))\
+        .first()
 
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(
     order_data: OrderCreate,
     current_user: Annotated[User, Depends(get_current_user)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=255)] = None,
     db: Session = Depends(get_db)
 ):
     """
     Create a new order.
 
+    The reservation sent with the order, if it is the user's, is converted:
+    its holds count as available and are deleted with the order.
+
+    Retries with the same Idempotency-Key header replay the first response
+    instead of creating another order (see app.core.idempotency).
+
     Args:
         order_data: Order details including addresses, payment, and items
         current_user: Authenticated user
+        idempotency_key: Idempotency-Key header, if sent
         db: Database session
 
     Returns:
@@ -42,7 +157,29 @@ def create_order(
 
     Raises:
         OutOfStockError: If any product has insufficient stock
+        InvalidPromoCodeError: If the promo code cannot be applied
+        IdempotencyKeyMismatchError: If the key was used with a different request
+        HTTPException: If the shipping ZIP code is invalid
     """
+    owner_key = CartOwner(user=current_user).key
+    scope = caller_scope("orders", owner_key)
+    fingerprint = request_fingerprint(order_data.model_dump(mode="json"))
+    if idempotency_key:
+        replayed = find_stored_response(db, scope, idempotency_key, fingerprint)
+        if replayed is not None:
+            return replayed
+
+    # Price the items at current product prices
+    lines, quote = price_order(db, order_data)
+
+    # Take the items out of stock, or fail before writing anything else
+    reservation_id = owned_reservation(db, order_data.reservation_id, owner_key)
+    decrement_stock(
+        db,
+        [(product.id, quantity) for product, quantity in lines],
+        reservation_id=reservation_id,
+    )
+
     # Generate unique order number
     order_number = generate_order_number()
 
@@ -79,79 +216,144 @@ def create_order(
         payment_method=order_data.payment_method,
         card_last_four=order_data.card_last_four,
         card_brand=order_data.card_brand,
-        # Totals
-        subtotal=order_data.subtotal,
-        discount_amount=order_data.discount_amount,
-        promo_code=order_data.promo_code,
-        tax_amount=order_data.tax_amount,
-        shipping_amount=order_data.shipping_amount,
-        total_amount=order_data.total_amount,
+        # Totals, priced by the server
+        subtotal=quote.subtotal,
+        discount_amount=quote.discount_amount,
+        promo_code=quote.promo_code,
+        tax_amount=quote.tax_amount,
+        shipping_amount=quote.shipping_amount,
+        total_amount=quote.total_amount,
     )
 
     db.add(order)
     db.flush()
 
-    # Create order items and decrement stock
-    for item_data in order_data.items:
-        # Get product and check stock
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
-
-        if not product:
-            raise OutOfStockError(f"Product {item_data.product_id} not found")
-
-        if product.stock < item_data.quantity:
-            raise OutOfStockError(
-                f"Insufficient stock for {product.name}. "
-                f"Requested: {item_data.quantity}, Available: {product.stock}"
-            )
-
-        # Create order item
+    # Create order items
+    for product, quantity in lines:
         order_item = OrderItem(
             order_id=order.id,
             product_id=product.id,
-            product_name=item_data.product_name,
-            product_price=item_data.product_price,
-            quantity=item_data.quantity,
-            subtotal=item_data.subtotal,
+            product_name=product.name,
+            product_price=product.price,
+            quantity=quantity,
+            subtotal=round(product.price * quantity, 2),
         )
         db.add(order_item)
 
-        # Decrement stock
-        product.stock -= item_data.quantity
+    # Convert the reservation: its units are now taken out of stock
+    if reservation_id:
+        release_reservation(db, reservation_id, owner_key)
 
-    db.commit()
-    db.refresh(order)
+    return commit_order(db, order, scope, idempotency_key, fingerprint)
 
-    # Load relationships
-    order = db.query(Order)\
-        .filter(Order.id == order.id)\
-        .options(joinedload(Order.items))\
-        .first()
 
-    return order
+def encode_order_cursor(created_at: datetime, order_id: int) -> str:
+    """
+    Build the cursor pointing just past an order in the order history.
+
+    Args:
+        created_at: Creation time of the last order of the current page
+        order_id: ID of the last order of the current page
+
+    Returns:
+        Opaque cursor string
+    """
+    return encode_cursor({"created_at": created_at.isoformat(), "id": order_id})
+
+
+def decode_order_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode an order history cursor into its (created_at, id) position.
 
+    Args:
+        cursor: Cursor string from the client
+
+    Returns:
+        Tuple of (created_at, order id)
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        payload = decode_cursor(cursor)
+        created_at, order_id = datetime.fromisoformat(payload["created_at"]), payload["id"]
+        if not isinstance(order_id, int):
+            raise ValueError("Invalid cursor")
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
-@router.get("", response_model=list[OrderResponse])
+    return created_at, order_id
+
+
+@router.get("", response_model=list[OrderResponse] | list[OrderSummaryResponse])
 def get_user_orders(
+    response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
+    limit: int = Query(20, ge=1, le=100, description="Orders per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's X-Next-Cursor header"),
+    view: Literal["full", "summary"] = Query("full", description="full orders with items, or summary rows"),
     db: Session = Depends(get_db)
 ):
     """
-    Get all orders for the current user.
+    Get the current user's orders, newest first, one page at a time.
+
+    Pages are walked with keyset pagination on (created_at, id), served by
+    the (user_id, created_at, id) index: when there are more orders, the
+    X-Next-Cursor response header holds the cursor for the next page. The
+    summary view returns totals and an item count without loading items.
 
     Args:
+        response: Outgoing response (for the X-Next-Cursor header)
         current_user: Authenticated user
+        limit: Number of orders per page
+        cursor: Opaque keyset cursor from a previous response
+        view: Response shape (full or summary)
         db: Database session
 
     Returns:
-        List of user's orders
+        Page of the user's orders
+
+    Raises:
+        HTTPException: If the cursor is malformed
     """
-    orders = db.query(Order)\
-        .filter(Order.user_id == current_user.id)\
-        .order_by(Order.created_at.desc())\
-        .options(joinedload(Order.items))\
+    if view == "summary":
+        item_count = select(func.count(OrderItem.id))\
+            .where(OrderItem.order_id == Order.id)\
+            .scalar_subquery()
+        query = db.query(
+            Order.id,
+            Order.order_number,
+            Order.status,
+            Order.subtotal,
+            Order.discount_amount,
+            Order.tax_amount,
+            Order.shipping_amount,
+            Order.total_amount,
+            item_count.label("item_count"),
+            Order.created_at,
+        )
+    else:
+        query = db.query(Order).options(selectinload(Order.items))
+
+    query = query.filter(Order.user_id == current_user.id)
+    if cursor:
+        query = query.filter(tuple_(Order.created_at, Order.id) < decode_order_cursor(cursor))
+
+    # Fetch one extra row to detect a next page
+    orders = query\
+        .order_by(Order.created_at.desc(), Order.id.desc())\
+        .limit(limit + 1)\
         .all()
 
+    if len(orders) > limit:
+        orders = orders[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_order_cursor(orders[-1].created_at, orders[-1].id)
+
+    if view == "summary":
+        return [OrderSummaryResponse.model_validate(order) for order in orders]
     return orders
 
 
@@ -189,21 +391,32 @@ def get_order(
 @router.post("/guest", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_guest_order(
     order_data: OrderCreate,
+    guest_id: Annotated[Optional[str], Depends(get_guest_id)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=255)] = None,
     db: Session = Depends(get_db)
 ):
     """
     Create a new guest order (no authentication required).
 
+    Retries with the same Idempotency-Key header replay the first response
+    instead of creating another order (see app.core.idempotency). The
+    reservation sent with the order is converted if it belongs to the guest
+    of the request's cart token.
+
     Args:
         order_data: Order details including guest_email, addresses, payment, and items
+        guest_id: Guest cart id from the request's cart token, if any
+        idempotency_key: Idempotency-Key header, if sent
         db: Database session
 
     Returns:
         Created order with items
 
     Raises:
-        HTTPException: If guest_email is not provided
+        HTTPException: If guest_email is not provided or the shipping ZIP code is invalid
         OutOfStockError: If any product has insufficient stock
+        InvalidPromoCodeError: If the promo code cannot be applied
+        IdempotencyKeyMismatchError: If the key was used with a different request
     """
     # Validate that guest_email is provided
     if not order_data.guest_email:
@@ -212,6 +425,25 @@ def create_guest_order(
             detail="guest_email is required for guest orders"
         )
 
+    scope = caller_scope("orders", f"guest:{order_data.guest_email.strip().lower()}")
+    owner_key = CartOwner(guest_id=guest_id).key if guest_id else None
+    fingerprint = request_fingerprint(order_data.model_dump(mode="json"))
+    if idempotency_key:
+        replayed = find_stored_response(db, scope, idempotency_key, fingerprint)
+        if replayed is not None:
+            return replayed
+
+    # Price the items at current product prices
+    lines, quote = price_order(db, order_data)
+
+    # Take the items out of stock, or fail before writing anything else
+    reservation_id = owned_reservation(db, order_data.reservation_id, owner_key)
+    decrement_stock(
+        db,
+        [(product.id, quantity) for product, quantity in lines],
+        reservation_id=reservation_id,
+    )
+
     # Generate unique order number
     order_number = generate_order_number()
 
@@ -249,56 +481,35 @@ def create_guest_order(
         payment_method=order_data.payment_method,
         card_last_four=order_data.card_last_four,
         card_brand=order_data.card_brand,
-        # Totals
-        subtotal=order_data.subtotal,
-        discount_amount=order_data.discount_amount,
-        promo_code=order_data.promo_code,
-        tax_amount=order_data.tax_amount,
-        shipping_amount=order_data.shipping_amount,
-        total_amount=order_data.total_amount,
+        # Totals, priced by the server
+        subtotal=quote.subtotal,
+        discount_amount=quote.discount_amount,
+        promo_code=quote.promo_code,
+        tax_amount=quote.tax_amount,
+        shipping_amount=quote.shipping_amount,
+        total_amount=quote.total_amount,
     )
 
     db.add(order)
     db.flush()
 
-    # Create order items and decrement stock
-    for item_data in order_data.items:
-        # Get product and check stock
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
-
-        if not product:
-            raise OutOfStockError(f"Product {item_data.product_id} not found")
-
-        if product.stock < item_data.quantity:
-            raise OutOfStockError(
-                f"Insufficient stock for {product.name}. "
-                f"Requested: {item_data.quantity}, Available: {product.stock}"
-            )
-
-        # Create order item
+    # Create order items
+    for product, quantity in lines:
         order_item = OrderItem(
             order_id=order.id,
             product_id=product.id,
-            product_name=item_data.product_name,
-            product_price=item_data.product_price,
-            quantity=item_data.quantity,
-            subtotal=item_data.subtotal,
+            product_name=product.name,
+            product_price=product.price,
+            quantity=quantity,
+            subtotal=round(product.price * quantity, 2),
         )
         db.add(order_item)
 
-        # Decrement stock
-        product.stock -= item_data.quantity
-
-    db.commit()
-    db.refresh(order)
-
-    # Load relationships
-    order = db.query(Order)\
-        .filter(Order.id == order.id)\
-        .options(joinedload(Order.items))\
-        .first()
+    # Convert the reservation: its units are now taken out of stock
+    if reservation_id:
+        release_reservation(db, reservation_id, owner_key)
 
-    return order
+    return commit_order(db, order, scope, idempotency_key, fingerprint)
 
 
 @router.get("/guest/{order_id}", response_model=OrderResponse)
@@ -1,112 +1,487 @@
 """Product API routes."""
-from typing import Optional
+from datetime import datetime
+from typing import Any, Literal, Optional
 from math import ceil
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Integer, cast, func, tuple_
+from sqlalchemy.orm import Query as SQLQuery, Session
 
+from app.config import settings
+from app.core.cache import MISSING, LRUCache
+from app.core.catalog import catalog_validator, on_products_changed
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.product_cache import product_cache
+from app.core.product_query import (
+    RELEVANCE,
+    SORT_FIELDS,
+    ProductFilters,
+    filter_products,
+    parse_fields,
+    resolve_sort,
+    select_fields,
+    sort_products,
+)
+from app.core.response_cache import encoded_response, response_cache
+from app.core.suggest import suggest_index
 from app.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductResponse, ProductListResponse
+from app.schemas.product import (
+    CategoryFacet,
+    PriceBucket,
+    ProductBatchResponse,
+    ProductFacetsResponse,
+    ProductListResponse,
+    ProductResponse,
+    ProductSuggestion,
+    ProductSuggestResponse,
+    product_list_response_model,
+    product_response_model,
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Listing totals keyed by the normalized filter tuple, dropped on product writes.
+# The TTL bounds staleness from writes made by other processes.
+count_cache = LRUCache(
+    maxsize=settings.PRODUCT_COUNT_CACHE_SIZE,
+    ttl=settings.PRODUCT_COUNT_CACHE_TTL_SECONDS,
+)
+on_products_changed(lambda product_ids: count_cache.clear())
+
+# Facet aggregations keyed by filter tuple and bucket width, dropped on product writes
+facet_cache = LRUCache(
+    maxsize=settings.PRODUCT_FACET_CACHE_SIZE,
+    ttl=settings.PRODUCT_FACET_CACHE_TTL_SECONDS,
+)
+on_products_changed(lambda product_ids: facet_cache.clear())
+
+
+def count_products(
+    query: SQLQuery,
+    filter_key: tuple,
+    include_total: str,
+) -> tuple[Optional[int], bool]:
+    """
+    Count the products matched by a filtered listing query.
+
+    Args:
+        query: Filtered product query, before sorting and pagination
+        filter_key: Normalized filter tuple identifying the query
+        include_total: "true" for an exact count, "approx" for a count capped
+            at PRODUCT_APPROX_COUNT_LIMIT, "false" to skip counting
+
+    Returns:
+        Tuple of (total or None, whether total is only a lower bound)
+    """
+    if include_total == "false":
+        return None, False
+
+    total = count_cache.get(filter_key)
+    if total is not MISSING:
+        return total, False
+
+    if include_total == "approx":
+        limit = settings.PRODUCT_APPROX_COUNT_LIMIT
+        total = query.limit(limit).count()
+        if total >= limit:
+            return total, True
+    else:
+        total = query.count()
+
+    count_cache.set(filter_key, total)
+    return total, False
+
+
+def encode_product_cursor(product: Product, sort_by: str, descending: bool) -> str:
+    """
+    Build the cursor pointing just past a product in the given sort order.
+
+    Args:
+        product: Last product of the current page
+        sort_by: Sort field name (a key of SORT_FIELDS)
+        descending: Whether the listing is sorted in descending order
+
+    Returns:
+        Opaque cursor string
+    """
+    key = getattr(product, sort_by)
+    if isinstance(key, datetime):
+        key = key.isoformat()
+
+    return encode_cursor({
+        "sort_by": sort_by,
+        "desc": descending,
+        "key": key,
+        "id": product.id,
+    })
+
+
+def decode_product_cursor(cursor: str, sort_by: str, descending: bool) -> tuple[Any, int]:
+    """
+    Decode a product cursor into its (sort key, id) position.
+
+    Args:
+        cursor: Cursor string from the client
+        sort_by: Requested sort field name
+        descending: Whether the requested sort order is descending
+
+    Returns:
+        Tuple of (sort key, product id)
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        payload = decode_cursor(cursor)
+        if payload.get("sort_by") != sort_by or payload.get("desc") != descending:
+            raise ValueError("Cursor does not match the requested sort")
+
+        key, product_id = payload["key"], payload["id"]
+        if sort_by == "created_at":
+            key = datetime.fromisoformat(key)
+        elif sort_by == "price":
+            key = float(key)
+        elif not isinstance(key, str):
+            raise ValueError("Invalid cursor")
+
+        if not isinstance(product_id, int):
+            raise ValueError("Invalid cursor")
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e) if isinstance(e, ValueError) else "Invalid cursor"
+        )
+
+    return key, product_id
+
 
 @router.get("", response_model=ProductListResponse)
 def get_products(
-    page: int = Query(1, ge=1, description="Page number"),
+    request: Request,
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is set)"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor"),
     page_size: int = Query(12, ge=1, le=100, description="Items per page"),
     category: Optional[str] = Query(None, description="Filter by category"),
-    search: Optional[str] = Query(None, description="Search in name and description"),
-    sort_by: str = Query("created_at", description="Sort by field (price, name, created_at)"),
+    search: Optional[str] = Query(None, description="Full-text search in name and description"),
+    sort_by: Optional[str] = Query(
+        None,
+        description="Sort by field (relevance, price, name, created_at). "
+                    "Defaults to relevance when searching, otherwise created_at",
+    ),
     sort_order: str = Query("desc", description="Sort order (asc, desc)"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
+    include_total: Literal["true", "false", "approx"] = Query(
+        "true",
+        description="Count matching products exactly (true), up to a cap (approx), or not at all (false)",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated product fields to return (id is always included)",
+    ),
     db: Session = Depends(get_db),
 ):
     """
     Get paginated list of products with filtering and sorting.
 
+    Pages can be addressed by number (offset pagination) or by passing the
+    next_cursor of the previous response (keyset pagination, which stays fast
+    on deep pages). Cursors are supported for the price, name and created_at
+    sorts. With fields, only the selected columns are loaded and returned.
+
+    The ETag is derived from the catalog validators (see
+    app.core.catalog.catalog_validator), so conditional requests are answered
+    with 304 after one aggregate query at most. Rendered pages are cached as
+    encoded (and gzip/brotli precompressed) bytes until products change.
+
     Args:
+        request: Incoming request (for conditional headers)
         page: Page number (1-indexed)
+        cursor: Opaque keyset cursor from a previous response
         page_size: Number of items per page
         category: Filter by category
-        search: Search query for name and description
-        sort_by: Field to sort by (price, name, created_at)
+        search: Full-text search query for name and description
+        sort_by: Field to sort by (relevance, price, name, created_at)
         sort_order: Sort order (asc, desc)
         min_price: Minimum price filter
         max_price: Maximum price filter
+        include_total: Whether and how to count matching products
+        fields: Comma-separated sparse fieldset, or None for all fields
         db: Database session
 
     Returns:
-        Paginated product list with metadata
-    """
-    # Start with base query
-    query = db.query(Product)
-
-    # Apply category filter
-    if category:
-        query = query.filter(Product.category == category)
-
-    # Apply search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term)
-            )
+        Encoded paginated product list with metadata, or 304 if the client's copy is current
+
+    Raises:
+        HTTPException: If the sort, cursor or fields are not supported
+    """
+    try:
+        sort_by, descending = resolve_sort(sort_by, sort_order, search)
+        fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if cursor and sort_by == RELEVANCE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cursor pagination supports sort_by {', '.join(SORT_FIELDS)}"
         )
 
-    # Apply price range filters
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+    # Answer revalidation from the catalog validators
+    validator = catalog_validator(db)
+    etag = make_etag("products", validator.tag, request.url.query)
+    headers = cache_headers(etag, validator.last_modified, settings.CATALOG_CACHE_MAX_AGE)
+    if is_not_modified(request, etag, validator.last_modified):
+        return not_modified(headers, request)
+
+    # Serve previously rendered pages without querying or serializing
+    cache_key = response_cache.key(request, validator.tag)
+    encoded = response_cache.get(cache_key)
+    if encoded is not None:
+        return encoded_response(request, encoded, headers)
 
-    # Get total count before pagination
-    total = query.count()
+    # Apply filters and get total count before pagination
+    filters = ProductFilters(category, search, min_price, max_price)
+    query, relevance = filter_products(db, filters)
+    total, total_is_approximate = count_products(query, filters.cache_key(), include_total)
 
-    # Apply sorting
-    sort_field = getattr(Product, sort_by, Product.created_at)
-    if sort_order.lower() == "asc":
-        query = query.order_by(sort_field.asc())
+    query = sort_products(query, sort_by, descending, relevance)
+    query = select_fields(query, fields, sort_by)
+
+    # Apply pagination, fetching one extra row to detect a next page
+    if cursor:
+        position = decode_product_cursor(cursor, sort_by, descending)
+        sort_key = tuple_(SORT_FIELDS[sort_by], Product.id)
+        query = query.filter(sort_key < position if descending else sort_key > position)
+        products = query.limit(page_size + 1).all()
     else:
-        query = query.order_by(sort_field.desc())
+        offset = (page - 1) * page_size
+        products = query.offset(offset).limit(page_size + 1).all()
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    products = query.offset(offset).limit(page_size).all()
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        if sort_by in SORT_FIELDS:
+            next_cursor = encode_product_cursor(products[-1], sort_by, descending)
 
     # Calculate total pages
-    total_pages = ceil(total / page_size) if total > 0 else 1
+    total_pages = None
+    if total is not None:
+        total_pages = ceil(total / page_size) if total > 0 else 1
 
-    return ProductListResponse(
+    response_model = ProductListResponse if fields is None else product_list_response_model(fields)
+    payload = response_model(
         products=products,
         total=total,
+        total_is_approximate=total_is_approximate,
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        next_cursor=next_cursor,
+    )
+    encoded = response_cache.set(cache_key, payload.model_dump_json().encode("utf-8"))
+    return encoded_response(request, encoded, headers)
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+def get_product_facets(
+    request: Request,
+    response: Response,
+    category: Optional[str] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, description="Full-text search in name and description"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
+    bucket_width: float = Query(50.0, gt=0, description="Width of each price histogram bucket"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get category counts and a price histogram for the current filters.
+
+    Both facets come from a single query grouped by (category, price bucket).
+    Category counts ignore the category filter so the sidebar can show the
+    alternatives; the histogram and total apply every filter.
+
+    Args:
+        request: Incoming request (for conditional headers)
+        response: Outgoing response (for cache headers)
+        category: Filter by category
+        search: Full-text search query for name and description
+        min_price: Minimum price filter
+        max_price: Maximum price filter
+        bucket_width: Width of each price histogram bucket
+        db: Database session
+
+    Returns:
+        Facet counts, or 304 if the client's copy is current
+    """
+    validator = catalog_validator(db)
+    etag = make_etag("product-facets", validator.tag, request.url.query)
+    headers = cache_headers(etag, validator.last_modified, settings.CATALOG_CACHE_MAX_AGE)
+    if is_not_modified(request, etag, validator.last_modified):
+        return not_modified(headers)
+    response.headers.update(headers)
+
+    filters = ProductFilters(category, search, min_price, max_price)
+    cache_key = (filters.cache_key(), bucket_width)
+    facets = facet_cache.get(cache_key)
+    if facets is not MISSING:
+        return facets
+
+    query, _ = filter_products(db, ProductFilters(None, search, min_price, max_price))
+
+    # Prices are non-negative, so truncation is floor(); PostgreSQL's CAST rounds instead
+    if db.get_bind().dialect.name == "sqlite":
+        bucket = cast(Product.price / bucket_width, Integer)
+    else:
+        bucket = cast(func.floor(Product.price / bucket_width), Integer)
+
+    rows = query\
+        .with_entities(Product.category, bucket, func.count())\
+        .group_by(Product.category, bucket)\
+        .all()
+
+    category_counts: dict[str, int] = {}
+    bucket_counts: dict[int, int] = {}
+    for row_category, row_bucket, count in rows:
+        category_counts[row_category] = category_counts.get(row_category, 0) + count
+        if not category or row_category == category:
+            bucket_counts[row_bucket] = bucket_counts.get(row_bucket, 0) + count
+
+    facets = ProductFacetsResponse(
+        total=sum(bucket_counts.values()),
+        categories=[
+            CategoryFacet(category=name, count=count)
+            for name, count in sorted(category_counts.items())
+        ],
+        bucket_width=bucket_width,
+        price_histogram=[
+            PriceBucket(
+                min_price=index * bucket_width,
+                max_price=(index + 1) * bucket_width,
+                count=count,
+            )
+            for index, count in sorted(bucket_counts.items())
+        ],
+    )
+    facet_cache.set(cache_key, facets)
+    return facets
+
+
+@router.get("/suggest", response_model=ProductSuggestResponse)
+def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+    db: Session = Depends(get_db),
+):
+    """
+    Autocomplete product names from an in-memory prefix index.
+
+    Besides the catalog validator (memoized, see app.core.catalog), the
+    database is only read to build the index and to pick up products
+    changed since the last lookup.
+
+    Args:
+        q: Text typed so far; the last word may be partial
+        limit: Maximum number of suggestions
+        db: Database session
+
+    Returns:
+        Matching product names
+    """
+    matches = suggest_index.suggest(db, q, limit)
+    return ProductSuggestResponse(
+        suggestions=[ProductSuggestion(id=product_id, name=name) for product_id, name in matches]
+    )
+
+
+@router.get("/batch", response_model=ProductBatchResponse)
+def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get many products by ID in a single query.
+
+    Reads authoritative rows (no cache), so callers can use it for stock checks.
+
+    Args:
+        ids: Comma-separated product IDs (duplicates are ignored)
+        db: Database session
+
+    Returns:
+        Found products in request order and the IDs that don't exist
+
+    Raises:
+        HTTPException: If ids is malformed or exceeds PRODUCT_BATCH_MAX_IDS
+    """
+    try:
+        product_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+
+    if not product_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one product id is required"
+        )
+
+    if len(product_ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} product ids can be requested at once"
+        )
+
+    found = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+    }
+
+    return ProductBatchResponse(
+        products=[found[product_id] for product_id in product_ids if product_id in found],
+        missing_ids=[product_id for product_id in product_ids if product_id not in found],
     )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated product fields to return (id is always included)",
+    ),
+    db: Session = Depends(get_db),
+):
     """
     Get a single product by ID.
 
+    The ETag is derived from the product's id, updated_at and fieldset.
+
     Args:
         product_id: Product ID
+        request: Incoming request (for conditional headers)
+        response: Outgoing response (for cache headers)
+        fields: Comma-separated sparse fieldset, or None for all fields
         db: Database session
 
     Returns:
-        Product data
+        Product data, or 304 if the client's copy is current
 
     Raises:
-        HTTPException: If product not found
+        HTTPException: If product not found or fields are not supported
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    product = product_cache.get(db, product_id)
 
     if not product:
         raise HTTPException(
@@ -114,4 +489,15 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
             detail=f"Product with id {product_id} not found"
         )
 
+    etag = make_etag("product", product.id, product.updated_at.isoformat(), fields)
+    headers = cache_headers(etag, product.updated_at, settings.CATALOG_CACHE_MAX_AGE)
+    if is_not_modified(request, etag, product.updated_at):
+        return not_modified(headers)
+
+    if fields is not None:
+        # Trimmed payloads don't match response_model, so they are encoded here
+        body = product_response_model(fields).model_validate(product).model_dump_json()
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    response.headers.update(headers)
     return product
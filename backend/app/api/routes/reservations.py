@@ -0,0 +1,77 @@
+"""Stock reservation API routes (see app.core.reservations)."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import CartOwner, get_cart_owner, is_checkout_service
+from app.core.exceptions import ReservationNotFoundError
+from app.core.reservations import create_reservation, release_reservation
+from app.database import get_db
+from app.schemas.reservation import ReservationCreate, ReservationResponse
+
+router = APIRouter(prefix="/reservations", tags=["reservations"])
+
+
+@router.post("", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+def reserve_stock(
+    reservation_data: ReservationCreate,
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    checkout: Annotated[bool, Depends(is_checkout_service)],
+    db: Session = Depends(get_db)
+):
+    """
+    Hold stock for checkout, for the authenticated user or the guest.
+
+    Replaces the caller's previous reservation, if any. The holds expire after
+    STOCK_HOLD_TTL_SECONDS unless the reservation is passed to order creation
+    first. Reservations from the checkout service are not capped.
+
+    Args:
+        reservation_data: Products and quantities to hold
+        owner: Current user or guest
+        checkout: Whether the checkout service sent the request
+        db: Database session
+
+    Returns:
+        Reservation ID and expiry time
+
+    Raises:
+        ReservationLimitError: If the quantities exceed the per-caller limits
+        OutOfStockError: If any product is missing or has too little unheld stock
+    """
+    reservation_id, expires_at = create_reservation(
+        db,
+        owner.key,
+        [(item.product_id, item.quantity) for item in reservation_data.items],
+        capped=not checkout,
+    )
+    db.commit()
+
+    return ReservationResponse(
+        reservation_id=reservation_id,
+        expires_at=expires_at,
+        items=reservation_data.items,
+    )
+
+
+@router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release_stock(
+    reservation_id: str,
+    owner: Annotated[CartOwner, Depends(get_cart_owner)],
+    db: Session = Depends(get_db)
+):
+    """
+    Release one of the caller's reservations, e.g. when checkout is abandoned.
+
+    Args:
+        reservation_id: Reservation ID
+        owner: Current user or guest
+        db: Database session
+
+    Raises:
+        ReservationNotFoundError: If the caller has no such reservation, e.g. it was already released
+    """
+    if not release_reservation(db, reservation_id, owner.key):
+        raise ReservationNotFoundError()
+    db.commit()
@@ -1,44 +1,53 @@
 """Shipping and tax calculation API routes."""
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
 
-from app.core.rates import calculate_shipping_and_tax
+from app.core.pricing import price_subtotal
+from app.database import get_db
 from app.schemas.shipping import ShippingTaxRequest, ShippingTaxResponse
 
 router = APIRouter(prefix="/shipping", tags=["shipping"])
 
 
 @router.post("/calculate", response_model=ShippingTaxResponse)
-def calculate_shipping_tax(request_data: ShippingTaxRequest):
+def calculate_shipping_tax(
+    request_data: ShippingTaxRequest,
+    db: Session = Depends(get_db)
+):
     """
-    Calculate shipping and tax based on ZIP code and subtotal.
+    Calculate shipping and tax based on ZIP code, subtotal and promo code.
+
+    Priced by app.core.pricing, like carts and orders: tax applies to the
+    subtotal after the promo discount.
 
     Args:
-        request_data: ZIP code and cart subtotal
+        request_data: ZIP code, cart subtotal and optional promo code
+        db: Database session
 
     Returns:
         Shipping and tax calculation breakdown
 
     Raises:
         HTTPException: If ZIP code is invalid
+        InvalidPromoCodeError: If the promo code cannot be applied
     """
     try:
-        state, tax_rate, shipping_cost, tax_amount, shipping_amount, total = calculate_shipping_and_tax(
-            request_data.zip_code,
-            request_data.subtotal
-        )
-
-        return ShippingTaxResponse(
-            zip_code=request_data.zip_code,
-            state=state,
-            tax_rate=tax_rate,
-            shipping_cost=shipping_cost,
-            subtotal=request_data.subtotal,
-            tax_amount=tax_amount,
-            shipping_amount=shipping_amount,
-            total=total
-        )
+        quote = price_subtotal(db, request_data.subtotal, request_data.zip_code, request_data.promo_code)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+
+    return ShippingTaxResponse(
+        zip_code=request_data.zip_code,
+        state=quote.state,
+        tax_rate=quote.tax_rate,
+        shipping_cost=quote.shipping_amount,
+        subtotal=quote.subtotal,
+        promo_code=quote.promo_code,
+        discount_amount=quote.discount_amount,
+        tax_amount=quote.tax_amount,
+        shipping_amount=quote.shipping_amount,
+        total=quote.total_amount
+    )
@@ -1,4 +1,6 @@
 """Application configuration using Pydantic settings."""
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -30,6 +32,53 @@ class Settings(BaseSettings):
     # Include both localhost and 127.0.0.1 with common ports
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000,http://localhost:5173,http://127.0.0.1:5173,http://localhost:5174,http://127.0.0.1:5174,http://0.0.0.0:3000"
 
+    # Catalog caching
+    PRODUCT_COUNT_CACHE_SIZE: int = 1024
+    PRODUCT_COUNT_CACHE_TTL_SECONDS: int = 300
+    PRODUCT_APPROX_COUNT_LIMIT: int = 1000
+    PRODUCT_FACET_CACHE_SIZE: int = 256
+    PRODUCT_FACET_CACHE_TTL_SECONDS: int = 300
+    PRODUCT_CACHE_SIZE: int = 4096
+    PRODUCT_CACHE_TTL_SECONDS: int = 60
+    PRODUCT_BATCH_MAX_IDS: int = 100
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 512
+    CATALOG_CACHE_MAX_AGE: int = 0  # Seconds clients may reuse catalog responses without revalidating
+    CATALOG_VALIDATOR_TTL_SECONDS: float = 1.0  # Seconds catalog ETags may miss other processes' writes
+
+    # Cart pricing
+    CART_PRICING_CACHE_SIZE: int = 4096
+    CART_PRICING_CACHE_TTL_SECONDS: int = 300
+
+    # Cart write-behind (single worker process only)
+    CART_WRITE_BEHIND: bool = False
+    CART_WRITE_BEHIND_JOURNAL: str = "./cart_journal.log"
+    CART_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Guest carts (expire this long after their last change)
+    GUEST_CART_TTL_DAYS: int = 7
+
+    # Stock holds taken at checkout start (see app.core.reservations)
+    STOCK_HOLD_TTL_SECONDS: int = 600
+    # Most units one user or guest can hold, per product and in total (the checkout service is exempt)
+    STOCK_HOLD_MAX_PER_PRODUCT: int = 10
+    STOCK_HOLD_MAX_PER_OWNER: int = 50
+
+    # Idempotency keys (stored responses are replayed for this long)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+
+    # Reaper (deletes carts untouched for CART_RETENTION_DAYS, old removal tombstones, expired stock holds and idempotency keys; interval 0 disables it)
+    CART_RETENTION_DAYS: int = 90
+    # Cart line removal tombstones; clients holding an older cart version reload the whole cart
+    CART_REMOVAL_RETENTION_HOURS: int = 72
+    CART_REAPER_INTERVAL_SECONDS: int = 3600
+    CART_REAPER_CHUNK_SIZE: int = 500
+
+    # Order numbers: distinct worker ID (0-255) per host; defaults to a hash of the
+    # hostname (logged as a warning), which can collide between hosts
+    ORDER_WORKER_ID: Optional[int] = None
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     AUTH_RATE_LIMIT_PER_MINUTE: int = 5
@@ -0,0 +1,359 @@
+"""
+Write-behind cart quantity buffer
+Keeps cart quantity updates in memory and writes them to SQL in coalesced batches.
+
+When CART_WRITE_BEHIND is enabled, PUT /cart/items/{id} validates ownership
+and stock with reads only, records the new quantity here and appends it to
+an append-only journal file (fsynced) instead of committing a transaction.
+A background task (see app.main) flushes the latest quantity of every
+buffered line, and the cart version, with one UPDATE batch per interval;
+repeated bumps of the same line cost one row write.
+
+Cart reads never flush: full carts overlay the buffered state (overlay()),
+deltas include buffered lines (load_cart_changes()) and pricing uses the
+buffered quantities (pending()). Other cart mutations, which write on top of
+the SQL rows, flush the cart first (flush_user()). On startup the journal is
+replayed (recover()), so buffered updates survive a crash.
+
+The buffer is per process: enable it only with a single worker process.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+from app.core import cart_store
+from app.core.exceptions import CartNotFoundError, OutOfStockError
+from app.core.product_cache import product_cache
+from app.database import SessionLocal
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingCart:
+    """
+    Buffered state of one cart: its version and the latest (quantity, version) per line.
+
+    written_version is the cart's version in SQL when the lines were
+    buffered; every buffered line version is newer.
+    """
+
+    user_id: int
+    version: int
+    updated_at: datetime
+    written_version: int = 0
+    lines: dict[int, tuple[int, int]] = field(default_factory=dict)
+
+
+class CartWriteBuffer:
+    """In-memory buffer of cart line quantities with a journal for durability."""
+
+    def __init__(self, enabled: bool, journal_path: str):
+        """
+        Args:
+            enabled: Whether quantity updates are buffered
+            journal_path: Append-only journal file for buffered updates
+        """
+        self.enabled = enabled
+        self.journal_path = journal_path
+        self._carts: dict[int, PendingCart] = {}
+        self._cart_by_user: dict[int, int] = {}
+        self._journal = None
+        self._lock = threading.RLock()
+        # Serializes SQL writes, which run without holding _lock
+        self._flush_lock = threading.Lock()
+
+    def set_item_quantity(self, db: Session, user_id: int, item_id: int, quantity: int) -> int:
+        """
+        Buffer a new quantity for a cart item, after checking ownership and stock.
+
+        Args:
+            db: Database session (reads only)
+            user_id: Cart owner's user ID
+            item_id: Cart item ID
+            quantity: New quantity
+
+        Returns:
+            ID of the cart the item belongs to
+
+        Raises:
+            CartNotFoundError: If the item is not in the user's cart
+            OutOfStockError: If the quantity exceeds available stock
+        """
+        row = db.query(CartItem.cart_id, CartItem.product_id, Cart.version)\
+            .join(Cart, Cart.id == CartItem.cart_id)\
+            .filter(CartItem.id == item_id, Cart.user_id == user_id)\
+            .first()
+        if not row:
+            raise CartNotFoundError("Cart item not found")
+        cart_id, product_id, version = row
+
+        product = product_cache.load(db, product_id)
+        if quantity > product.stock:
+            raise OutOfStockError(f"Only {product.stock} units available")
+
+        now = datetime.utcnow()
+        with self._lock:
+            pending = self._carts.get(cart_id)
+            if pending is None:
+                pending = self._carts[cart_id] = PendingCart(
+                    user_id=user_id, version=version, updated_at=now, written_version=version,
+                )
+                self._cart_by_user[user_id] = cart_id
+            pending.version = max(pending.version, version) + 1
+            pending.updated_at = now
+            pending.lines[item_id] = (quantity, pending.version)
+            self._append({
+                "cart_id": cart_id,
+                "user_id": user_id,
+                "item_id": item_id,
+                "quantity": quantity,
+                "version": pending.version,
+                "at": now.isoformat(),
+            })
+        return cart_id
+
+    def overlay(self, cart: Optional[Cart]) -> Optional[Cart]:
+        """
+        Apply buffered quantities and version to a loaded cart, without marking it dirty.
+
+        Args:
+            cart: Cart loaded with its items
+
+        Returns:
+            The same cart
+        """
+        if cart is None:
+            return cart
+        pending = self.pending(cart.id)
+        if pending is not None:
+            self._apply(pending, cart, cart.items)
+        return cart
+
+    def pending(self, cart_id: int) -> Optional[PendingCart]:
+        """
+        Get a copy of a cart's buffered state.
+
+        Args:
+            cart_id: Cart ID
+
+        Returns:
+            Buffered version and lines, or None if nothing is buffered
+        """
+        with self._lock:
+            pending = self._carts.get(cart_id)
+            return None if pending is None else replace(pending, lines=dict(pending.lines))
+
+    def load_cart_changes(self, db: Session, cart_id: int, since: int) -> Optional[cart_store.CartChanges]:
+        """
+        Load the lines of a cart changed after a version, including buffered updates.
+
+        The rows of buffered lines still have their written versions, so the
+        changes are read from SQL after the older of since and the cart's
+        written version, and filtered by since once the buffered quantities
+        and versions are applied.
+
+        Args:
+            db: Database session
+            cart_id: Cart ID
+            since: Cart version the client already has
+
+        Returns:
+            Changed and removed lines, or None if the client must reload the
+            full cart (see cart_store.load_cart_changes())
+        """
+        pending = self.pending(cart_id)
+        if pending is None:
+            return cart_store.load_cart_changes(db, cart_id, since)
+        if since > pending.version:
+            return None
+
+        changes = cart_store.load_cart_changes(db, cart_id, min(since, pending.written_version))
+        if changes is None:
+            return None
+        items = {item.id: item for item in changes.items}
+        unchanged = [item_id for item_id in pending.lines if item_id not in items]
+        if unchanged:
+            items.update((item.id, item) for item in db.query(CartItem)
+                         .filter(CartItem.id.in_(unchanged), CartItem.cart_id == cart_id)
+                         .options(joinedload(CartItem.product)))
+        self._apply(pending, changes.cart, items.values())
+
+        changes.items = sorted((item for item in items.values() if item.version > since), key=lambda item: item.id)
+        changes.saved_items = [saved for saved in changes.saved_items if saved.version > since]
+        return changes
+
+    def flush_user(self, user_id: int) -> None:
+        """
+        Write a user's buffered cart updates to SQL now.
+
+        Args:
+            user_id: Cart owner's user ID
+        """
+        cart_id = self._cart_by_user.get(user_id)
+        if cart_id is not None:
+            self.flush(cart_id)
+
+    def flush(self, cart_id: Optional[int] = None) -> int:
+        """
+        Write buffered updates to SQL in one transaction and truncate the journal.
+
+        The buffered state is copied under the lock and written without it,
+        so quantity updates and reads aren't blocked by the write; lines
+        updated again meanwhile stay buffered for the next flush.
+
+        Args:
+            cart_id: Flush only this cart, or None for all carts
+
+        Returns:
+            Number of cart lines written
+        """
+        with self._flush_lock:
+            with self._lock:
+                ids = list(self._carts) if cart_id is None else [cart_id]
+                carts = {buffered_id: self.pending(buffered_id) for buffered_id in ids if buffered_id in self._carts}
+            if not carts:
+                return 0
+
+            written = self._write(carts)
+
+            with self._lock:
+                for flushed_id, flushed in carts.items():
+                    pending = self._carts[flushed_id]
+                    if pending.version == flushed.version:
+                        del self._carts[flushed_id]
+                        self._cart_by_user.pop(pending.user_id, None)
+                        continue
+                    pending.written_version = flushed.version
+                    for item_id, line in flushed.lines.items():
+                        if pending.lines.get(item_id) == line:
+                            del pending.lines[item_id]
+                if not self._carts:
+                    self._truncate_journal()
+            return written
+
+    def recover(self) -> int:
+        """
+        Replay the journal left by a previous process into SQL.
+
+        Returns:
+            Number of cart lines written
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        carts: dict[int, PendingCart] = {}
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    continue
+                pending = carts.setdefault(entry["cart_id"], PendingCart(
+                    user_id=entry["user_id"],
+                    version=entry["version"],
+                    updated_at=datetime.fromisoformat(entry["at"]),
+                ))
+                pending.version = max(pending.version, entry["version"])
+                pending.updated_at = max(pending.updated_at, datetime.fromisoformat(entry["at"]))
+                pending.lines[entry["item_id"]] = (entry["quantity"], entry["version"])
+
+        with self._flush_lock:
+            written = self._write(carts) if carts else 0
+            with self._lock:
+                self._truncate_journal()
+        logger.info("Recovered %d buffered cart lines from %s", written, self.journal_path)
+        return written
+
+    def _write(self, carts: dict[int, PendingCart]) -> int:
+        """Write pending carts with one executemany UPDATE per table. Caller holds the flush lock."""
+        cart_rows = [
+            {"cart_pk": cart_id, "new_version": pending.version, "new_updated_at": pending.updated_at}
+            for cart_id, pending in carts.items()
+        ]
+        item_rows = [
+            {
+                "item_pk": item_id,
+                "cart_fk": cart_id,
+                "new_quantity": quantity,
+                "new_version": version,
+                "new_updated_at": pending.updated_at,
+            }
+            for cart_id, pending in carts.items()
+            for item_id, (quantity, version) in pending.lines.items()
+        ]
+
+        carts_table = Cart.__table__
+        items_table = CartItem.__table__
+        with SessionLocal() as db:
+            # Versions only move forward, so replaying entries that were
+            # already flushed (or overwritten by later mutations) is a no-op
+            db.execute(
+                update(carts_table)
+                .where(carts_table.c.id == bindparam("cart_pk"), carts_table.c.version < bindparam("new_version"))
+                .values(version=bindparam("new_version"), updated_at=bindparam("new_updated_at")),
+                cart_rows,
+            )
+            db.execute(
+                update(items_table)
+                .where(
+                    items_table.c.id == bindparam("item_pk"),
+                    items_table.c.cart_id == bindparam("cart_fk"),
+                    items_table.c.version < bindparam("new_version"),
+                )
+                .values(
+                    quantity=bindparam("new_quantity"),
+                    version=bindparam("new_version"),
+                    updated_at=bindparam("new_updated_at"),
+                ),
+                item_rows,
+            )
+            db.commit()
+        return len(item_rows)
+
+    @staticmethod
+    def _apply(pending: PendingCart, cart: Cart, items) -> None:
+        """Set buffered quantities and versions on a cart and its loaded items, without marking them dirty."""
+        set_committed_value(cart, "version", pending.version)
+        set_committed_value(cart, "updated_at", pending.updated_at)
+        for item in items:
+            if item.id in pending.lines:
+                quantity, version = pending.lines[item.id]
+                set_committed_value(item, "quantity", quantity)
+                set_committed_value(item, "version", version)
+                set_committed_value(item, "updated_at", pending.updated_at)
+
+    def _append(self, entry: dict) -> None:
+        """Append an entry to the journal and sync it to disk. Caller holds the lock."""
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _truncate_journal(self) -> None:
+        """Empty the journal once everything in it is in SQL. Caller holds the lock."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, "w").close()
+
+
+cart_buffer = CartWriteBuffer(
+    enabled=settings.CART_WRITE_BEHIND,
+    journal_path=settings.CART_WRITE_BEHIND_JOURNAL,
+)
@@ -0,0 +1,858 @@
+"""
+Cart persistence
+Single-statement cart mutations built on INSERT ... ON CONFLICT DO UPDATE,
+and the shared loaders used to return carts.
+
+Each mutation is one statement that also enforces the stock guard, so adding
+an item costs one round trip instead of a read-check-write sequence. Functions
+return whether the statement applied; callers re-read the affected rows only
+on failure, to explain it. Supports the SQLite and PostgreSQL dialects.
+
+Every mutating request bumps the cart version once (upsert_cart()); lines
+written by the request are stamped with it and removed lines leave a
+CartLineRemoval tombstone, so load_cart_changes() can return deltas. Line ids
+are never reused; the reaper prunes old tombstones (prune_removals()).
+
+Guest carts have no user and are keyed by guest_id (upsert_guest_cart());
+they expire GUEST_CART_TTL_DAYS after their last change and are folded into
+the user's cart at login by merge_guest_cart().
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy import and_, bindparam, case, delete, func, insert, inspect, lambda_stmt, literal, literal_column, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Executable
+
+from app.config import settings
+from app.core.exceptions import CartNotFoundError, OutOfStockError
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.cart_line_removal import CartLineRemoval
+from app.models.product import Product
+from app.models.saved_item import SavedItem
+
+carts = Cart.__table__
+cart_items = CartItem.__table__
+saved_items = SavedItem.__table__
+removals = CartLineRemoval.__table__
+products = Product.__table__
+
+# Product of the row proposed for insertion, for use inside ON CONFLICT
+# subqueries: stmt.excluded columns aren't correlated there and would add
+# the excluded table to the subquery's FROM
+_EXCLUDED_PRODUCT_ID = literal_column("excluded.product_id")
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+class CartVersion(NamedTuple):
+    """Cart id and the version a mutating request writes at."""
+
+    id: int
+    version: int
+
+
+@dataclass
+class CartChanges:
+    """Lines of a cart changed or removed after a version."""
+
+    cart: Cart
+    items: list[CartItem]
+    saved_items: list[SavedItem]
+    removed_item_ids: list[int]
+    removed_saved_item_ids: list[int]
+
+
+def _insert(db: Session, table):
+    """Build a dialect-specific INSERT supporting ON CONFLICT for the session's database."""
+    return _INSERTS[db.get_bind().dialect.name](table)
+
+
+def check_dialect(name: str) -> None:
+    """
+    Check that cart upserts support a database dialect.
+
+    Raises:
+        RuntimeError: If the dialect has no ON CONFLICT insert
+    """
+    if name not in _INSERTS:
+        raise RuntimeError(f"Carts need SQLite or PostgreSQL, not {name}")
+
+
+def _execute_upsert(db: Session, build: Callable[[Callable], Executable], params):
+    """
+    Execute an ON CONFLICT statement, compiling it only once per dialect.
+
+    SQLAlchemy gives dialect INSERTs no cache key (ON CONFLICT clauses aren't
+    traversable), so they would be recompiled on every execution, and
+    compiling the cart upserts costs several times more than running them on
+    SQLite. Wrapped in a lambda statement keyed by the builder and dialect,
+    the statement is built once and its compiled form is cached like any
+    other.
+
+    Args:
+        db: Database session
+        build: Module-level function building the statement from the
+            dialect's insert(); every value that changes between calls must
+            be a bindparam() set in params
+        params: Parameters, or a list of them to execute as a batch
+
+    Returns:
+        Result of the execution
+    """
+    dialect = db.get_bind().dialect.name
+    dialect_insert = _INSERTS[dialect]
+    stmt = lambda_stmt(lambda: build(dialect_insert), track_on=[build, dialect])
+    return db.execute(stmt, params)
+
+
+def _stock_of(product_id):
+    """Scalar subquery selecting a product's stock."""
+    return select(products.c.stock).where(products.c.id == product_id).scalar_subquery()
+
+
+def _attach_products(db: Session, lines: list) -> None:
+    """
+    Load the products of cart lines with one IN query and attach them.
+
+    Products already loaded (and not expired) in the session are reused.
+    """
+    products_by_id = {}
+    missing = []
+    for product_id in {line.product_id for line in lines}:
+        product = db.identity_map.get(identity_key(Product, product_id))
+        if product is None or inspect(product).expired:
+            missing.append(product_id)
+        else:
+            products_by_id[product_id] = product
+    if missing:
+        products_by_id.update(
+            (product.id, product)
+            for product in db.query(Product).filter(Product.id.in_(missing))
+        )
+
+    for line in lines:
+        set_committed_value(line, "product", products_by_id.get(line.product_id))
+
+
+def _record_removals(db: Session, cart: CartVersion, line_type: str, line_ids: Iterable[int]) -> None:
+    """Insert tombstones for removed cart lines."""
+    now = datetime.utcnow()
+    rows = [
+        {"cart_id": cart.id, "line_type": line_type, "line_id": line_id, "version": cart.version, "removed_at": now}
+        for line_id in line_ids
+    ]
+    if rows:
+        db.execute(insert(removals), rows)
+
+
+def _write_lines(db: Session, table, cart: CartVersion, quantities: dict[int, int]) -> None:
+    """Set the quantity of cart lines (cart_items or saved_items) by product with one multi-row upsert."""
+    if not quantities:
+        return
+
+    now = datetime.utcnow()
+    timestamps = {"created_at": now}
+    if "updated_at" in table.c:
+        timestamps["updated_at"] = now
+
+    stmt = _insert(db, table).values([
+        {"cart_id": cart.id, "product_id": product_id, "quantity": quantity, "version": cart.version, **timestamps}
+        for product_id, quantity in quantities.items()
+    ])
+    updates = {"quantity": stmt.excluded.quantity, "version": stmt.excluded.version}
+    if "updated_at" in table.c:
+        updates["updated_at"] = stmt.excluded.updated_at
+    db.execute(stmt.on_conflict_do_update(index_elements=[table.c.cart_id, table.c.product_id], set_=updates))
+
+
+def _build_set_item(dialect_insert):
+    """Upsert setting a cart item's quantity if stock covers it (see _write_items_guarded())."""
+    source = select(
+        bindparam("cart_id"), products.c.id, bindparam("quantity"), bindparam("version"),
+        bindparam("now"), bindparam("now"),
+    ).where(products.c.id == bindparam("product_id"), products.c.stock >= bindparam("quantity"))
+    stmt = dialect_insert(cart_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at", "updated_at"], source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[cart_items.c.cart_id, cart_items.c.product_id],
+        set_={
+            "quantity": stmt.excluded.quantity,
+            "version": stmt.excluded.version,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=stmt.excluded.quantity <= _stock_of(_EXCLUDED_PRODUCT_ID),
+    )
+
+
+def _write_items_guarded(db: Session, cart: CartVersion, quantities: dict[int, int]) -> dict[int, int]:
+    """
+    Set the quantity of cart items by product, skipping those that would exceed stock.
+
+    Each line is written by a guarded upsert (INSERT ... SELECT from the
+    product, which only selects it while its stock covers the quantity),
+    sent as one batch.
+
+    Returns:
+        Stock of each product that was not written, by product ID
+    """
+    if not quantities:
+        return {}
+
+    now = datetime.utcnow()
+    rows = [
+        {"cart_id": cart.id, "version": cart.version, "now": now, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in quantities.items()
+    ]
+
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        written = _execute_upsert(db, _build_set_item, rows).rowcount
+    else:
+        # The driver can't count rows across a batch (psycopg2); run it row by row
+        written = sum(_execute_upsert(db, _build_set_item, row).rowcount for row in rows)
+    if written == len(rows):
+        return {}
+
+    stock = dict(db.execute(
+        select(products.c.id, products.c.stock).where(products.c.id.in_(list(quantities)))
+    ).all())
+    return {
+        product_id: stock.get(product_id, 0)
+        for product_id, quantity in quantities.items() if quantity > stock.get(product_id, 0)
+    }
+
+
+def _delete_lines(db: Session, table, line_type: str, cart: CartVersion, product_ids: Iterable[int]) -> None:
+    """Delete cart lines (cart_items or saved_items) by product, leaving tombstones."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    stmt = delete(table)\
+        .where(table.c.cart_id == cart.id, table.c.product_id.in_(product_ids))\
+        .returning(table.c.id)
+    _record_removals(db, cart, line_type, db.execute(stmt).scalars().all())
+
+
+def load_cart(db: Session, cart_id: int) -> Optional[Cart]:
+    """
+    Load a cart with its items, saved items and their products in two queries.
+
+    The cart is joined to its items and their products, which returns one
+    row per item; saved items are loaded with their products by a second
+    query. Joining both collections in one query would instead return one
+    row per (item, saved item) pair.
+
+    Args:
+        db: Database session
+        cart_id: Cart ID
+
+    Returns:
+        Cart with relationships loaded, or None if it doesn't exist
+    """
+    return db.query(Cart)\
+        .filter(Cart.id == cart_id)\
+        .options(
+            joinedload(Cart.items).joinedload(CartItem.product),
+            selectinload(Cart.saved_items).joinedload(SavedItem.product),
+        )\
+        .first()
+
+
+def load_cart_changes(db: Session, cart_id: int, since: int) -> Optional[CartChanges]:
+    """
+    Load the lines of a cart written or removed after a version.
+
+    Removals are only known back to the cart's pruned_version (see
+    prune_removals()), so older versions get no delta.
+
+    Args:
+        db: Database session
+        cart_id: Cart ID
+        since: Cart version the client already has
+
+    Returns:
+        Changed and removed lines, or None if the cart doesn't exist or the
+        version is newer than the cart's or older than its pruned_version
+        (the client must reload the full cart)
+    """
+    cart = db.query(Cart).filter(Cart.id == cart_id).first()
+    if cart is None or since > cart.version or since < cart.pruned_version:
+        return None
+
+    items = db.query(CartItem)\
+        .filter(CartItem.cart_id == cart_id, CartItem.version > since)\
+        .order_by(CartItem.id)\
+        .all()
+    saved = db.query(SavedItem)\
+        .filter(SavedItem.cart_id == cart_id, SavedItem.version > since)\
+        .order_by(SavedItem.id)\
+        .all()
+    _attach_products(db, [*items, *saved])
+
+    removed = {CartLineRemoval.ITEM: [], CartLineRemoval.SAVED: []}
+    rows = db.query(CartLineRemoval.line_type, CartLineRemoval.line_id)\
+        .filter(CartLineRemoval.cart_id == cart_id, CartLineRemoval.version > since)\
+        .order_by(CartLineRemoval.id)\
+        .all()
+    for line_type, line_id in rows:
+        removed[line_type].append(line_id)
+
+    return CartChanges(
+        cart=cart,
+        items=items,
+        saved_items=saved,
+        removed_item_ids=removed[CartLineRemoval.ITEM],
+        removed_saved_item_ids=removed[CartLineRemoval.SAVED],
+    )
+
+
+def upsert_cart(db: Session, user_id: int) -> CartVersion:
+    """
+    Get a user's cart for a mutation, creating the cart if needed, in one statement.
+
+    The cart's version is incremented and its updated_at touched.
+
+    Args:
+        db: Database session
+        user_id: Cart owner's user ID
+
+    Returns:
+        Cart ID and the new version to stamp written lines with
+    """
+    result = _execute_upsert(db, _build_upsert_cart, {"user_id": user_id, "now": datetime.utcnow()})
+    return CartVersion(*result.one())
+
+
+def _build_upsert_cart(dialect_insert):
+    """Upsert of a user's cart (see upsert_cart())."""
+    stmt = dialect_insert(carts).values(
+        user_id=bindparam("user_id"), version=1, created_at=bindparam("now"), updated_at=bindparam("now")
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[carts.c.user_id],
+        set_={"version": carts.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    ).returning(carts.c.id, carts.c.version)
+
+
+def upsert_guest_cart(db: Session, guest_id: str) -> CartVersion:
+    """
+    Get a guest cart for a mutation, creating the cart if needed, and extend its expiry.
+
+    An expired guest cart that hasn't been purged yet is deleted and replaced
+    by an empty one.
+
+    Args:
+        db: Database session
+        guest_id: Guest cart id from the cart token
+
+    Returns:
+        Cart ID and the new version to stamp written lines with
+    """
+    now = datetime.utcnow()
+    params = {"guest_id": guest_id, "now": now, "expires_at": now + timedelta(days=settings.GUEST_CART_TTL_DAYS)}
+
+    row = _execute_upsert(db, _build_upsert_guest_cart, params).first()
+    if row is None:
+        delete_carts(db, select(carts.c.id).where(carts.c.guest_id == guest_id))
+        row = _execute_upsert(db, _build_upsert_guest_cart, params).one()
+    return CartVersion(*row)
+
+
+def _build_upsert_guest_cart(dialect_insert):
+    """Upsert of a guest's unexpired cart (see upsert_guest_cart())."""
+    stmt = dialect_insert(carts).values(
+        guest_id=bindparam("guest_id"), version=1, created_at=bindparam("now"), updated_at=bindparam("now"),
+        expires_at=bindparam("expires_at"),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[carts.c.guest_id],
+        set_={
+            "version": carts.c.version + 1,
+            "updated_at": stmt.excluded.updated_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=carts.c.expires_at > bindparam("now"),
+    ).returning(carts.c.id, carts.c.version)
+
+
+def delete_carts(db: Session, cart_ids) -> dict[str, int]:
+    """
+    Delete carts with their items, saved items and removal tombstones.
+
+    Args:
+        db: Database session
+        cart_ids: Cart IDs, as a list or a SELECT of ids
+
+    Returns:
+        Number of rows deleted per table name
+    """
+    if not isinstance(cart_ids, list):
+        # Materialize the ids once instead of re-running the query per table
+        cart_ids = db.execute(cart_ids).scalars().all()
+
+    deleted = {table.name: 0 for table in (removals, saved_items, cart_items, carts)}
+    if not cart_ids:
+        return deleted
+
+    for table in (removals, saved_items, cart_items):
+        deleted[table.name] = db.execute(delete(table).where(table.c.cart_id.in_(cart_ids))).rowcount
+    deleted[carts.name] = db.execute(delete(carts).where(carts.c.id.in_(cart_ids))).rowcount
+    return deleted
+
+
+def prune_removals(db: Session, removal_ids) -> int:
+    """
+    Delete removal tombstones, raising their carts' pruned_version past them.
+
+    Clients holding a version at or before a pruned tombstone's can no longer
+    get a complete delta; load_cart_changes() sends them the full cart instead.
+
+    Args:
+        db: Database session
+        removal_ids: Tombstone IDs, as a list or a SELECT of ids
+
+    Returns:
+        Number of tombstones deleted
+    """
+    if not isinstance(removal_ids, list):
+        removal_ids = db.execute(removal_ids).scalars().all()
+    if not removal_ids:
+        return 0
+
+    pruned = select(func.max(removals.c.version))\
+        .where(removals.c.cart_id == carts.c.id, removals.c.id.in_(removal_ids))\
+        .scalar_subquery()
+    db.execute(
+        update(carts)
+        .where(
+            carts.c.id.in_(select(removals.c.cart_id).where(removals.c.id.in_(removal_ids))),
+            carts.c.pruned_version < pruned,
+        )
+        .values(pruned_version=pruned)
+    )
+    return db.execute(delete(removals).where(removals.c.id.in_(removal_ids))).rowcount
+
+
+def merge_guest_cart(db: Session, guest_id: str, user_id: int) -> bool:
+    """
+    Fold a guest cart into a user's cart at login.
+
+    If the user has no cart yet, the guest cart is reassigned to the user in
+    one UPDATE. Otherwise its items are added to the user's with one
+    INSERT ... SELECT upsert (quantities combined and capped at stock, out of
+    stock products skipped), saved items the user doesn't have are copied
+    likewise, and the guest cart is deleted.
+
+    Args:
+        db: Database session
+        guest_id: Guest cart id from the cart token
+        user_id: User logging in
+
+    Returns:
+        True if an unexpired guest cart was merged
+    """
+    now = datetime.utcnow()
+    guest_cart_id = db.execute(
+        select(carts.c.id).where(carts.c.guest_id == guest_id, carts.c.expires_at > now)
+    ).scalar()
+    if guest_cart_id is None:
+        return False
+
+    has_cart = db.execute(select(carts.c.id).where(carts.c.user_id == user_id)).first() is not None
+    if not has_cart:
+        db.execute(
+            update(carts)
+            .where(carts.c.id == guest_cart_id)
+            .values(user_id=user_id, guest_id=None, expires_at=None, version=carts.c.version + 1, updated_at=now)
+        )
+        return True
+
+    cart = upsert_cart(db, user_id)
+
+    guest_items = cart_items.alias("guest_items")
+    capped = case((guest_items.c.quantity > products.c.stock, products.c.stock), else_=guest_items.c.quantity)
+    source = select(
+        literal(cart.id), guest_items.c.product_id, capped, literal(cart.version), literal(now), literal(now)
+    ).select_from(
+        guest_items.join(products, products.c.id == guest_items.c.product_id)
+    ).where(guest_items.c.cart_id == guest_cart_id, products.c.stock > 0)
+    stmt = _insert(db, cart_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at", "updated_at"], source
+    )
+    combined = cart_items.c.quantity + stmt.excluded.quantity
+    stock = _stock_of(_EXCLUDED_PRODUCT_ID)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[cart_items.c.cart_id, cart_items.c.product_id],
+        set_={
+            "quantity": case((combined > stock, stock), else_=combined),
+            "version": stmt.excluded.version,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+    guest_saved = saved_items.alias("guest_saved")
+    stmt = _insert(db, saved_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at"],
+        select(
+            literal(cart.id), guest_saved.c.product_id, guest_saved.c.quantity, literal(cart.version), literal(now)
+        ).where(guest_saved.c.cart_id == guest_cart_id),
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[saved_items.c.cart_id, saved_items.c.product_id]))
+
+    delete_carts(db, [guest_cart_id])
+    return True
+
+
+def add_cart_item(db: Session, cart: CartVersion, product_id: int, quantity: int) -> bool:
+    """
+    Add a product to a cart, or increment its quantity, unless stock is exceeded.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart()
+        product_id: Product ID
+        quantity: Quantity to add
+
+    Returns:
+        True if the item was written, False if the product doesn't exist or
+        the resulting quantity would exceed its stock
+    """
+    params = {
+        "cart_id": cart.id, "version": cart.version, "now": datetime.utcnow(),
+        "product_id": product_id, "quantity": quantity,
+    }
+    return _execute_upsert(db, _build_add_item, params).first() is not None
+
+
+def _build_add_item(dialect_insert):
+    """Upsert adding to a cart item's quantity if stock covers it (see add_cart_item())."""
+    source = select(
+        bindparam("cart_id"), products.c.id, bindparam("quantity"), bindparam("version"),
+        bindparam("now"), bindparam("now"),
+    ).where(products.c.id == bindparam("product_id"), products.c.stock >= bindparam("quantity"))
+
+    stmt = dialect_insert(cart_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at", "updated_at"], source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[cart_items.c.cart_id, cart_items.c.product_id],
+        set_={
+            "quantity": cart_items.c.quantity + stmt.excluded.quantity,
+            "version": stmt.excluded.version,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=cart_items.c.quantity + stmt.excluded.quantity <= _stock_of(_EXCLUDED_PRODUCT_ID),
+    ).returning(cart_items.c.id)
+
+
+def merge_cart_items(db: Session, cart: CartVersion, quantities: dict[int, int]) -> None:
+    """
+    Merge product quantities into a cart, capping each line at available stock.
+
+    Reads all referenced products and existing lines with one query each and
+    writes every line with one multi-row upsert. Unknown products are skipped.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart()
+        quantities: Quantity to add per product ID
+    """
+    if not quantities:
+        return
+
+    product_ids = list(quantities)
+    stock = dict(db.execute(
+        select(products.c.id, products.c.stock).where(products.c.id.in_(product_ids))
+    ).all())
+    existing = dict(db.execute(
+        select(cart_items.c.product_id, cart_items.c.quantity)
+        .where(cart_items.c.cart_id == cart.id, cart_items.c.product_id.in_(list(stock)))
+    ).all())
+
+    _write_lines(db, cart_items, cart, {
+        product_id: min(existing.get(product_id, 0) + quantities[product_id], available)
+        for product_id, available in stock.items()
+    })
+
+
+def set_cart_item_quantity(db: Session, cart: CartVersion, item_id: int, quantity: int) -> bool:
+    """
+    Set a cart item's quantity unless stock is exceeded.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart(), which the item must belong to
+        item_id: Cart item ID
+        quantity: New quantity
+
+    Returns:
+        True if the item was updated, False if it doesn't exist in the cart or
+        the quantity exceeds stock
+    """
+    stmt = update(cart_items)\
+        .where(
+            cart_items.c.id == item_id,
+            cart_items.c.cart_id == cart.id,
+            literal(quantity) <= _stock_of(cart_items.c.product_id),
+        )\
+        .values(quantity=quantity, version=cart.version, updated_at=datetime.utcnow())\
+        .returning(cart_items.c.id)
+    return db.execute(stmt).first() is not None
+
+
+def save_cart_item(db: Session, cart: CartVersion, item_id: int) -> bool:
+    """
+    Move a cart item to saved items, replacing the saved quantity if already saved.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart(), which the item must belong to
+        item_id: Cart item ID
+
+    Returns:
+        True if the item was moved, False if it doesn't exist in the cart
+    """
+    source = select(
+        cart_items.c.cart_id, cart_items.c.product_id, cart_items.c.quantity,
+        literal(cart.version), literal(datetime.utcnow())
+    ).where(cart_items.c.id == item_id, cart_items.c.cart_id == cart.id)
+
+    stmt = _insert(db, saved_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at"], source
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[saved_items.c.cart_id, saved_items.c.product_id],
+        set_={"quantity": stmt.excluded.quantity, "version": stmt.excluded.version},
+    ).returning(saved_items.c.id)
+    if db.execute(stmt).first() is None:
+        return False
+
+    return delete_cart_item(db, cart, item_id)
+
+
+def restore_saved_item(db: Session, cart: CartVersion, saved_id: int) -> bool:
+    """
+    Move a saved item back to the cart, adding to an existing quantity, unless stock is exceeded.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart(), which the saved item must belong to
+        saved_id: Saved item ID
+
+    Returns:
+        True if the item was moved, False if it doesn't exist in the cart or
+        the resulting quantity would exceed stock
+    """
+    now = datetime.utcnow()
+    source = select(
+        saved_items.c.cart_id, saved_items.c.product_id, saved_items.c.quantity,
+        literal(cart.version), literal(now), literal(now)
+    ).join(
+        products, products.c.id == saved_items.c.product_id
+    ).where(
+        saved_items.c.id == saved_id,
+        saved_items.c.cart_id == cart.id,
+        saved_items.c.quantity <= products.c.stock,
+    )
+
+    stmt = _insert(db, cart_items).from_select(
+        ["cart_id", "product_id", "quantity", "version", "created_at", "updated_at"], source
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[cart_items.c.cart_id, cart_items.c.product_id],
+        set_={
+            "quantity": cart_items.c.quantity + stmt.excluded.quantity,
+            "version": stmt.excluded.version,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=cart_items.c.quantity + stmt.excluded.quantity <= _stock_of(_EXCLUDED_PRODUCT_ID),
+    ).returning(cart_items.c.id)
+    if db.execute(stmt).first() is None:
+        return False
+
+    return delete_saved_item(db, cart, saved_id)
+
+
+def delete_cart_item(db: Session, cart: CartVersion, item_id: int) -> bool:
+    """
+    Delete a cart item.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart(), which the item must belong to
+        item_id: Cart item ID
+
+    Returns:
+        True if the item was deleted, False if it doesn't exist in the cart
+    """
+    stmt = delete(cart_items)\
+        .where(and_(cart_items.c.id == item_id, cart_items.c.cart_id == cart.id))\
+        .returning(cart_items.c.id)
+    deleted = db.execute(stmt).scalars().all()
+    _record_removals(db, cart, CartLineRemoval.ITEM, deleted)
+    return bool(deleted)
+
+
+def delete_saved_item(db: Session, cart: CartVersion, saved_id: int) -> bool:
+    """
+    Delete a saved item.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart(), which the saved item must belong to
+        saved_id: Saved item ID
+
+    Returns:
+        True if the item was deleted, False if it doesn't exist in the cart
+    """
+    stmt = delete(saved_items)\
+        .where(and_(saved_items.c.id == saved_id, saved_items.c.cart_id == cart.id))\
+        .returning(saved_items.c.id)
+    deleted = db.execute(stmt).scalars().all()
+    _record_removals(db, cart, CartLineRemoval.SAVED, deleted)
+    return bool(deleted)
+
+
+def clear_cart_items(db: Session, cart: CartVersion) -> None:
+    """
+    Delete all items of a cart (saved items are kept).
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart()
+    """
+    stmt = delete(cart_items)\
+        .where(cart_items.c.cart_id == cart.id)\
+        .returning(cart_items.c.id)
+    _record_removals(db, cart, CartLineRemoval.ITEM, db.execute(stmt).scalars().all())
+
+
+def apply_cart_operations(db: Session, cart: CartVersion, operations: list) -> None:
+    """
+    Apply an ordered batch of cart operations with the semantics of the single-item endpoints.
+
+    The cart's lines and the stock of every product involved are read with
+    one query each; operations are validated and applied in memory, and the
+    resulting lines are written with one delete per table, one batch of
+    stock-guarded upserts for cart items and one upsert for saved items.
+    The guarded upserts re-check stock when writing, so stock sold between
+    the read and the write can't leave a line above it.
+
+    A line removed by an operation (remove, save or restore) is deleted even
+    if a later operation adds the same product back; the re-added line gets
+    a new ID, like it would through the single-item endpoints.
+
+    If any operation or guarded write fails, the caller must roll back:
+    earlier writes of the batch may already have been executed.
+
+    Args:
+        db: Database session
+        cart: Cart from upsert_cart()
+        operations: CartOperation list (op, product_id, item_id, saved_id, quantity)
+
+    Raises:
+        OutOfStockError: If an operation exceeds stock or adds an unknown product,
+            or stock dropped below a line's quantity before it was written
+        CartNotFoundError: If an operation references a missing cart or saved item
+    """
+    item_rows = db.execute(
+        select(cart_items.c.id, cart_items.c.product_id, cart_items.c.quantity)
+        .where(cart_items.c.cart_id == cart.id)
+    ).all()
+    saved_rows = db.execute(
+        select(saved_items.c.id, saved_items.c.product_id, saved_items.c.quantity)
+        .where(saved_items.c.cart_id == cart.id)
+    ).all()
+
+    # Line ids map to products until the line is removed by an earlier operation
+    item_products = {row.id: row.product_id for row in item_rows}
+    saved_products = {row.id: row.product_id for row in saved_rows}
+    original_items = {row.product_id: row.quantity for row in item_rows}
+    original_saved = {row.product_id: row.quantity for row in saved_rows}
+    items = dict(original_items)
+    saved = dict(original_saved)
+    # Products whose original line an operation removed, and the last operation setting each item
+    removed_items = set()
+    removed_saved = set()
+    item_operations = {}
+
+    product_ids = {op.product_id for op in operations if op.op == "add"} | set(items) | set(saved)
+    stock = dict(db.execute(
+        select(products.c.id, products.c.stock).where(products.c.id.in_(product_ids))
+    ).all())
+
+    for index, op in enumerate(operations):
+        prefix = f"Operation {index}: "
+
+        if op.op == "add":
+            if op.product_id not in stock:
+                raise OutOfStockError(prefix + "Product not found")
+            available = stock[op.product_id]
+            existing = items.get(op.product_id, 0)
+            if existing + op.quantity > available:
+                if existing:
+                    raise OutOfStockError(
+                        prefix + f"Only {available} units available. You already have {existing} in your cart."
+                    )
+                raise OutOfStockError(prefix + f"Only {available} units available")
+            items[op.product_id] = existing + op.quantity
+            item_operations[op.product_id] = index
+
+        elif op.op == "restore":
+            product_id = saved_products.pop(op.saved_id, None)
+            if product_id is None:
+                raise CartNotFoundError(prefix + "Saved item not found")
+            quantity = saved.pop(product_id)
+            removed_saved.add(product_id)
+            available = stock.get(product_id, 0)
+            if quantity > available or items.get(product_id, 0) + quantity > available:
+                raise OutOfStockError(prefix + f"Only {available} units available")
+            items[product_id] = items.get(product_id, 0) + quantity
+            item_operations[product_id] = index
+
+        else:
+            product_id = item_products.get(op.item_id)
+            if product_id is None:
+                raise CartNotFoundError(prefix + "Cart item not found")
+
+            if op.op == "update":
+                available = stock.get(product_id, 0)
+                if op.quantity > available:
+                    raise OutOfStockError(prefix + f"Only {available} units available")
+                items[product_id] = op.quantity
+                item_operations[product_id] = index
+            else:
+                del item_products[op.item_id]
+                quantity = items.pop(product_id)
+                removed_items.add(product_id)
+                if op.op == "save":
+                    saved[product_id] = quantity
+
+    _delete_lines(db, cart_items, CartLineRemoval.ITEM, cart,
+                  (set(original_items) - set(items)) | (removed_items & set(original_items)))
+    _delete_lines(db, saved_items, CartLineRemoval.SAVED, cart,
+                  (set(original_saved) - set(saved)) | (removed_saved & set(original_saved)))
+
+    short = _write_items_guarded(db, cart, {
+        product_id: quantity for product_id, quantity in items.items()
+        if product_id in removed_items or original_items.get(product_id) != quantity
+    })
+    if short:
+        index, product_id = min((item_operations.get(product_id, 0), product_id) for product_id in short)
+        raise OutOfStockError(f"Operation {index}: Only {short[product_id]} units available")
+
+    _write_lines(db, saved_items, cart, {
+        product_id: quantity for product_id, quantity in saved.items()
+        if product_id in removed_saved or original_saved.get(product_id) != quantity
+    })
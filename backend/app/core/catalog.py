@@ -0,0 +1,184 @@
+"""
+Catalog change tracking
+Tracks committed product writes so in-process catalog caches can be invalidated.
+
+Product inserts, updates and deletes made through the ORM are collected per
+session at flush time and published when the session commits. Writes that
+bypass the ORM (bulk UPDATE statements) must be reported with
+mark_products_changed().
+
+Only this process's writes are published. HTTP validators must also change
+on writes by other workers and scripts, so catalog_validator() derives them
+from the products table itself.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import MISSING, LRUCache
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Callback signature: receives the changed product ids, or None if unknown
+ProductsChangedCallback = Callable[[Optional[set[int]]], None]
+
+_PENDING_KEY = "changed_product_ids"
+_ALL_PRODUCTS = None
+
+_lock = threading.Lock()
+_version = 0
+_last_modified = datetime.utcnow()
+_callbacks: list[ProductsChangedCallback] = []
+
+# Validators by in-process catalog version; the TTL bounds how long writes by
+# other processes go unnoticed
+_validators = LRUCache(maxsize=1, ttl=settings.CATALOG_VALIDATOR_TTL_SECONDS)
+
+
+class CatalogValidator(NamedTuple):
+    """Validators of the catalog's committed contents."""
+
+    tag: str
+    last_modified: datetime
+
+
+def catalog_version() -> int:
+    """
+    Get the in-process catalog version.
+
+    Returns:
+        Counter incremented on every committed product write
+    """
+    return _version
+
+
+def catalog_tag(count: int, updated_at: Optional[datetime]) -> str:
+    """
+    Build the catalog tag of a set of products (see catalog_validator()).
+
+    Args:
+        count: Number of products
+        updated_at: Latest updated_at among them, or None if there are none
+
+    Returns:
+        Tag string
+    """
+    return f"{count}.{(updated_at or datetime.min).isoformat()}"
+
+
+def catalog_validator(db: Session) -> CatalogValidator:
+    """
+    Get validators of the products table that are the same in every process.
+
+    The tag combines the product count and the latest updated_at, so any
+    insert, update (ORM or bulk UPDATE, which both set updated_at) or delete
+    changes it, whichever process made it. Last-Modified is the latest
+    updated_at, or this process's last write if later; a delete made by
+    another process changes only the tag.
+
+    Validators are reused for CATALOG_VALIDATOR_TTL_SECONDS, or until this
+    process writes products.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Tag suitable for building ETags, and naive UTC last modification time
+    """
+    version = _version
+    validator = _validators.get(version)
+    if validator is MISSING:
+        count, updated_at = db.query(func.count(Product.id), func.max(Product.updated_at)).one()
+        validator = CatalogValidator(
+            tag=catalog_tag(count, updated_at),
+            last_modified=max(updated_at or datetime.min, _last_modified),
+        )
+        _validators.set(version, validator)
+    return validator
+
+
+def on_products_changed(callback: ProductsChangedCallback) -> ProductsChangedCallback:
+    """
+    Register a callback run after a commit that changed products.
+
+    Can be used as a decorator.
+
+    Args:
+        callback: Function receiving the set of changed product ids, or None
+            when the affected products are unknown
+
+    Returns:
+        The callback, unchanged
+    """
+    _callbacks.append(callback)
+    return callback
+
+
+def mark_products_changed(session: Session, product_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Record product writes made outside the ORM unit of work.
+
+    The change is published when the session commits.
+
+    Args:
+        session: Session the write was executed on
+        product_ids: Changed product ids, or None if unknown
+    """
+    if product_ids is None:
+        session.info[_PENDING_KEY] = _ALL_PRODUCTS
+        return
+
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    if pending is not _ALL_PRODUCTS:
+        pending.update(product_ids)
+
+
+def publish_products_changed(product_ids: Optional[set[int]] = None) -> None:
+    """
+    Bump the catalog version and notify registered callbacks.
+
+    Args:
+        product_ids: Changed product ids, or None if unknown
+    """
+    global _version, _last_modified
+    with _lock:
+        _version += 1
+        _last_modified = datetime.utcnow()
+
+    for callback in _callbacks:
+        try:
+            callback(product_ids)
+        except Exception:
+            logger.exception("Catalog change callback %r failed", callback)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_product_changes(session: Session, flush_context) -> None:
+    """Remember products written by this flush until the transaction ends."""
+    product_ids = [
+        obj.id for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Product)
+    ]
+    if product_ids:
+        mark_products_changed(session, product_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_product_changes(session: Session) -> None:
+    """Publish the products written by the committed transaction."""
+    if _PENDING_KEY in session.info:
+        publish_products_changed(session.info.pop(_PENDING_KEY))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_product_changes(session: Session) -> None:
+    """Forget product writes that were rolled back."""
+    session.info.pop(_PENDING_KEY, None)
@@ -101,3 +101,33 @@ class OrderNotFoundError(HTTPException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=detail,
         )
+
+
+class ReservationNotFoundError(HTTPException):
+    """Exception raised when a stock reservation is not found or has been released."""
+
+    def __init__(self, detail: str = "Reservation not found"):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail,
+        )
+
+
+class ReservationLimitError(HTTPException):
+    """Exception raised when a reservation would hold more stock than a caller may."""
+
+    def __init__(self, detail: str = "Reservation exceeds the stock hold limits"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+        )
+
+
+class IdempotencyKeyMismatchError(HTTPException):
+    """Exception raised when an idempotency key is reused with a different request."""
+
+    def __init__(self, detail: str = "Idempotency-Key was already used with a different request"):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=detail,
+        )
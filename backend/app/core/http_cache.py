@@ -0,0 +1,153 @@
+"""
+HTTP caching utilities
+Builds ETag / Last-Modified / Cache-Control headers and evaluates conditional GET requests
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# Content-codings responses may be compressed with, best first
+CONTENT_CODINGS = ("br", "gzip")
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values identifying a representation.
+
+    Args:
+        parts: Values that change whenever the representation changes
+
+    Returns:
+        Quoted ETag string
+    """
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def coded_etag(etag: str, coding: Optional[str]) -> str:
+    """
+    Build the ETag of a content-coded variant of a representation.
+
+    A strong ETag must differ between variants whose bytes differ, and
+    Content-Encoding changes the bytes (RFC 9110, section 8.8.3), so the
+    coding is appended inside the quotes, e.g. "abc" becomes "abc-gzip".
+
+    Args:
+        etag: ETag of the unencoded representation
+        coding: Content-coding of the variant, or None for the unencoded one
+
+    Returns:
+        Quoted ETag string
+    """
+    return f'{etag[:-1]}-{coding}"' if coding else etag
+
+
+def _requested_etags(if_none_match: str) -> dict[str, str]:
+    """Map the If-None-Match entity tags, without coding suffix, to the tags as sent (without W/)."""
+    tags = {}
+    for tag in if_none_match.split(","):
+        # GET uses weak comparison, so W/ prefixes are ignored
+        tag = tag.strip().removeprefix("W/")
+        base = tag
+        for coding in CONTENT_CODINGS:
+            if tag.endswith(f'-{coding}"'):
+                base = f'{tag[:-len(coding) - 2]}"'
+                break
+        tags.setdefault(base, tag)
+    return tags
+
+
+def http_date(value: datetime) -> str:
+    """
+    Format a naive UTC datetime as an HTTP date.
+
+    Args:
+        value: Naive datetime in UTC
+
+    Returns:
+        IMF-fixdate string, e.g. "Sun, 06 Nov 1994 08:49:37 GMT"
+    """
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime], max_age: int) -> dict[str, str]:
+    """
+    Build validator and freshness headers for a cacheable response.
+
+    Args:
+        etag: Strong ETag of the representation
+        last_modified: Naive UTC modification time, if known
+        max_age: Seconds clients and proxies may reuse the response without revalidating
+
+    Returns:
+        Header dictionary
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current representation.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the request has no If-None-Match header (RFC 9110, section 13.2.2). The
+    ETags of the representation's content-coded variants (see coded_etag())
+    match too.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag
+        last_modified: Current naive UTC modification time, if known
+
+    Returns:
+        True if the client's cached copy is still valid
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return etag in _requested_etags(if_none_match)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    # HTTP dates have one-second resolution
+    modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return modified <= since
+
+
+def not_modified(headers: dict[str, str], request: Optional[Request] = None) -> Response:
+    """
+    Build a 304 Not Modified response carrying the current validators.
+
+    Args:
+        headers: Headers from cache_headers()
+        request: Request the 304 answers, if its representation has
+            content-coded variants; the ETag of the variant the client
+            presented is echoed
+
+    Returns:
+        Empty 304 response
+    """
+    if_none_match = request.headers.get("if-none-match") if request is not None else None
+    if if_none_match and if_none_match.strip() != "*":
+        headers = {**headers, "ETag": _requested_etags(if_none_match).get(headers["ETag"], headers["ETag"])}
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,132 @@
+"""
+Idempotency keys
+Makes retried write requests safe: the first successful response to a request
+with an Idempotency-Key header is stored and replayed for every retry.
+
+A stored key belongs to a scope (endpoint and caller, see caller_scope()),
+so callers can't replay each other's responses, and remembers a
+fingerprint of the request body; reusing a key with a different body is
+rejected. The key row is inserted in the same transaction as the write it
+describes, so a key is stored if and only if the write committed. When two
+requests with the same key race, the unique (scope, key) constraint makes
+the second commit fail; its transaction rolls back and it replays the
+first one's response instead. Only successful responses are stored, so a
+failed request can be retried with the same key.
+
+Keys expire after IDEMPOTENCY_KEY_TTL_HOURS; the reaper deletes them (see
+app.core.reaper).
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.exceptions import IdempotencyKeyMismatchError
+from app.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(payload: Any) -> str:
+    """
+    Hash a JSON-serializable request body, independent of key order.
+
+    Args:
+        payload: Request body
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def caller_scope(endpoint: str, caller: str) -> str:
+    """
+    Build the scope of a caller's keys on an endpoint.
+
+    The caller is hashed, so scopes stay short and contain no personal data.
+
+    Args:
+        endpoint: Endpoint name, e.g. "orders"
+        caller: Identity of the caller, e.g. a user ID or normalized email
+
+    Returns:
+        Scope string, e.g. "orders:3f2a..."
+    """
+    return f"{endpoint}:{hashlib.sha256(caller.encode()).hexdigest()[:32]}"
+
+
+def find_stored_response(db: Session, scope: str, key: str, fingerprint: str) -> Optional[JSONResponse]:
+    """
+    Look up the stored response for a key.
+
+    An expired key is deleted (the caller commits with its own write), so
+    the key can be stored again.
+
+    Args:
+        db: Database session
+        scope: Endpoint and caller the key belongs to
+        key: Idempotency key
+        fingerprint: Fingerprint of the current request body
+
+    Returns:
+        The stored response to replay, or None if the key is unused
+
+    Raises:
+        IdempotencyKeyMismatchError: If the key was used with a different request body
+    """
+    stored = db.query(IdempotencyKey)\
+        .filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key)\
+        .first()
+    if stored is None:
+        return None
+    if stored.expires_at <= datetime.utcnow():
+        db.delete(stored)
+        db.flush()
+        return None
+    if stored.fingerprint != fingerprint:
+        raise IdempotencyKeyMismatchError()
+
+    return JSONResponse(
+        content=json.loads(stored.response_body),
+        status_code=stored.status_code,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def store_response(
+    db: Session,
+    scope: str,
+    key: str,
+    fingerprint: str,
+    status_code: int,
+    body: Any,
+) -> None:
+    """
+    Store a response for a key. The caller commits, together with the write.
+
+    Args:
+        db: Database session
+        scope: Endpoint and caller the key belongs to
+        key: Idempotency key
+        fingerprint: Fingerprint of the request body
+        status_code: Response status code
+        body: JSON-serializable response body
+    """
+    now = datetime.utcnow()
+    db.add(IdempotencyKey(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response_body=json.dumps(body),
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    ))
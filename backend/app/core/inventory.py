@@ -0,0 +1,91 @@
+"""
+Stock decrements
+Takes an order's items out of stock with one guarded UPDATE batch.
+
+Each row is updated only if its available stock (stock minus other
+reservations' unexpired holds, see app.core.reservations) still covers the
+quantity, so concurrent orders can never oversell: whichever commits second
+re-evaluates the guard against the first one's decrement. The number of
+updated rows decides success; on a shortfall the transaction is rolled back.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.catalog import mark_products_changed
+from app.core.exceptions import OutOfStockError
+from app.core.reservations import held_quantities, stock_holds
+from app.models.product import Product
+
+products = Product.__table__
+
+
+def decrement_stock(
+    db: Session,
+    items: Iterable[tuple[int, int]],
+    reservation_id: Optional[str] = None,
+) -> None:
+    """
+    Take quantities out of stock, all or nothing. The caller commits.
+
+    Args:
+        db: Database session
+        items: (product ID, quantity) pairs; repeated products are summed
+        reservation_id: Reservation being converted; its holds count as available
+
+    Raises:
+        OutOfStockError: If any product has too little available stock, after
+            rolling back the session's transaction
+    """
+    requested = Counter()
+    for product_id, quantity in items:
+        requested[product_id] += quantity
+
+    held = select(func.coalesce(func.sum(stock_holds.c.quantity), 0))\
+        .where(
+            stock_holds.c.product_id == products.c.id,
+            stock_holds.c.expires_at > datetime.utcnow(),
+        )
+    if reservation_id:
+        held = held.where(stock_holds.c.reservation_id != reservation_id)
+
+    statement = update(products)\
+        .where(
+            products.c.id == bindparam("product_pk"),
+            products.c.stock - held.scalar_subquery() >= bindparam("taken"),
+        )\
+        .values(stock=products.c.stock - bindparam("taken"))
+    rows = [{"product_pk": product_id, "taken": quantity} for product_id, quantity in requested.items()]
+
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        updated = db.execute(statement, rows).rowcount
+    else:
+        # The driver can't count rows across a batch (psycopg2); run it row by row
+        updated = sum(db.execute(statement, row).rowcount for row in rows)
+
+    if updated != len(requested):
+        db.rollback()
+        raise OutOfStockError(_shortfall(db, requested, reservation_id))
+
+    mark_products_changed(db, requested)
+
+
+def _shortfall(db: Session, requested: Counter, reservation_id: Optional[str]) -> str:
+    """Describe the first product that cannot cover its requested quantity."""
+    held = held_quantities(db, requested, exclude_reservation=reservation_id)
+    rows = db.query(Product.id, Product.name, Product.stock)\
+        .filter(Product.id.in_(list(requested)))\
+        .all()
+    for product_id, name, stock in rows:
+        available = max(stock - held.get(product_id, 0), 0)
+        if available < requested[product_id]:
+            return (
+                f"Insufficient stock for {name}. "
+                f"Requested: {requested[product_id]}, Available: {available}"
+            )
+    # Stock was restocked between the update and this read
+    return "Insufficient stock, please try again"
@@ -0,0 +1,118 @@
+"""
+Order numbers
+Snowflake-style order numbers, unique across processes and hosts without a
+database round trip.
+
+Each number packs, from most to least significant bits:
+
+    42 bits  milliseconds since ORDER_NUMBER_EPOCH (~139 years)
+     8 bits  worker ID: ORDER_WORKER_ID, or a hash of the hostname
+    22 bits  process ID (Linux pids fit in 22 bits)
+    10 bits  sequence within the millisecond (1024 numbers/ms per process)
+
+and is written as "ORD-" plus 16 base-36 digits, 20 characters, which
+fits Order.order_number. Numbers sort in creation order.
+
+Processes on one host never share a pid at the same time, so only the
+worker ID must differ between hosts: set ORDER_WORKER_ID to a distinct
+value (0-255) per host when running more than one, since hostname hashes
+can collide (the fallback is logged as a warning). Forked children pick up their own pid and a fresh sequence.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import settings
+
+ORDER_NUMBER_PREFIX = "ORD-"
+ORDER_NUMBER_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+TIMESTAMP_BITS = 42
+WORKER_BITS = 8
+PROCESS_BITS = 22
+SEQUENCE_BITS = 10
+
+DIGITS = 16
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+_EPOCH_MS = int(ORDER_NUMBER_EPOCH.timestamp() * 1000)
+
+logger = logging.getLogger(__name__)
+
+
+def _base36(value: int) -> str:
+    """Encode a non-negative integer as DIGITS zero-padded base-36 digits."""
+    digits = []
+    while value:
+        value, digit = divmod(value, 36)
+        digits.append(ALPHABET[digit])
+    return "".join(reversed(digits)).rjust(DIGITS, "0")
+
+
+class OrderNumberGenerator:
+    """Thread-safe, fork-safe generator of unique order numbers."""
+
+    def __init__(self, worker_id: Optional[int] = None):
+        """
+        Args:
+            worker_id: Host's worker ID (0-255), or None to hash the hostname
+
+        Raises:
+            ValueError: If worker_id is out of range
+        """
+        if worker_id is None:
+            hostname = socket.gethostname()
+            worker_id = zlib.crc32(hostname.encode()) % (1 << WORKER_BITS)
+            logger.warning(
+                "ORDER_WORKER_ID is not set, using worker ID %d from the hostname %r; "
+                "set a distinct ORDER_WORKER_ID per host if more than one creates orders",
+                worker_id, hostname,
+            )
+        if not 0 <= worker_id < (1 << WORKER_BITS):
+            raise ValueError(f"ORDER_WORKER_ID must be between 0 and {(1 << WORKER_BITS) - 1}")
+        self.worker_id = worker_id
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Start over for the current process (also run in forked children)."""
+        self._lock = threading.Lock()
+        self._process_id = os.getpid() % (1 << PROCESS_BITS)
+        self._last_ms = -1
+        self._sequence = 0
+
+    def generate(self) -> str:
+        """
+        Generate the next order number.
+
+        Returns:
+            Order number, e.g. "ORD-0A1B2C3D4E5F6G7H"
+        """
+        with self._lock:
+            # Never step back in time, even if the wall clock does
+            now_ms = max(int(time.time() * 1000) - _EPOCH_MS, self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) % (1 << SEQUENCE_BITS)
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond; wait for the next one
+                    while now_ms <= self._last_ms:
+                        time.sleep(0.0001)
+                        now_ms = int(time.time() * 1000) - _EPOCH_MS
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+
+            value = now_ms
+            value = (value << WORKER_BITS) | self.worker_id
+            value = (value << PROCESS_BITS) | self._process_id
+            value = (value << SEQUENCE_BITS) | self._sequence
+        return ORDER_NUMBER_PREFIX + _base36(value)
+
+
+order_numbers = OrderNumberGenerator(worker_id=settings.ORDER_WORKER_ID)
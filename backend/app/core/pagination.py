@@ -0,0 +1,47 @@
+"""
+Cursor pagination utilities
+Encodes and decodes the opaque cursors used for keyset pagination
+"""
+
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    Args:
+        payload: JSON-serializable position (sort key, id and sort settings)
+
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from the client
+
+    Returns:
+        Decoded position payload
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+
+    return payload
@@ -0,0 +1,225 @@
+"""
+Cart pricing
+Computes subtotal, promo discount, tax and shipping for a cart or order in one pass.
+
+The promo discount is a percentage of the subtotal; shipping is tiered on the
+subtotal before the discount (app.core.rates) and tax applies to the
+discounted subtotal at the rate of the ZIP code's state. Amounts are rounded
+to cents.
+
+Cart quotes are memoized per (cart, cart version, catalog version, ZIP code,
+promo code): any cart mutation bumps the cart version and any product write
+bumps the catalog version, so cached quotes never outlive the prices and
+quantities they were computed from. Promo code edits are picked up when the
+entry expires.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import LRUCache, MISSING
+from app.core.catalog import catalog_version
+from app.core.exceptions import InvalidPromoCodeError
+from app.core.rates import calculate_shipping_cost, get_state_from_zip, get_tax_rate
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.models.promo_code import PromoCode
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    """Priced totals of a cart or order."""
+
+    subtotal: float
+    promo_code: Optional[str]
+    discount_percentage: float
+    discount_amount: float
+    shipping_amount: float
+    state: Optional[str]
+    tax_rate: Optional[float]
+    tax_amount: Optional[float]
+    total_amount: float
+
+
+def _cents(amount: float) -> float:
+    """Round an amount to cents."""
+    return round(amount, 2)
+
+
+def normalize_zip(zip_code: Optional[str]) -> Optional[str]:
+    """Reduce a ZIP code to its first 5 digits, for cache keys."""
+    if zip_code is None:
+        return None
+    return "".join(c for c in zip_code if c.isdigit())[:5]
+
+
+def find_promo_code(db: Session, code: str) -> PromoCode:
+    """
+    Look up a promo code that can be applied.
+
+    Args:
+        db: Database session
+        code: Promo code (case-insensitive)
+
+    Returns:
+        The promo code
+
+    Raises:
+        InvalidPromoCodeError: If the code is unknown, inactive, expired or used up
+    """
+    promo = db.query(PromoCode).filter(PromoCode.code.ilike(code)).first()
+    if not promo:
+        raise InvalidPromoCodeError("Invalid promo code")
+    if not promo.is_valid():
+        raise InvalidPromoCodeError(f"Promo code {promo.code} is invalid, expired, or has reached its usage limit")
+    return promo
+
+
+def price_subtotal(
+    db: Session,
+    subtotal: float,
+    zip_code: Optional[str] = None,
+    promo_code: Optional[str] = None,
+) -> PriceQuote:
+    """
+    Apply the promo discount, shipping and tax to a subtotal.
+
+    Args:
+        db: Database session, used to look up the promo code
+        subtotal: Sum of line prices
+        zip_code: Shipping ZIP code, or None to leave tax out of the total
+        promo_code: Promo code to apply, if any
+
+    Returns:
+        Priced totals
+
+    Raises:
+        ValueError: If the ZIP code is invalid
+        InvalidPromoCodeError: If the promo code cannot be applied
+    """
+    subtotal = _cents(subtotal)
+
+    code, percentage = None, 0.0
+    if promo_code:
+        promo = find_promo_code(db, promo_code)
+        code, percentage = promo.code, promo.discount_percentage
+    discount = _cents(subtotal * percentage / 100)
+
+    shipping = calculate_shipping_cost(subtotal) if subtotal > 0 else 0.0
+
+    state, tax_rate, tax = None, None, None
+    if zip_code is not None:
+        state = get_state_from_zip(zip_code)
+        if state == "UNKNOWN":
+            raise ValueError("Invalid ZIP code")
+        tax_rate = get_tax_rate(state)
+        tax = _cents((subtotal - discount) * tax_rate)
+
+    return PriceQuote(
+        subtotal=subtotal,
+        promo_code=code,
+        discount_percentage=percentage,
+        discount_amount=discount,
+        shipping_amount=shipping,
+        state=state,
+        tax_rate=tax_rate,
+        tax_amount=tax,
+        total_amount=_cents(subtotal - discount + shipping + (tax or 0.0)),
+    )
+
+
+def price_lines(
+    db: Session,
+    lines: Iterable[tuple[float, int]],
+    zip_code: Optional[str] = None,
+    promo_code: Optional[str] = None,
+) -> PriceQuote:
+    """
+    Price order lines.
+
+    Args:
+        db: Database session
+        lines: (unit price, quantity) of each line
+        zip_code: Shipping ZIP code, or None to leave tax out of the total
+        promo_code: Promo code to apply, if any
+
+    Returns:
+        Priced totals
+
+    Raises:
+        ValueError: If the ZIP code is invalid
+        InvalidPromoCodeError: If the promo code cannot be applied
+    """
+    return price_subtotal(db, sum(price * quantity for price, quantity in lines), zip_code, promo_code)
+
+
+class CartPricer:
+    """Memoizes cart quotes per cart version, catalog version, ZIP code and promo code."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._quotes = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def quote(
+        self,
+        db: Session,
+        cart_id: int,
+        version: int,
+        zip_code: Optional[str] = None,
+        promo_code: Optional[str] = None,
+        quantities: Optional[dict[int, int]] = None,
+    ) -> PriceQuote:
+        """
+        Price a cart's items at current product prices.
+
+        Args:
+            db: Database session
+            cart_id: Cart ID
+            version: Cart version the quote is for
+            zip_code: Shipping ZIP code, or None to leave tax out of the total
+            promo_code: Promo code to apply, if any
+            quantities: Quantities by cart item ID that aren't in SQL yet
+                (see app.core.cart_buffer); version must include them
+
+        Returns:
+            Priced totals
+
+        Raises:
+            ValueError: If the ZIP code is invalid
+            InvalidPromoCodeError: If the promo code cannot be applied
+        """
+        key = (cart_id, version, catalog_version(), normalize_zip(zip_code), (promo_code or "").upper())
+        quote = self._quotes.get(key)
+        if quote is not MISSING:
+            return quote
+
+        quantity = CartItem.quantity
+        if quantities:
+            quantity = case(quantities, value=CartItem.id, else_=CartItem.quantity)
+
+        # One aggregate query instead of loading the cart's lines
+        subtotal = db.query(func.coalesce(func.sum(Product.price * quantity), 0.0))\
+            .select_from(CartItem)\
+            .join(Product, Product.id == CartItem.product_id)\
+            .filter(CartItem.cart_id == cart_id)\
+            .scalar()
+        quote = price_subtotal(db, subtotal, zip_code, promo_code)
+        self._quotes.set(key, quote)
+        return quote
+
+    def clear(self) -> None:
+        """Drop all memoized quotes."""
+        self._quotes.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss/eviction counters of the quote cache."""
+        return self._quotes.stats()
+
+
+cart_pricer = CartPricer(
+    maxsize=settings.CART_PRICING_CACHE_SIZE,
+    ttl=settings.CART_PRICING_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,142 @@
+"""
+Product read-through cache
+Shares immutable product snapshots across requests to avoid repeated primary-key lookups.
+
+Entries are invalidated when a commit writes the product (see app.core.catalog)
+and expire after PRODUCT_CACHE_TTL_SECONDS to bound staleness from writes made
+by other processes. Stock-sensitive code paths must read authoritative rows
+with ProductCache.load() instead of ProductCache.get().
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import MISSING, LRUCache
+from app.core.catalog import catalog_version, on_products_changed
+from app.models.product import Product
+
+
+@dataclass(frozen=True)
+class CachedProduct:
+    """Detached, read-only snapshot of a products row."""
+
+    id: int
+    name: str
+    description: str
+    price: float
+    category: str
+    image_url: str
+    stock: int
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_model(cls, product: Product) -> "CachedProduct":
+        """Snapshot a Product ORM instance."""
+        return cls(
+            id=product.id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            category=product.category,
+            image_url=product.image_url,
+            stock=product.stock,
+            created_at=product.created_at,
+            updated_at=product.updated_at,
+        )
+
+
+class ProductCache:
+    """Bounded LRU/TTL cache of product snapshots keyed by product id."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float]):
+        """
+        Args:
+            maxsize: Maximum number of products kept
+            ttl: Seconds a snapshot stays valid, or None to never expire
+        """
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, db: Session, product_id: int) -> Optional[CachedProduct]:
+        """
+        Get a product snapshot, reading through to the database on a miss.
+
+        Args:
+            db: Database session used on a miss
+            product_id: Product ID
+
+        Returns:
+            Product snapshot, or None if the product doesn't exist
+        """
+        cached = self._cache.get(product_id)
+        if cached is not MISSING:
+            return cached
+
+        version = catalog_version()
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if product is None:
+            return None
+
+        snapshot = CachedProduct.from_model(product)
+        self._store(snapshot, version)
+        return snapshot
+
+    def load(self, db: Session, product_id: int) -> Optional[Product]:
+        """
+        Read the authoritative product row, bypassing the cache.
+
+        The cached snapshot is refreshed from the row that was read, unless
+        the session already holds uncommitted changes to it.
+
+        Args:
+            db: Database session
+            product_id: Product ID
+
+        Returns:
+            Product ORM instance, or None if the product doesn't exist
+        """
+        version = catalog_version()
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if product is None:
+            self._cache.invalidate(product_id)
+        elif not db.is_modified(product):
+            self._store(CachedProduct.from_model(product), version)
+        return product
+
+    def invalidate(self, product_id: int) -> None:
+        """Drop a product from the cache."""
+        self._cache.invalidate(product_id)
+
+    def clear(self) -> None:
+        """Drop all products from the cache."""
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get hit, miss and eviction counters."""
+        return self._cache.stats()
+
+    def _store(self, snapshot: CachedProduct, version: int) -> None:
+        """Cache a snapshot unless products were written while it was being read."""
+        if catalog_version() == version:
+            self._cache.set(snapshot.id, snapshot)
+
+
+product_cache = ProductCache(
+    maxsize=settings.PRODUCT_CACHE_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+)
+
+
+@on_products_changed
+def _invalidate_changed_products(product_ids: Optional[set[int]]) -> None:
+    """Drop snapshots of products written by a committed transaction."""
+    if product_ids is None:
+        product_cache.clear()
+        return
+
+    for product_id in product_ids:
+        product_cache.invalidate(product_id)
@@ -0,0 +1,214 @@
+"""
+Product listing query planner
+Explicit registry of the fields product listings can be filtered and sorted by.
+
+Every supported combination is served by an index on products:
+
+    filter                  sort                index
+    ----------------------  ------------------  ------------------------------------
+    (none)                  price               ix_products_price_id
+    (none)                  name                ix_products_name_id
+    (none)                  created_at          ix_products_created_at_id
+    category                price               ix_products_category_price_id
+    category                name                ix_products_category_name_id
+    category                created_at          ix_products_category_created_at_id
+    [category +] price      price               same as above, ranged
+    [category +] price      name, created_at    (category,) price index, then sort
+    search                  relevance           products_fts / ix_products_search
+
+app/tests/test_query_plans.py verifies these plans against SQLite.
+
+Listings may also select a subset of PRODUCT_FIELDS (sparse fieldsets); only
+those columns are loaded.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Query, Session, load_only
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.search import apply_search
+from app.models.product import Product
+
+RELEVANCE = "relevance"
+
+# Sort fields, each backed by a (field, id) and a (category, field, id) index
+SORT_FIELDS = {
+    "price": Product.price,
+    "name": Product.name,
+    "created_at": Product.created_at,
+}
+
+SORT_ORDERS = ("asc", "desc")
+
+# Filterable fields: category is matched exactly, price by range
+FILTER_FIELDS = {
+    "category": Product.category,
+    "price": Product.price,
+}
+
+# Fields selectable with fields=, in response order; id is always included
+PRODUCT_FIELDS = (
+    "id", "name", "description", "price", "category",
+    "image_url", "stock", "created_at", "updated_at",
+)
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """Filters accepted by product listing endpoints."""
+
+    category: Optional[str] = None
+    search: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    def cache_key(self) -> tuple:
+        """Normalized tuple identifying the filtered product set."""
+        return (
+            self.category,
+            self.search.lower() if self.search else None,
+            self.min_price,
+            self.max_price,
+        )
+
+
+def resolve_sort(sort_by: Optional[str], sort_order: str, search: Optional[str]) -> Tuple[str, bool]:
+    """
+    Validate the requested sort against the registry.
+
+    Args:
+        sort_by: Requested sort field, or None for the default
+        sort_order: Requested sort order (asc, desc; case-insensitive)
+        search: Search string, if any
+
+    Returns:
+        Tuple of (sort field name, whether the order is descending)
+
+    Raises:
+        ValueError: If the sort field or order is not supported
+    """
+    if sort_by is None:
+        sort_by = RELEVANCE if search else "created_at"
+
+    if sort_by == RELEVANCE:
+        if not search:
+            raise ValueError("sort_by relevance requires a search query")
+    elif sort_by not in SORT_FIELDS:
+        supported = ", ".join([RELEVANCE, *SORT_FIELDS])
+        raise ValueError(f"Unsupported sort_by '{sort_by}'. Supported values: {supported}")
+
+    order = sort_order.lower()
+    if order not in SORT_ORDERS:
+        raise ValueError(f"Unsupported sort_order '{sort_order}'. Supported values: asc, desc")
+
+    return sort_by, order == "desc"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Validate a comma-separated sparse fieldset.
+
+    Args:
+        fields: Requested fields, e.g. "name,price,image_url", or None for all
+
+    Returns:
+        Selected field names in PRODUCT_FIELDS order (always including id),
+        or None for all fields
+
+    Raises:
+        ValueError: If a field is not supported
+    """
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(PRODUCT_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unsupported fields: {', '.join(sorted(unknown))}. "
+            f"Supported values: {', '.join(PRODUCT_FIELDS)}"
+        )
+
+    requested.add("id")
+    return tuple(field for field in PRODUCT_FIELDS if field in requested)
+
+
+def select_fields(query: Query, fields: Optional[Tuple[str, ...]], sort_by: str) -> Query:
+    """
+    Restrict the columns loaded by a product query to a sparse fieldset.
+
+    Args:
+        query: Product query
+        fields: Field names from parse_fields(), or None for all columns
+        sort_by: Sort field name, loaded as well so cursors can be built
+
+    Returns:
+        Query loading only the needed columns
+    """
+    if fields is None:
+        return query
+
+    columns = {getattr(Product, field) for field in fields}
+    if sort_by in SORT_FIELDS:
+        columns.add(SORT_FIELDS[sort_by])
+    return query.options(load_only(*columns))
+
+
+def filter_products(db: Session, filters: ProductFilters) -> Tuple[Query, Optional[ColumnElement]]:
+    """
+    Build a product query restricted by the given filters.
+
+    Args:
+        db: Database session
+        filters: Listing filters
+
+    Returns:
+        Tuple of (filtered query, relevance ORDER BY clause or None)
+    """
+    query = db.query(Product)
+
+    if filters.category:
+        query = query.filter(FILTER_FIELDS["category"] == filters.category)
+
+    relevance = None
+    if filters.search:
+        query, relevance = apply_search(query, filters.search)
+
+    if filters.min_price is not None:
+        query = query.filter(FILTER_FIELDS["price"] >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(FILTER_FIELDS["price"] <= filters.max_price)
+
+    return query, relevance
+
+
+def sort_products(
+    query: Query,
+    sort_by: str,
+    descending: bool,
+    relevance: Optional[ColumnElement] = None,
+) -> Query:
+    """
+    Order a product query, with id as tie-breaker so every row has a stable position.
+
+    Args:
+        query: Filtered product query
+        sort_by: Sort field name returned by resolve_sort()
+        descending: Whether to sort in descending order
+        relevance: Relevance ORDER BY clause from filter_products()
+
+    Returns:
+        Ordered query
+    """
+    if sort_by == RELEVANCE:
+        if relevance is not None:
+            return query.order_by(relevance, Product.id)
+        # No full-text index: keep the newest-first default
+        return query.order_by(Product.created_at.desc(), Product.id.desc())
+
+    sort_field = SORT_FIELDS[sort_by]
+    if descending:
+        return query.order_by(sort_field.desc(), Product.id.desc())
+    return query.order_by(sort_field.asc(), Product.id.asc())
@@ -3,8 +3,6 @@ Tax and shipping rate utilities
 Provides lookup tables and functions for calculating tax and shipping costs
 """
 
-from typing import Tuple
-
 # State tax rates (simplified average rates for each state)
 STATE_TAX_RATES = {
     "AL": 0.0400,  # Alabama
@@ -235,31 +233,3 @@ def calculate_shipping_cost(subtotal: float) -> float:
     else:
         return 9.99
 
-
-def calculate_shipping_and_tax(zip_code: str, subtotal: float) -> Tuple[str, float, float, float, float, float]:
-    """
-    Calculate complete shipping and tax information.
-
-    Args:
-        zip_code: Customer's ZIP code
-        subtotal: Cart subtotal before tax and shipping
-
-    Returns:
-        Tuple of (state, tax_rate, shipping_cost, tax_amount, shipping_amount, total)
-
-    Raises:
-        ValueError: If ZIP code is invalid
-    """
-    state = get_state_from_zip(zip_code)
-
-    if state == "UNKNOWN":
-        raise ValueError("Invalid ZIP code")
-
-    tax_rate = get_tax_rate(state)
-    shipping_cost = calculate_shipping_cost(subtotal)
-
-    tax_amount = subtotal * tax_rate
-    shipping_amount = shipping_cost
-    total = subtotal + tax_amount + shipping_amount
-
-    return state, tax_rate, shipping_cost, tax_amount, shipping_amount, total
@@ -0,0 +1,155 @@
+"""
+Background cleanup of abandoned data
+Deletes carts nobody has touched for CART_RETENTION_DAYS, expired guest carts,
+cart line removal tombstones older than CART_REMOVAL_RETENTION_HOURS, expired
+stock holds and expired idempotency keys.
+
+Rows are deleted in chunks of CART_REAPER_CHUNK_SIZE carts or rows, each in its own
+short transaction, so the reaper never holds a long write lock. run_reaper()
+is called periodically from the app lifespan (see app.main).
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Table, delete, or_, select
+
+from app.config import settings
+from app.core.cart_store import carts, delete_carts, prune_removals, removals
+from app.core.reservations import stock_holds
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+def reap_carts(
+    retention_days: int = settings.CART_RETENTION_DAYS,
+    chunk_size: int = settings.CART_REAPER_CHUNK_SIZE,
+    now: Optional[datetime] = None,
+) -> Counter:
+    """
+    Delete stale and expired carts with their lines, one chunk per transaction.
+
+    Args:
+        retention_days: Delete carts not updated for this many days
+        chunk_size: Maximum carts deleted per transaction
+        now: Current time (defaults to utcnow)
+
+    Returns:
+        Number of rows deleted per table name
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    stale = select(carts.c.id)\
+        .where(or_(carts.c.updated_at < cutoff, carts.c.expires_at < now))\
+        .order_by(carts.c.id)\
+        .limit(chunk_size)
+
+    deleted = Counter()
+    while True:
+        with SessionLocal() as db:
+            chunk = delete_carts(db, stale)
+            db.commit()
+        deleted.update(chunk)
+        if chunk[carts.name] < chunk_size:
+            return deleted
+
+
+def reap_removals(
+    retention_hours: int = settings.CART_REMOVAL_RETENTION_HOURS,
+    chunk_size: int = settings.CART_REAPER_CHUNK_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Prune old cart line removal tombstones, one chunk per transaction.
+
+    Clients that last synced a cart before a pruned tombstone get the full
+    cart instead of a delta (see app.core.cart_store.prune_removals).
+
+    Args:
+        retention_hours: Prune tombstones older than this many hours
+        chunk_size: Maximum tombstones deleted per transaction
+        now: Current time (defaults to utcnow)
+
+    Returns:
+        Number of tombstones deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=retention_hours)
+    old = select(removals.c.id)\
+        .where(removals.c.removed_at < cutoff)\
+        .order_by(removals.c.id)\
+        .limit(chunk_size)
+
+    deleted = 0
+    while True:
+        with SessionLocal() as db:
+            chunk = prune_removals(db, old)
+            db.commit()
+        deleted += chunk
+        if chunk < chunk_size:
+            return deleted
+
+
+def reap_expired(
+    table: Table,
+    chunk_size: int = settings.CART_REAPER_CHUNK_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Delete expired rows of a table with an expires_at column, one chunk per transaction.
+
+    Expired stock holds and idempotency keys are already ignored by reads,
+    so this only reclaims space.
+
+    Args:
+        table: Table to delete from
+        chunk_size: Maximum rows deleted per transaction
+        now: Current time (defaults to utcnow)
+
+    Returns:
+        Number of rows deleted
+    """
+    now = now or datetime.utcnow()
+    expired = select(table.c.id)\
+        .where(table.c.expires_at < now)\
+        .order_by(table.c.id)\
+        .limit(chunk_size)
+
+    deleted = 0
+    while True:
+        with SessionLocal() as db:
+            chunk = db.execute(delete(table).where(table.c.id.in_(expired))).rowcount
+            db.commit()
+        deleted += chunk
+        if chunk < chunk_size:
+            return deleted
+
+
+def run_reaper() -> Counter:
+    """
+    Run every cleanup job and log what was removed.
+
+    Returns:
+        Number of rows deleted per table name
+    """
+    deleted = reap_carts()
+    if deleted[carts.name]:
+        logger.info(
+            "Reaped %d carts (%s)",
+            deleted[carts.name],
+            ", ".join(f"{count} {table}" for table, count in deleted.items() if table != carts.name),
+        )
+
+    pruned = reap_removals()
+    deleted[removals.name] += pruned
+    if pruned:
+        logger.info("Pruned %d cart line removals", pruned)
+
+    for table in (stock_holds, IdempotencyKey.__table__):
+        deleted[table.name] = reap_expired(table)
+        if deleted[table.name]:
+            logger.info("Reaped %d expired %s", deleted[table.name], table.name)
+    return deleted
@@ -0,0 +1,206 @@
+"""
+Stock reservations
+Time-limited holds on product stock, taken when checkout starts.
+
+A reservation is a set of StockHold rows sharing a random reservation_id.
+It belongs to a user or guest (owner_key), who alone can release it or
+convert it into an order (see owned_reservation()).
+Holds count against a product until they expire, so the available stock of
+a product is its stock minus its unexpired holds (held_quantities()).
+Expired holds are simply ignored by reads; the reaper deletes them later
+(see app.core.reaper).
+
+create_order() converts a reservation: its own holds are left out of the
+availability check and deleted in the order's transaction.
+"""
+
+import secrets
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.exceptions import OutOfStockError, ReservationLimitError
+from app.models.product import Product
+from app.models.stock_hold import StockHold
+
+stock_holds = StockHold.__table__
+products_table = Product.__table__
+
+
+def held_quantities(
+    db: Session,
+    product_ids: Iterable[int],
+    exclude_reservation: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> dict[int, int]:
+    """
+    Sum the unexpired holds on products.
+
+    Args:
+        db: Database session
+        product_ids: Products to sum holds for
+        exclude_reservation: Leave this reservation's holds out, if given
+        now: Current time (defaults to utcnow)
+
+    Returns:
+        Held quantity per product ID, for products with holds
+    """
+    query = db.query(StockHold.product_id, func.sum(StockHold.quantity))\
+        .filter(
+            StockHold.product_id.in_(list(product_ids)),
+            StockHold.expires_at > (now or datetime.utcnow()),
+        )
+    if exclude_reservation:
+        query = query.filter(StockHold.reservation_id != exclude_reservation)
+    return dict(query.group_by(StockHold.product_id).all())
+
+
+def create_reservation(
+    db: Session,
+    owner_key: str,
+    items: Iterable[tuple[int, int]],
+    ttl_seconds: int = settings.STOCK_HOLD_TTL_SECONDS,
+    capped: bool = True,
+) -> tuple[str, datetime]:
+    """
+    Hold stock for products, all or nothing, replacing the owner's previous holds.
+
+    An owner has at most one reservation, limited to STOCK_HOLD_MAX_PER_PRODUCT
+    units of a product and STOCK_HOLD_MAX_PER_OWNER units in total, so one
+    caller can't hold a product's whole stock by reserving repeatedly. The
+    checkout service's reservations are not capped: they are converted into
+    an order right away, and the cart accepts any quantity stock covers.
+
+    Each hold is inserted by a guarded INSERT ... SELECT that only inserts
+    the row if the product's unheld stock covers it, so the check and the
+    write are one statement. On SQLite the first insert takes the database
+    write lock, so concurrent reservations are serialized; on PostgreSQL the
+    product rows are locked first (FOR UPDATE, which SQLite ignores). Either
+    way concurrent reservations of the same units cannot both succeed. The
+    caller commits.
+
+    Args:
+        db: Database session
+        owner_key: Owner of the reservation (see app.api.deps.CartOwner.key)
+        items: (product ID, quantity) pairs; repeated products are summed
+        ttl_seconds: Seconds until the holds expire
+        capped: Whether the per-owner limits apply
+
+    Returns:
+        Tuple of (reservation ID, expiry time)
+
+    Raises:
+        ReservationLimitError: If the quantities exceed the per-owner limits
+        OutOfStockError: If any product is missing or has too little unheld stock
+    """
+    requested = Counter()
+    for product_id, quantity in items:
+        requested[product_id] += quantity
+
+    if capped and sum(requested.values()) > settings.STOCK_HOLD_MAX_PER_OWNER:
+        raise ReservationLimitError(f"At most {settings.STOCK_HOLD_MAX_PER_OWNER} units can be held at once")
+    if capped and max(requested.values()) > settings.STOCK_HOLD_MAX_PER_PRODUCT:
+        raise ReservationLimitError(f"At most {settings.STOCK_HOLD_MAX_PER_PRODUCT} units of a product can be held")
+
+    products = {
+        product.id: product
+        for product in db.query(Product)
+            .filter(Product.id.in_(list(requested)))
+            .with_for_update()
+            .all()
+    }
+    for product_id in requested:
+        if product_id not in products:
+            raise OutOfStockError(f"Product {product_id} not found")
+
+    # The owner's previous holds are replaced, not added to
+    db.execute(delete(stock_holds).where(stock_holds.c.owner_key == owner_key))
+
+    now = datetime.utcnow()
+    reservation_id = secrets.token_hex(16)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    held = select(func.coalesce(func.sum(stock_holds.c.quantity), 0))\
+        .where(stock_holds.c.product_id == products_table.c.id, stock_holds.c.expires_at > now)\
+        .scalar_subquery()
+    statement = insert(stock_holds).from_select(
+        ["reservation_id", "owner_key", "product_id", "quantity", "expires_at", "created_at"],
+        select(
+            literal(reservation_id),
+            literal(owner_key),
+            products_table.c.id,
+            bindparam("held_quantity"),
+            literal(expires_at),
+            literal(now),
+        ).where(
+            products_table.c.id == bindparam("held_product"),
+            products_table.c.stock - held >= bindparam("held_quantity"),
+        ),
+    )
+    rows = [{"held_product": product_id, "held_quantity": quantity} for product_id, quantity in requested.items()]
+
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        inserted = db.execute(statement, rows).rowcount
+    else:
+        # The driver can't count rows across a batch (psycopg2); run it row by row
+        inserted = sum(db.execute(statement, row).rowcount for row in rows)
+
+    if inserted != len(requested):
+        db.rollback()
+        available = {
+            product_id: max(products[product_id].stock - held_quantity, 0)
+            for product_id, held_quantity in held_quantities(db, requested).items()
+        }
+        for product_id, quantity in requested.items():
+            product_available = available.get(product_id, products[product_id].stock)
+            if product_available < quantity:
+                raise OutOfStockError(
+                    f"Insufficient stock for {products[product_id].name}. "
+                    f"Requested: {quantity}, Available: {product_available}"
+                )
+        # The competing holds expired or were released in the meantime
+        raise OutOfStockError("Insufficient stock, please try again")
+
+    return reservation_id, expires_at
+
+
+def owned_reservation(db: Session, reservation_id: Optional[str], owner_key: Optional[str]) -> Optional[str]:
+    """
+    Check that a reservation presented with an order belongs to the caller.
+
+    Args:
+        db: Database session
+        reservation_id: Reservation ID sent with the order, if any
+        owner_key: Owner placing the order, or None for a guest without a cart token
+
+    Returns:
+        The reservation ID, or None if it is missing, released or someone else's
+        (the order is then checked against all holds)
+    """
+    if not reservation_id or owner_key is None:
+        return None
+    owned = db.query(StockHold.id)\
+        .filter(StockHold.reservation_id == reservation_id, StockHold.owner_key == owner_key)\
+        .first()
+    return reservation_id if owned else None
+
+
+def release_reservation(db: Session, reservation_id: str, owner_key: str) -> int:
+    """
+    Delete a reservation's holds, if they belong to an owner. The caller commits.
+
+    Args:
+        db: Database session
+        reservation_id: Reservation ID
+        owner_key: Owner the holds must belong to
+
+    Returns:
+        Number of holds deleted
+    """
+    statement = delete(stock_holds)\
+        .where(stock_holds.c.reservation_id == reservation_id, stock_holds.c.owner_key == owner_key)
+    return db.execute(statement).rowcount
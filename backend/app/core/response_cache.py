@@ -0,0 +1,183 @@
+"""
+Serialized response cache
+Stores final JSON bodies, with precompressed gzip/brotli variants, so cache hits
+are answered without touching the ORM or Pydantic.
+
+Keys include the catalog validator tag, so a body rendered while products
+were being written is stored under an outdated tag and never served, and
+writes by other processes make cached bodies unreachable. Entries are also
+dropped on every committed product write of this process (see
+app.core.catalog).
+"""
+
+import gzip
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.core.cache import MISSING, LRUCache
+from app.core.catalog import on_products_changed
+from app.core.http_cache import CONTENT_CODINGS, coded_etag
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only gzip variants are stored without it
+    brotli = None
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """Encoded response body and its compressed variants keyed by content-coding."""
+
+    body: bytes
+    variants: dict[str, bytes]
+
+
+def compress_body(body: bytes) -> EncodedBody:
+    """
+    Precompress a response body with every available content-coding.
+
+    Bodies shorter than RESPONSE_COMPRESSION_MIN_SIZE are kept uncompressed only.
+
+    Args:
+        body: Encoded response body
+
+    Returns:
+        Body with its compressed variants
+    """
+    variants = {}
+    if len(body) >= settings.RESPONSE_COMPRESSION_MIN_SIZE:
+        # mtime=0 keeps the gzip output identical for identical bodies
+        variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=5)
+    return EncodedBody(body=body, variants=variants)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: dict[str, bytes]) -> Optional[str]:
+    """
+    Pick the content-coding to send from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding header value, if any
+        available: Compressed variants keyed by content-coding
+
+    Returns:
+        Chosen content-coding, or None for the uncompressed body
+    """
+    if not accept_encoding or not available:
+        return None
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in CONTENT_CODINGS:
+        weight = weights.get(coding, wildcard)
+        if coding in available and weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class ResponseCache:
+    """Bounded LRU/TTL cache of encoded response bodies."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float]):
+        """
+        Args:
+            maxsize: Maximum number of responses kept
+            ttl: Seconds a response stays valid, or None to never expire
+        """
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def key(self, request: Request, catalog_tag: str) -> tuple[Any, ...]:
+        """
+        Build the cache key of a request from its path and normalized query parameters.
+
+        Args:
+            request: Incoming request
+            catalog_tag: Current catalog validator tag (see app.core.catalog.catalog_validator)
+
+        Returns:
+            Hashable key, bound to the catalog tag
+        """
+        params = tuple(sorted(request.query_params.multi_items()))
+        return (request.url.path, params, catalog_tag)
+
+    def get(self, key: tuple[Any, ...]) -> Optional[EncodedBody]:
+        """Get a cached body, or None on a miss."""
+        encoded = self._cache.get(key)
+        return None if encoded is MISSING else encoded
+
+    def set(self, key: tuple[Any, ...], body: bytes) -> EncodedBody:
+        """
+        Precompress and cache a response body.
+
+        Args:
+            key: Key from ResponseCache.key(), computed before the body was rendered
+            body: Encoded response body
+
+        Returns:
+            The cached body with its compressed variants
+        """
+        encoded = compress_body(body)
+        self._cache.set(key, encoded)
+        return encoded
+
+    def clear(self) -> None:
+        """Drop all responses from the cache."""
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get hit, miss and eviction counters."""
+        return self._cache.stats()
+
+
+def encoded_response(
+    request: Request,
+    encoded: EncodedBody,
+    headers: dict[str, str],
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Build a response from a cached body, choosing the variant the client accepts.
+
+    A compressed variant gets its own ETag (see app.core.http_cache.coded_etag).
+
+    Args:
+        request: Incoming request (for Accept-Encoding)
+        encoded: Cached body and variants
+        headers: Extra headers (validators, Cache-Control)
+        media_type: Response media type
+
+    Returns:
+        Response carrying the chosen variant
+    """
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    coding = negotiate_encoding(request.headers.get("accept-encoding"), encoded.variants)
+    if coding is None:
+        return Response(content=encoded.body, media_type=media_type, headers=headers)
+
+    headers["Content-Encoding"] = coding
+    if "ETag" in headers:
+        headers["ETag"] = coded_etag(headers["ETag"], coding)
+    return Response(content=encoded.variants[coding], media_type=media_type, headers=headers)
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+on_products_changed(lambda product_ids: response_cache.clear())
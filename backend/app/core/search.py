@@ -0,0 +1,176 @@
+"""
+Full-text product search
+Maintains a full-text index over product names and descriptions and builds
+ranked search filters for product queries.
+
+SQLite uses an FTS5 external-content table kept in sync by triggers, with the
+porter tokenizer for stemming. PostgreSQL uses a GIN index over a tsvector
+expression. Other databases fall back to ILIKE substring matching.
+"""
+
+import logging
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+
+# Relative weight of a name hit versus a description hit in bm25 ranking
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+# The query expression must match the index expression for PostgreSQL to use it
+_PG_DOCUMENT = "to_tsvector('english', {prefix}name || ' ' || {prefix}description)"
+_PG_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_products_search "
+    f"ON products USING GIN ({_PG_DOCUMENT.format(prefix='')})"
+)
+
+# Dialects whose search index was installed by install_search_index()
+_indexed_dialects: set[str] = set()
+
+
+def install_search_index(engine: Engine) -> None:
+    """
+    Create the full-text index for products if it does not exist yet.
+
+    Safe to call on every startup. A newly created SQLite index is populated
+    from the existing products table.
+
+    Args:
+        engine: SQLAlchemy engine for the application database
+    """
+    dialect = engine.dialect.name
+
+    if dialect == "sqlite":
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first() is not None
+
+            try:
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+            except Exception as e:  # FTS5 not compiled into this SQLite build
+                logger.warning("Full-text search unavailable, using ILIKE search: %s", e)
+                return
+
+            if not existed:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+    elif dialect == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(_PG_DDL))
+
+    else:
+        return
+
+    _indexed_dialects.add(dialect)
+
+
+def tokenize(search: str) -> list[str]:
+    """
+    Split a search string into lowercase word tokens.
+
+    Args:
+        search: Raw search string from the client
+
+    Returns:
+        List of word tokens (punctuation and operators are dropped)
+    """
+    return [token.lower() for token in _TOKEN_RE.findall(search)]
+
+
+def ilike_search_filter(search: str) -> ColumnElement:
+    """
+    Build the unindexed substring filter over name and description.
+
+    Args:
+        search: Raw search string from the client
+
+    Returns:
+        SQL filter expression
+    """
+    search_term = f"%{search}%"
+    return or_(
+        Product.name.ilike(search_term),
+        Product.description.ilike(search_term)
+    )
+
+
+def apply_search(query: Query, search: str) -> Tuple[Query, Optional[ColumnElement]]:
+    """
+    Restrict a product query to products matching a search string.
+
+    Every token is matched as a stemmed prefix, so "travel pil" matches
+    "Travelling Pillow".
+
+    Args:
+        query: Product query to filter
+        search: Raw search string from the client
+
+    Returns:
+        Tuple of (filtered query, relevance ORDER BY clause or None when
+        the database has no full-text index)
+    """
+    dialect = query.session.get_bind().dialect.name
+    tokens = tokenize(search)
+
+    if not tokens or dialect not in _indexed_dialects:
+        return query.filter(ilike_search_filter(search)), None
+
+    if dialect == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        match = " ".join(f'"{token}"*' for token in tokens)
+        query = query\
+            .join(fts, fts.c.rowid == Product.id)\
+            .filter(literal_column(FTS_TABLE).op("MATCH")(match))
+        # bm25() is lower for better matches
+        rank = func.bm25(literal_column(FTS_TABLE), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+        return query, rank.asc()
+
+    document = literal_column(_PG_DOCUMENT.format(prefix="products."))
+    ts_query = func.to_tsquery(literal_column("'english'"), " & ".join(f"{token}:*" for token in tokens))
+    query = query.filter(document.op("@@")(ts_query))
+    return query, func.ts_rank(document, ts_query).desc()
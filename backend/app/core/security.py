@@ -1,4 +1,8 @@
-"""Security utilities for password hashing and JWT tokens."""
+"""Security utilities for password hashing, JWT tokens, guest cart tokens and service tokens."""
+import base64
+import hashlib
+import hmac
+import secrets
 from datetime import datetime, timedelta
 from typing import Any, Optional
 
@@ -94,6 +98,79 @@ def decode_access_token(token: str) -> dict[str, Any]:
     return payload
 
 
+def _sign_guest_id(guest_id: str) -> str:
+    """HMAC-SHA256 signature of a guest cart id, base64url-encoded without padding."""
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), f"cart:{guest_id}".encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def create_cart_token(guest_id: Optional[str] = None) -> tuple[str, str]:
+    """
+    Create a signed guest cart token.
+
+    The token is "<guest id>.<signature>" and only contains URL- and
+    cookie-safe characters.
+
+    Args:
+        guest_id: Existing guest cart id to sign, or None to generate a new one
+
+    Returns:
+        Tuple of (guest id, token)
+    """
+    guest_id = guest_id or secrets.token_hex(16)
+    return guest_id, f"{guest_id}.{_sign_guest_id(guest_id)}"
+
+
+def verify_cart_token(token: Optional[str]) -> Optional[str]:
+    """
+    Verify a guest cart token.
+
+    Args:
+        token: Token from create_cart_token()
+
+    Returns:
+        The guest cart id, or None if the token is missing, malformed or forged
+    """
+    if not token or token.count(".") != 1:
+        return None
+    guest_id, signature = token.split(".")
+    if len(guest_id) != 32 or not hmac.compare_digest(signature, _sign_guest_id(guest_id)):
+        return None
+    return guest_id
+
+
+def create_service_token(service: str) -> str:
+    """
+    Create the token an internal service (e.g. "checkout") authenticates with.
+
+    The token is the base64url-encoded HMAC-SHA256 of "service:<name>" under
+    SECRET_KEY, without padding, so services sharing SECRET_KEY derive it
+    themselves.
+
+    Args:
+        service: Service name
+
+    Returns:
+        Service token
+    """
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), f"service:{service}".encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def verify_service_token(token: Optional[str], service: str) -> bool:
+    """
+    Verify a service token.
+
+    Args:
+        token: Token from create_service_token()
+        service: Service the token must belong to
+
+    Returns:
+        True if the token is the service's
+    """
+    return bool(token) and hmac.compare_digest(token, create_service_token(service))
+
+
 def validate_password_strength(password: str) -> tuple[bool, str]:
     """
     Validate password meets security requirements.
@@ -0,0 +1,157 @@
+"""
+Product name autocomplete
+In-memory prefix index over the words of product names.
+
+The index is a sorted array of (word, product id) entries searched with
+bisect, built from Product.name on first use. Committed product writes in
+this process mark the affected products dirty (see app.core.catalog); only
+those rows are re-read before the next lookup.
+
+Writes by other processes are caught through catalog_validator(), like the
+other catalog caches: the index remembers the validator tag it matches, and
+when the tag moves on to one that its own contents (product count and
+latest updated_at) don't explain, it is rebuilt. Such writes therefore show
+up within CATALOG_VALIDATOR_TTL_SECONDS.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.catalog import catalog_tag, catalog_validator, on_products_changed
+from app.core.search import tokenize
+from app.models.product import Product
+
+
+class SuggestIndex:
+    """Sorted-array prefix index mapping name words to products."""
+
+    def __init__(self):
+        self._entries: list[tuple[str, int]] = []
+        self._names: dict[int, str] = {}
+        self._updated: dict[int, datetime] = {}
+        self._built = False
+        self._tag: Optional[str] = None
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+
+    def mark_dirty(self, product_ids: Optional[Iterable[int]]) -> None:
+        """
+        Schedule products to be re-read before the next lookup.
+
+        Args:
+            product_ids: Changed product ids, or None to rebuild the whole index
+        """
+        with self._lock:
+            if product_ids is None:
+                self._built = False
+                self._dirty.clear()
+            elif self._built:
+                self._dirty.update(product_ids)
+
+    def suggest(self, db: Session, prefix: str, limit: int) -> list[tuple[int, str]]:
+        """
+        Find products whose name contains words starting with the typed text.
+
+        Every complete word of the input must appear in the name, and the
+        last (possibly partial) word must prefix one of the name's words.
+
+        Args:
+            db: Database session, for the catalog validator and when the index is stale
+            prefix: Text typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of (product id, product name), in word order
+        """
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+
+        self._refresh(db)
+
+        *words, partial = tokens
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._entries, (partial,))
+            while position < len(self._entries) and len(results) < limit:
+                word, product_id = self._entries[position]
+                if not word.startswith(partial):
+                    break
+                position += 1
+                if product_id in seen:
+                    continue
+                seen.add(product_id)
+
+                name = self._names[product_id]
+                if words and not set(words).issubset(tokenize(name)):
+                    continue
+                results.append((product_id, name))
+        return results
+
+    def _refresh(self, db: Session) -> None:
+        """Build the index, re-read dirty products, or rebuild after other processes' writes, if needed."""
+        tag = catalog_validator(db).tag
+        if self._built and not self._dirty and tag == self._tag:
+            return
+
+        with self._lock:
+            if self._built and self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                rows = {
+                    product_id: (name, updated_at)
+                    for product_id, name, updated_at in db.query(Product.id, Product.name, Product.updated_at)
+                        .filter(Product.id.in_(dirty))
+                        .all()
+                }
+                for product_id in dirty:
+                    self._remove(product_id)
+                    if product_id in rows:
+                        self._add(product_id, *rows[product_id])
+
+            if not self._built or (tag != self._tag and tag != self._contents_tag()):
+                self._build(db)
+            self._tag = tag
+
+    def _build(self, db: Session) -> None:
+        """Read every product into a new index. Caller holds the lock."""
+        self._names = {}
+        self._updated = {}
+        self._entries = []
+        for product_id, name, updated_at in db.query(Product.id, Product.name, Product.updated_at).all():
+            self._names[product_id] = name
+            self._updated[product_id] = updated_at
+            self._entries.extend((word, product_id) for word in set(tokenize(name)))
+        self._entries.sort()
+        self._dirty.clear()
+        self._built = True
+
+    def _contents_tag(self) -> str:
+        """Catalog tag of the indexed products. Caller holds the lock."""
+        return catalog_tag(len(self._names), max(self._updated.values(), default=None))
+
+    def _add(self, product_id: int, name: str, updated_at: datetime) -> None:
+        """Insert a product's words. Caller holds the lock."""
+        self._names[product_id] = name
+        self._updated[product_id] = updated_at
+        for word in set(tokenize(name)):
+            insort(self._entries, (word, product_id))
+
+    def _remove(self, product_id: int) -> None:
+        """Delete a product's words. Caller holds the lock."""
+        name = self._names.pop(product_id, None)
+        self._updated.pop(product_id, None)
+        if name is None:
+            return
+        for word in set(tokenize(name)):
+            position = bisect_left(self._entries, (word, product_id))
+            if position < len(self._entries) and self._entries[position] == (word, product_id):
+                del self._entries[position]
+
+
+suggest_index = SuggestIndex()
+on_products_changed(suggest_index.mark_dirty)
@@ -1,5 +1,6 @@
 """Database setup and session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import Column, create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn, CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -33,8 +34,166 @@ def get_db():
         db.close()
 
 
+# Indexes of older schemas, superseded by the (column, id) indexes of Product
+SUPERSEDED_INDEXES = ("ix_products_name", "ix_products_category")
+
+# Columns that became NOT NULL, by table. Only short-lived rows may be listed:
+# existing rows with NULLs are deleted (stock holds without an owner expire anyway)
+REQUIRED_COLUMNS = {"stock_holds": ("owner_key",)}
+
+
 def init_db():
     """Initialize database tables."""
-    from app.models import user, product, cart, cart_item, saved_item, promo_code  # noqa: F401
+    from app.models import user, product, cart, cart_item, saved_item, cart_line_removal, promo_code, stock_hold, idempotency_key  # noqa: F401
+    from app.core.cart_store import check_dialect
+    from app.core.search import install_search_index
 
+    check_dialect(engine.dialect.name)
     Base.metadata.create_all(bind=engine)
+
+    # create_all() doesn't alter existing tables either; add columns introduced
+    # since they were created (such columns must be nullable, have a server
+    # default or be listed in REQUIRED_COLUMNS)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    if column.name in REQUIRED_COLUMNS.get(table.name, ()):
+                        # Added nullable; made NOT NULL below, once rows without a value are gone
+                        column = Column(column.name, column.type)
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+    # Nor does it make columns NOT NULL
+    inspector = inspect(engine)
+    for table_name, columns in REQUIRED_COLUMNS.items():
+        existing = {column["name"]: column for column in inspector.get_columns(table_name)}
+        nullable = [column for column in columns if existing[column]["nullable"]]
+        if nullable:
+            _set_not_null(Base.metadata.tables[table_name], nullable, list(existing))
+
+    # Nor does it relax NOT NULL on columns that became nullable, or make
+    # SQLite tables declared with sqlite_autoincrement stop reusing ids
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+        relaxed = [
+            column.name for column in table.columns
+            if column.nullable and column.name in existing and not existing[column.name]["nullable"]
+        ]
+        if _missing_autoincrement(table):
+            _rebuild_table(table, list(existing))
+            _skip_removed_ids(table)
+        elif relaxed:
+            _drop_not_null(table, relaxed, list(existing))
+
+    # create_all() skips tables that already exist, including their new indexes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # Drop indexes that composite indexes replaced; they only slow down writes
+    with engine.begin() as conn:
+        for index in SUPERSEDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+    install_search_index(engine)
+
+
+def _set_not_null(table, columns: list[str], existing_columns: list[str]):
+    """
+    Make existing nullable columns NOT NULL, deleting rows that have NULLs in them.
+
+    SQLite can't alter a column's constraints, so the table is rebuilt (see
+    _rebuild_table()).
+
+    Args:
+        table: Model table
+        columns: Names of the columns to make NOT NULL
+        existing_columns: Names of the columns the database table has
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {table.name} WHERE " + " OR ".join(f"{column} IS NULL" for column in columns)))
+        if engine.dialect.name != "sqlite":
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {column} SET NOT NULL"))
+    if engine.dialect.name == "sqlite":
+        _rebuild_table(table, existing_columns)
+
+
+def _drop_not_null(table, columns: list[str], existing_columns: list[str]):
+    """
+    Make existing NOT NULL columns nullable.
+
+    SQLite can't alter a column's constraints, so the table is rebuilt (see
+    _rebuild_table()).
+
+    Args:
+        table: Model table
+        columns: Names of the columns to make nullable
+        existing_columns: Names of the columns the database table has
+    """
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {column} DROP NOT NULL"))
+        return
+
+    _rebuild_table(table, existing_columns)
+
+
+def _missing_autoincrement(table) -> bool:
+    """Whether a table declared with sqlite_autoincrement was created without AUTOINCREMENT."""
+    if engine.dialect.name != "sqlite" or not table.dialect_options["sqlite"]["autoincrement"]:
+        return False
+    with engine.connect() as conn:
+        ddl = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": table.name},
+        ).scalar()
+    return "AUTOINCREMENT" not in ddl.upper()
+
+
+def _skip_removed_ids(table):
+    """
+    Start a rebuilt AUTOINCREMENT table's ids above every id a removal tombstone lists.
+
+    Lines deleted before the rebuild may have had higher ids than any
+    remaining row; delta responses still list those ids as removed.
+
+    Args:
+        table: Model table (cart_items or saved_items)
+    """
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+        conn.execute(text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT :name, MAX("
+            f"(SELECT COALESCE(MAX(id), 0) FROM {table.name}), "
+            "(SELECT COALESCE(MAX(line_id), 0) FROM cart_line_removals))"
+        ), {"name": table.name})
+
+
+def _rebuild_table(table, existing_columns: list[str]):
+    """
+    Recreate an existing SQLite table from its model, keeping its rows.
+
+    A copy is created from the model, rows are copied, and the copy replaces
+    the original. Indexes are recreated by init_db() afterwards.
+
+    Args:
+        table: Model table
+        existing_columns: Names of the columns the database table has
+    """
+    rebuilt_name = f"_{table.name}_rebuild"
+    rebuilt = table.to_metadata(Base.metadata, name=rebuilt_name)
+    try:
+        shared = ", ".join(column.name for column in table.columns if column.name in existing_columns)
+        with engine.begin() as conn:
+            conn.execute(CreateTable(rebuilt))
+            conn.execute(text(f"INSERT INTO {rebuilt_name} ({shared}) SELECT {shared} FROM {table.name}"))
+            conn.execute(text(f"DROP TABLE {table.name}"))
+            conn.execute(text(f"ALTER TABLE {rebuilt_name} RENAME TO {table.name}"))
+    finally:
+        Base.metadata.remove(rebuilt)
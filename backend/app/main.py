@@ -1,20 +1,70 @@
 """Main FastAPI application."""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import auth, products, cart, shipping, promo_codes, orders
+from app.api.routes import auth, products, cart, shipping, promo_codes, orders, reservations
 from app.config import settings
+from app.core.cart_buffer import cart_buffer
+from app.core.reaper import run_reaper
 from app.database import init_db
 
+logger = logging.getLogger(__name__)
+
 # Initialize database tables
 init_db()
 
+
+async def flush_cart_buffer_periodically():
+    """Write buffered cart updates to the database every CART_FLUSH_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.CART_FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(cart_buffer.flush)
+        except Exception:
+            # Updates stay buffered and journaled; retry on the next tick
+            logger.exception("Cart buffer flush failed")
+
+
+async def run_reaper_periodically():
+    """Delete stale carts and expired rows every CART_REAPER_INTERVAL_SECONDS, starting at startup."""
+    while True:
+        try:
+            await run_in_threadpool(run_reaper)
+        except Exception:
+            logger.exception("Reaper failed")
+        await asyncio.sleep(settings.CART_REAPER_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background tasks."""
+    tasks = []
+    if cart_buffer.enabled:
+        await run_in_threadpool(cart_buffer.recover)
+        tasks.append(asyncio.create_task(flush_cart_buffer_periodically()))
+    if settings.CART_REAPER_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_reaper_periodically()))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    if cart_buffer.enabled:
+        await run_in_threadpool(cart_buffer.flush)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
     version="1.0.0",
     description="Authentication API for Voyager Gear e-commerce platform",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -36,6 +86,7 @@ app.include_router(cart.router, prefix="/api")
 app.include_router(shipping.router, prefix="/api")
 app.include_router(promo_codes.router, prefix="/api")
 app.include_router(orders.router, prefix="/api")
+app.include_router(reservations.router, prefix="/api")
 
 
 @app.get("/")
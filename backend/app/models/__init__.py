@@ -4,9 +4,12 @@ from app.models.product import Product
 from app.models.cart import Cart
 from app.models.cart_item import CartItem
 from app.models.saved_item import SavedItem
+from app.models.cart_line_removal import CartLineRemoval
 from app.models.promo_code import PromoCode
 from app.models.order import Order
 from app.models.order_item import OrderItem
+from app.models.stock_hold import StockHold
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -14,7 +17,10 @@ __all__ = [
     "Cart",
     "CartItem",
     "SavedItem",
+    "CartLineRemoval",
     "PromoCode",
     "Order",
     "OrderItem",
+    "StockHold",
+    "IdempotencyKey",
 ]
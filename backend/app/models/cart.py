@@ -1,29 +1,35 @@
 """
 Cart Model
-Represents a user's shopping cart
+Represents a user's or guest's shopping cart
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class Cart(Base):
     """
-    Shopping cart model - one cart per user
+    Shopping cart model - one cart per user, or an anonymous guest cart
+    identified by guest_id (see app.core.security.create_cart_token)
     """
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, unique=True, index=True)  # NULL for guest carts
+    guest_id = Column(String(32), nullable=True, unique=True, index=True)  # NULL for user carts
+    expires_at = Column(DateTime, nullable=True, index=True)  # Guest carts only; extended by every mutation
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Incremented by every mutation
+    pruned_version = Column(Integer, nullable=False, default=0, server_default="0")  # Removal tombstones up to this version were pruned
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     # Relationships
     user = relationship("User", back_populates="cart")
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
     saved_items = relationship("SavedItem", back_populates="cart", cascade="all, delete-orphan")
+    removals = relationship("CartLineRemoval", back_populates="cart", cascade="all, delete-orphan")
 
     def __repr__(self):
-        return f"<Cart(id={self.id}, user_id={self.user_id}, items={len(self.items)})>"
+        return f"<Cart(id={self.id}, user_id={self.user_id}, guest_id={self.guest_id}, items={len(self.items)})>"
@@ -0,0 +1,37 @@
+"""
+CartLineRemoval Model
+Records cart lines removed at a cart version, so delta responses can report removals
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class CartLineRemoval(Base):
+    """
+    Cart line removal model - tombstone for a deleted cart item or saved item
+    """
+    __tablename__ = "cart_line_removals"
+
+    ITEM = "item"
+    SAVED = "saved"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False)
+    line_type = Column(String(10), nullable=False)  # "item" or "saved"
+    line_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    removed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    cart = relationship("Cart", back_populates="removals")
+
+    # Delta reads select a cart's removals after a version
+    __table_args__ = (
+        Index("ix_cart_line_removals_cart_version", "cart_id", "version"),
+    )
+
+    def __repr__(self):
+        return f"<CartLineRemoval(cart_id={self.cart_id}, {self.line_type}={self.line_id}, version={self.version})>"
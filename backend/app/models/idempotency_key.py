@@ -0,0 +1,33 @@
+"""
+IdempotencyKey Model
+Stores the response of a write request made with an Idempotency-Key header
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency key model - the first response to a keyed request, replayed
+    for retries with the same key (see app.core.idempotency)
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(64), nullable=False)  # Endpoint and hashed caller (see app.core.idempotency.caller_scope)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of the request body
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)  # Serialized JSON response
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # A key is looked up, and claimed, per scope
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(scope={self.scope}, key={self.key}, status_code={self.status_code})>"
@@ -1,6 +1,6 @@
 """Order database model."""
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, ForeignKey, CheckConstraint
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import validates
 from app.database import Base
@@ -70,6 +70,8 @@ class Order(Base):
             '(user_id IS NOT NULL AND guest_email IS NULL) OR (user_id IS NULL AND guest_email IS NOT NULL)',
             name='check_user_or_guest'
         ),
+        # Order history pages walk a user's orders by (created_at, id)
+        Index('ix_orders_user_created', 'user_id', 'created_at', 'id'),
     )
 
     @property
@@ -2,7 +2,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
 
 from app.database import Base
 
@@ -22,14 +22,26 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(200), nullable=False, index=True)
+    name = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
     price = Column(Float, nullable=False)
-    category = Column(String(50), nullable=False, index=True)
+    category = Column(String(50), nullable=False)
     image_url = Column(String(500), nullable=False)
     stock = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Composite (sort key, id) indexes serve sorted listings and keyset pagination,
+    # with and without a category filter (see app.core.product_query). They also
+    # cover plain lookups by name and category.
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_category_price_id", "category", "price", "id"),
+        Index("ix_products_category_name_id", "category", "name", "id"),
+        Index("ix_products_category_created_at_id", "category", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', category='{self.category}', price={self.price})>"
@@ -19,6 +19,7 @@ class SavedItem(Base):
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False, default=1)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Cart version of the last write
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -28,6 +29,8 @@ class SavedItem(Base):
     # Unique constraint: one product can only appear once in saved items per cart
     __table_args__ = (
         UniqueConstraint('cart_id', 'product_id', name='uix_saved_cart_product'),
+        # Never reuse the ids of deleted lines: delta responses list them as removed
+        {"sqlite_autoincrement": True},
     )
 
     def __repr__(self):
@@ -0,0 +1,33 @@
+"""
+StockHold Model
+Reserves units of a product for a checkout in progress, until it expires
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from app.database import Base
+
+
+class StockHold(Base):
+    """
+    Stock hold model - one row per product of a reservation; all rows of a
+    reservation share its reservation_id (see app.core.reservations)
+    """
+    __tablename__ = "stock_holds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reservation_id = Column(String(32), nullable=False, index=True)
+    # "user:<id>" or "guest:<guest id>" (see app.api.deps.CartOwner.key)
+    owner_key = Column(String(64), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Available stock sums a product's unexpired holds
+    __table_args__ = (
+        Index("ix_stock_holds_product_expires", "product_id", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<StockHold(reservation_id={self.reservation_id}, product_id={self.product_id}, quantity={self.quantity})>"
@@ -23,6 +23,7 @@ class LoginResponse(Token):
 
     expires_in: int = Field(..., description="Token expiration time in seconds")
     user: UserResponse
+    cart_merged: bool = Field(False, description="Whether the guest cart of the sent cart token was merged")
 
 
 class LogoutResponse(BaseModel):
@@ -1,8 +1,8 @@
 """Pydantic schemas for Cart models."""
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.schemas.product import ProductResponse
 
@@ -53,13 +53,49 @@ class SavedItemResponse(BaseModel):
         from_attributes = True
 
 
+class CartTotals(BaseModel):
+    """
+    Schema for server-computed cart totals.
+
+    Tax fields are null until a ZIP code is given, and total_amount then
+    excludes tax.
+    """
+
+    subtotal: float
+    promo_code: Optional[str]
+    discount_percentage: float
+    discount_amount: float
+    shipping_amount: float
+    state: Optional[str]
+    tax_rate: Optional[float]
+    tax_amount: Optional[float]
+    total_amount: float
+
+    class Config:
+        from_attributes = True
+
+
 class CartResponse(BaseModel):
-    """Schema for cart response."""
+    """
+    Schema for cart response.
+
+    When delta is true, items and saved_items only contain lines changed since
+    the requested version and removed lines are listed by id; clients apply
+    removals before changes. Line ids are never reused. A version too old for
+    a delta gets the full cart (delta false). totals is only set by GET /cart,
+    which returns an empty cart with id 0 to guests who have none yet.
+    """
 
     id: int
-    user_id: int
+    user_id: Optional[int] = Field(None, description="Owner's user ID, null for guest carts")
+    expires_at: Optional[datetime] = Field(None, description="When a guest cart expires unless changed")
+    version: int = Field(..., description="Cart version, incremented by every mutation")
+    delta: bool = Field(False, description="Whether only changes since the requested version are included")
     items: list[CartItemResponse]
     saved_items: list[SavedItemResponse]
+    removed_item_ids: list[int] = Field(default_factory=list, description="Cart items removed (delta only)")
+    removed_saved_item_ids: list[int] = Field(default_factory=list, description="Saved items removed (delta only)")
+    totals: Optional[CartTotals] = Field(None, description="Subtotal, discount, shipping, tax and total")
     created_at: datetime
     updated_at: datetime
 
@@ -78,3 +114,41 @@ class GuestCartMerge(BaseModel):
     """Schema for merging guest cart with user cart."""
 
     items: list[GuestCartItem] = Field(..., description="Guest cart items to merge")
+
+
+class CartOperation(BaseModel):
+    """
+    Schema for one operation of a cart batch.
+
+    Required fields per op: add (product_id, quantity), update (item_id,
+    quantity), remove (item_id), save (item_id), restore (saved_id).
+    """
+
+    op: Literal["add", "update", "remove", "save", "restore"]
+    product_id: Optional[int] = Field(None, gt=0, description="Product ID (add)")
+    item_id: Optional[int] = Field(None, description="Cart item ID (update, remove, save)")
+    saved_id: Optional[int] = Field(None, description="Saved item ID (restore)")
+    quantity: Optional[int] = Field(None, gt=0, description="Quantity to add (add) or set (update)")
+
+    @model_validator(mode="after")
+    def check_required_fields(self) -> "CartOperation":
+        """Ensure the fields used by the operation are present."""
+        required = {
+            "add": ("product_id", "quantity"),
+            "update": ("item_id", "quantity"),
+            "remove": ("item_id",),
+            "save": ("item_id",),
+            "restore": ("saved_id",),
+        }[self.op]
+        missing = [field for field in required if getattr(self, field) is None]
+        if missing:
+            raise ValueError(f"{self.op} requires {', '.join(missing)}")
+        return self
+
+
+class CartBatchRequest(BaseModel):
+    """Schema for applying several cart operations at once."""
+
+    operations: list[CartOperation] = Field(
+        ..., min_length=1, max_length=50, description="Operations, applied in order"
+    )
@@ -8,13 +8,13 @@ from app.schemas.product import ProductResponse
 
 
 class OrderItemCreate(BaseModel):
-    """Schema for creating an order item."""
+    """Schema for creating an order item. Name, price and subtotal are taken from the product."""
 
     product_id: int = Field(..., gt=0, description="Product ID")
-    product_name: str = Field(..., min_length=1, description="Product name")
-    product_price: float = Field(..., gt=0, description="Product price")
+    product_name: Optional[str] = Field(None, min_length=1, description="Product name (ignored)")
+    product_price: Optional[float] = Field(None, gt=0, description="Product price (ignored)")
     quantity: int = Field(..., gt=0, description="Item quantity")
-    subtotal: float = Field(..., ge=0, description="Item subtotal")
+    subtotal: Optional[float] = Field(None, ge=0, description="Item subtotal (ignored)")
 
 
 class OrderItemResponse(BaseModel):
@@ -71,13 +71,18 @@ class OrderCreate(BaseModel):
     card_last_four: Optional[str] = Field(None, min_length=4, max_length=4)
     card_brand: Optional[str] = Field(None, max_length=20)
 
-    # Order Totals
-    subtotal: float = Field(..., ge=0)
-    discount_amount: float = Field(default=0.00, ge=0)
+    # Stock reservation taken at checkout start, converted by this order
+    reservation_id: Optional[str] = Field(None, max_length=32)
+
+    # Promo code; order totals are computed by the server from current prices
     promo_code: Optional[str] = Field(None, max_length=50)
-    tax_amount: float = Field(..., ge=0)
-    shipping_amount: float = Field(..., ge=0)
-    total_amount: float = Field(..., gt=0)
+
+    # Client-computed totals, accepted for compatibility and ignored
+    subtotal: Optional[float] = Field(None, ge=0)
+    discount_amount: Optional[float] = Field(None, ge=0)
+    tax_amount: Optional[float] = Field(None, ge=0)
+    shipping_amount: Optional[float] = Field(None, ge=0)
+    total_amount: Optional[float] = Field(None, gt=0)
 
     # Order Items
     items: list[OrderItemCreate] = Field(..., min_length=1, description="Order items")
@@ -140,3 +145,21 @@ class OrderResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class OrderSummaryResponse(BaseModel):
+    """Schema for an order in the summary view of the order history (no items or addresses)."""
+
+    id: int
+    order_number: str
+    status: str
+    subtotal: float
+    discount_amount: float
+    tax_amount: float
+    shipping_amount: float
+    total_amount: float
+    item_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,9 @@
 """Pydantic schemas for Product model."""
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
 
 class ProductBase(BaseModel):
@@ -48,10 +49,96 @@ class ProductListResponse(BaseModel):
     """Schema for paginated product list response."""
 
     products: list[ProductResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Matching products (omitted when include_total=false)")
+    total_is_approximate: bool = Field(False, description="Whether total is a lower bound")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
 
     class Config:
         from_attributes = True
+
+
+@lru_cache(maxsize=None)
+def product_response_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Build (once per fieldset) a product response schema limited to some fields.
+
+    Args:
+        fields: Field names of ProductResponse to keep
+
+    Returns:
+        Pydantic model with only the given fields
+    """
+    return create_model(
+        f"ProductResponse[{','.join(fields)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{field: (ProductResponse.model_fields[field].annotation, ...) for field in fields},
+    )
+
+
+@lru_cache(maxsize=None)
+def product_list_response_model(fields: tuple[str, ...]) -> type[ProductListResponse]:
+    """
+    Build (once per fieldset) a product list response schema with trimmed products.
+
+    Args:
+        fields: Field names of ProductResponse to keep
+
+    Returns:
+        ProductListResponse subclass whose products only have the given fields
+    """
+    return create_model(
+        f"ProductListResponse[{','.join(fields)}]",
+        __base__=ProductListResponse,
+        products=(list[product_response_model(fields)], ...),
+    )
+
+
+class ProductBatchResponse(BaseModel):
+    """Schema for batch product lookup response."""
+
+    products: list[ProductResponse] = Field(..., description="Found products, in request order")
+    missing_ids: list[int] = Field(default_factory=list, description="Requested IDs that don't exist")
+
+
+class CategoryFacet(BaseModel):
+    """Schema for a category facet count."""
+
+    category: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    """Schema for a price histogram bucket (min_price inclusive, max_price exclusive)."""
+
+    min_price: float
+    max_price: float
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    """Schema for product facet aggregation response."""
+
+    total: int = Field(..., description="Products matching all filters")
+    categories: list[CategoryFacet] = Field(
+        ..., description="Product counts per category, ignoring the category filter"
+    )
+    bucket_width: float
+    price_histogram: list[PriceBucket] = Field(
+        ..., description="Non-empty price buckets for products matching all filters"
+    )
+
+
+class ProductSuggestion(BaseModel):
+    """Schema for an autocomplete suggestion."""
+
+    id: int
+    name: str
+
+
+class ProductSuggestResponse(BaseModel):
+    """Schema for autocomplete response."""
+
+    suggestions: list[ProductSuggestion]
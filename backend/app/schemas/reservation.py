@@ -0,0 +1,27 @@
+"""Pydantic schemas for stock reservations."""
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ReservationItem(BaseModel):
+    """Schema for one product of a reservation."""
+
+    product_id: int = Field(..., gt=0, description="Product ID")
+    quantity: int = Field(..., gt=0, description="Quantity to hold")
+
+
+class ReservationCreate(BaseModel):
+    """Schema for holding stock at checkout start."""
+
+    items: list[ReservationItem] = Field(
+        ..., min_length=1, max_length=50, description="Products to hold"
+    )
+
+
+class ReservationResponse(BaseModel):
+    """Schema for a created reservation. The reservation_id is needed to release or convert it."""
+
+    reservation_id: str
+    expires_at: datetime
+    items: list[ReservationItem]
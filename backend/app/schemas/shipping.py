@@ -1,4 +1,6 @@
 """Pydantic schemas for shipping and tax calculations."""
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -7,6 +9,7 @@ class ShippingTaxRequest(BaseModel):
 
     zip_code: str = Field(..., min_length=5, max_length=10, description="ZIP code for calculation")
     subtotal: float = Field(..., gt=0, description="Cart subtotal")
+    promo_code: Optional[str] = Field(None, max_length=50, description="Promo code to apply before tax")
 
 
 class ShippingTaxResponse(BaseModel):
@@ -17,6 +20,8 @@ class ShippingTaxResponse(BaseModel):
     tax_rate: float
     shipping_cost: float
     subtotal: float
+    promo_code: Optional[str] = None
+    discount_amount: float = 0.0
     tax_amount: float
     shipping_amount: float
     total: float
@@ -0,0 +1,89 @@
+"""Shared fixtures: a throwaway SQLite database, an API client and row factories."""
+import os
+import tempfile
+
+# Configure the app before it is imported: it creates its tables at import time
+_TMP_DIR = tempfile.mkdtemp(prefix="voyager-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["DEBUG"] = "False"
+os.environ["CART_WRITE_BEHIND"] = "False"
+os.environ["CART_REAPER_INTERVAL_SECONDS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.catalog import publish_products_changed
+from app.core.pricing import cart_pricer
+from app.core.security import create_access_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.product import Product
+from app.models.user import User
+
+
+@pytest.fixture(scope="session")
+def client():
+    """API client (the app lifespan, and so its background tasks, is not started)."""
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """Empty every table and in-process cache after each test."""
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    publish_products_changed()
+    cart_pricer.clear()
+
+
+@pytest.fixture
+def db():
+    """Database session, closed after the test."""
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_product(db):
+    """Factory creating a product with the given stock and price."""
+    def make(stock: int = 10, price: float = 10.0, name: str = "Test Product") -> Product:
+        product = Product(name=name, description="Test product", price=price,
+                          category="bags", image_url="https://example.com/p.png", stock=stock)
+        db.add(product)
+        db.commit()
+        db.refresh(product)
+        return product
+
+    return make
+
+
+@pytest.fixture
+def user_headers(db):
+    """Factory creating a user and returning its Authorization header."""
+    def make(username: str = "alice") -> dict[str, str]:
+        user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    return make
+
+
+@pytest.fixture
+def order_payload():
+    """Factory building a valid order body for the given (product ID, quantity) items."""
+    def make(*items: tuple[int, int], **fields) -> dict:
+        return {
+            "shipping_first_name": "Ada",
+            "shipping_last_name": "Lovelace",
+            "shipping_address_line1": "1 Market St",
+            "shipping_city": "San Francisco",
+            "shipping_state": "CA",
+            "shipping_zip_code": "94105",
+            "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items],
+            **fields,
+        }
+
+    return make
@@ -0,0 +1,51 @@
+"""Cart reads: cart creation on first access."""
+import threading
+
+from app.models.cart import Cart
+
+
+def test_concurrent_first_reads_share_one_cart(client, db, user_headers):
+    alice = user_headers("alice")
+    threads = 8
+    barrier = threading.Barrier(threads)
+    responses = []
+
+    def get_cart():
+        barrier.wait()
+        responses.append(client.get("/api/cart", headers=alice))
+
+    workers = [threading.Thread(target=get_cart) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [response.status_code for response in responses] == [200] * threads
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert db.query(Cart).count() == 1
+
+
+def test_anonymous_read_creates_nothing(client, db):
+    client.cookies.clear()
+    response = client.get("/api/cart", params={"zip_code": "94105"})
+
+    assert response.status_code == 200
+    assert response.json()["id"] == 0
+    assert response.json()["items"] == []
+    assert response.json()["totals"]["total_amount"] == 0.0
+    assert "X-Cart-Token" not in response.headers
+    assert "set-cookie" not in response.headers
+    assert db.query(Cart).count() == 0
+
+
+def test_guest_cart_is_created_by_the_first_mutation(client, db, make_product):
+    client.cookies.clear()
+    product = make_product()
+    added = client.post("/api/cart/items", json={"product_id": product.id, "quantity": 1})
+    token = added.headers["X-Cart-Token"]
+
+    cart = client.get("/api/cart", headers={"X-Cart-Token": token}).json()
+
+    assert cart["id"] == added.json()["id"] != 0
+    assert [item["product_id"] for item in cart["items"]] == [product.id]
+    assert db.query(Cart).count() == 1
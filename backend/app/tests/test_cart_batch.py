@@ -0,0 +1,90 @@
+"""Cart batch operations: stock guards, line identity and the upserts behind them."""
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+
+from app.database import engine, init_db
+
+
+def batch(client, headers, *operations, **params):
+    return client.post("/api/cart/batch", headers=headers, params=params, json={"operations": list(operations)})
+
+
+def test_remove_then_add_gives_the_product_a_new_line(client, make_product, user_headers):
+    product = make_product(stock=10)
+    alice = user_headers("alice")
+    cart = batch(client, alice, {"op": "add", "product_id": product.id, "quantity": 2}).json()
+    old_line = cart["items"][0]["id"]
+
+    delta = batch(client, alice,
+                  {"op": "remove", "item_id": old_line},
+                  {"op": "add", "product_id": product.id, "quantity": 2},
+                  since=cart["version"]).json()
+
+    assert delta["removed_item_ids"] == [old_line]
+    assert [item["product_id"] for item in delta["items"]] == [product.id]
+    assert delta["items"][0]["id"] != old_line
+
+
+def test_stock_sold_before_the_write_fails_the_whole_batch(client, make_product, user_headers):
+    first, second = make_product(stock=10, name="First"), make_product(stock=10, name="Second")
+    alice = user_headers("alice")
+
+    def sell_out_before_write(conn, cursor, statement, parameters, context, executemany):
+        # Another checkout buys the second product after the batch read its stock
+        if statement.startswith("INSERT INTO cart_items"):
+            sqlite3.Cursor.execute(cursor, "UPDATE products SET stock = 1 WHERE id = ?", (second.id,))
+
+    event.listen(engine, "before_cursor_execute", sell_out_before_write)
+    try:
+        response = batch(client, alice,
+                         {"op": "add", "product_id": first.id, "quantity": 3},
+                         {"op": "add", "product_id": second.id, "quantity": 3})
+    finally:
+        event.remove(engine, "before_cursor_execute", sell_out_before_write)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Operation 1: Only 1 units available"
+    assert client.get("/api/cart", headers=alice).json()["items"] == []
+
+
+def test_failed_operation_applies_nothing(client, make_product, user_headers):
+    product = make_product(stock=2)
+    alice = user_headers("alice")
+
+    response = batch(client, alice,
+                     {"op": "add", "product_id": product.id, "quantity": 1},
+                     {"op": "add", "product_id": product.id, "quantity": 2})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Operation 1: ")
+    assert client.get("/api/cart", headers=alice).json()["items"] == []
+
+
+def test_cart_upserts_reuse_their_compiled_sql(client, make_product, user_headers):
+    product = make_product(stock=10)
+    alice = user_headers("alice")
+    add = {"product_id": product.id, "quantity": 1}
+    client.post("/api/cart/items", headers=alice, json=add)
+    hits = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(("INSERT INTO carts", "INSERT INTO cart_items")):
+            hits.append(context.cache_hit == CacheStats.CACHE_HIT)
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        client.post("/api/cart/items", headers=alice, json=add)
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+    assert hits and all(hits)
+
+
+def test_init_db_rejects_databases_without_cart_upserts(monkeypatch):
+    monkeypatch.setattr(engine.dialect, "name", "mysql")
+
+    with pytest.raises(RuntimeError, match="mysql"):
+        init_db()
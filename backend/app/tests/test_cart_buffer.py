@@ -0,0 +1,127 @@
+"""Write-behind cart quantities: reads don't flush, flushes coalesce and the journal survives a crash."""
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.core.cart_buffer import CartWriteBuffer, cart_buffer
+from app.database import SessionLocal, engine
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+
+
+@pytest.fixture
+def buffered(monkeypatch, tmp_path):
+    """Enable the app's write-behind buffer with a temporary journal."""
+    monkeypatch.setattr(cart_buffer, "enabled", True)
+    monkeypatch.setattr(cart_buffer, "journal_path", str(tmp_path / "cart-journal.jsonl"))
+    yield cart_buffer
+    cart_buffer.flush()
+
+
+@pytest.fixture
+def cart_line(client, make_product, user_headers):
+    """Alice's headers and a cart line of a $10 product in stock 10, at quantity 1."""
+    product = make_product(stock=10, price=10.0)
+    alice = user_headers("alice")
+    cart = client.post("/api/cart/items", headers=alice, json={"product_id": product.id, "quantity": 1}).json()
+    return alice, cart
+
+
+def stored_quantity(item_id):
+    with SessionLocal() as db:
+        return db.get(CartItem, item_id).quantity
+
+
+def test_reads_serve_buffered_quantities_without_flushing(client, buffered, cart_line):
+    alice, cart = cart_line
+    item_id = cart["items"][0]["id"]
+
+    updated = client.put(f"/api/cart/items/{item_id}", headers=alice, json={"quantity": 3}).json()
+    full = client.get("/api/cart", headers=alice).json()
+    delta = client.get("/api/cart", headers=alice, params={"since": cart["version"]}).json()
+    current = client.get("/api/cart", headers=alice, params={"since": updated["version"]}).json()
+
+    assert stored_quantity(item_id) == 1
+    assert full["version"] == updated["version"] == cart["version"] + 1
+    assert [item["quantity"] for item in full["items"]] == [3]
+    assert full["totals"]["subtotal"] == 30.0
+    assert delta["delta"] and [(item["id"], item["quantity"]) for item in delta["items"]] == [(item_id, 3)]
+    assert current["delta"] and current["items"] == []
+
+
+def test_flush_coalesces_updates_of_a_line(client, buffered, cart_line):
+    alice, cart = cart_line
+    item_id = cart["items"][0]["id"]
+    for quantity in (2, 5, 4):
+        client.put(f"/api/cart/items/{item_id}", headers=alice, json={"quantity": quantity})
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(statement.split()[1])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        written = buffered.flush()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert written == 1
+    assert updates == ["carts", "cart_items"]
+    assert stored_quantity(item_id) == 4
+    with SessionLocal() as db:
+        assert db.get(Cart, cart["id"]).version == cart["version"] + 3
+    assert open(buffered.journal_path).read() == ""
+
+
+def test_update_during_a_flush_stays_buffered(client, buffered, cart_line):
+    alice, cart = cart_line
+    item_id = cart["items"][0]["id"]
+    client.put(f"/api/cart/items/{item_id}", headers=alice, json={"quantity": 2})
+    user_id = buffered.pending(cart["id"]).user_id
+
+    def update_mid_write(conn, cursor, statement, parameters, context, executemany):
+        # The flush writes without holding the buffer lock
+        if statement.startswith("UPDATE cart_items"):
+            with SessionLocal() as db:
+                buffered.set_item_quantity(db, user_id, item_id, 6)
+
+    event.listen(engine, "before_cursor_execute", update_mid_write)
+    try:
+        buffered.flush()
+    finally:
+        event.remove(engine, "before_cursor_execute", update_mid_write)
+
+    assert stored_quantity(item_id) == 2
+    assert buffered.pending(cart["id"]).lines == {item_id: (6, cart["version"] + 2)}
+    assert [item["quantity"] for item in client.get("/api/cart", headers=alice).json()["items"]] == [6]
+
+    buffered.flush()
+    assert stored_quantity(item_id) == 6
+    assert buffered.pending(cart["id"]) is None
+
+
+def test_recover_replays_the_journal_of_a_crashed_process(client, buffered, cart_line):
+    alice, cart = cart_line
+    item_id = cart["items"][0]["id"]
+    for quantity in (2, 7):
+        client.put(f"/api/cart/items/{item_id}", headers=alice, json={"quantity": quantity})
+    with open(buffered.journal_path, "a", encoding="utf-8") as journal:
+        journal.write(json.dumps({"cart_id": cart["id"], "item_id": item_id})[:-5])
+
+    # A new process finds the journal the crashed one left behind
+    restarted = CartWriteBuffer(enabled=True, journal_path=buffered.journal_path)
+    assert restarted.recover() == 1
+    assert stored_quantity(item_id) == 7
+    assert open(buffered.journal_path).read() == ""
+
+    # Replaying entries already written is a no-op
+    client.put(f"/api/cart/items/{item_id}", headers=alice, json={"quantity": 9})
+    buffered.flush()
+    stale = {"cart_id": cart["id"], "user_id": cart["user_id"], "item_id": item_id, "quantity": 2,
+             "version": cart["version"] + 1, "at": "2026-01-01T00:00:00"}
+    with open(buffered.journal_path, "w", encoding="utf-8") as journal:
+        journal.write(json.dumps(stale) + "\n")
+    restarted.recover()
+    assert stored_quantity(item_id) == 9
@@ -0,0 +1,91 @@
+"""Cart deltas: line ids are never reused and old tombstones are pruned."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.schema import CreateTable
+
+from app.core.reaper import reap_removals
+from app.database import engine, init_db
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.cart_line_removal import CartLineRemoval
+
+
+def test_deleted_item_ids_are_not_reused(client, make_product, user_headers):
+    first, second = make_product(name="First"), make_product(name="Second")
+    alice = user_headers("alice")
+    cart = client.post("/api/cart/items", headers=alice, json={"product_id": first.id, "quantity": 1}).json()
+    old_line = cart["items"][0]["id"]
+
+    client.delete(f"/api/cart/items/{old_line}", headers=alice)
+    added = client.post("/api/cart/items", headers=alice, json={"product_id": second.id, "quantity": 1}).json()
+    delta = client.get("/api/cart", headers=alice, params={"since": cart["version"]}).json()
+
+    assert added["items"][0]["id"] > old_line
+    assert delta["removed_item_ids"] == [old_line]
+    assert [item["id"] for item in delta["items"]] == [added["items"][0]["id"]]
+
+
+def test_deleted_saved_item_ids_are_not_reused(client, make_product, user_headers):
+    product = make_product()
+    alice = user_headers("alice")
+    line = client.post("/api/cart/items", headers=alice, json={"product_id": product.id, "quantity": 1}).json()
+    saved = client.post(f"/api/cart/items/{line['items'][0]['id']}/save", headers=alice).json()
+    old_saved = saved["saved_items"][0]["id"]
+
+    client.delete(f"/api/cart/saved/{old_saved}", headers=alice)
+    line = client.post("/api/cart/items", headers=alice, json={"product_id": product.id, "quantity": 1}).json()
+    saved = client.post(f"/api/cart/items/{line['items'][0]['id']}/save", headers=alice).json()
+
+    assert saved["saved_items"][0]["id"] > old_saved
+
+
+def test_pruned_removals_send_older_versions_the_full_cart(client, db, make_product, user_headers):
+    kept, removed = make_product(name="Kept"), make_product(name="Removed")
+    alice = user_headers("alice")
+    client.post("/api/cart/items", headers=alice, json={"product_id": kept.id, "quantity": 1})
+    cart = client.post("/api/cart/items", headers=alice, json={"product_id": removed.id, "quantity": 1}).json()
+    line = next(item["id"] for item in cart["items"] if item["product_id"] == removed.id)
+    after_removal = client.delete(f"/api/cart/items/{line}", headers=alice).json()
+
+    assert reap_removals(now=datetime.utcnow() + timedelta(days=30)) == 1
+
+    stale = client.get("/api/cart", headers=alice, params={"since": cart["version"]}).json()
+    current = client.get("/api/cart", headers=alice, params={"since": after_removal["version"]}).json()
+    assert stale["delta"] is False
+    assert [item["product_id"] for item in stale["items"]] == [kept.id]
+    assert current["delta"] is True
+    assert db.query(CartLineRemoval).count() == 0
+    assert db.get(Cart, cart["id"]).pruned_version == after_removal["version"]
+
+
+def test_recent_removals_are_kept(client, make_product, user_headers):
+    product = make_product()
+    alice = user_headers("alice")
+    cart = client.post("/api/cart/items", headers=alice, json={"product_id": product.id, "quantity": 1}).json()
+    client.delete(f"/api/cart/items/{cart['items'][0]['id']}", headers=alice)
+
+    assert reap_removals() == 0
+    assert client.get("/api/cart", headers=alice, params={"since": cart["version"]}).json()["delta"] is True
+
+
+def test_init_db_stops_existing_tables_reusing_ids(client, db, make_product, user_headers):
+    product = make_product()
+    alice = user_headers("alice")
+    cart_id = client.get("/api/cart", headers=alice).json()["id"]
+
+    # A cart_items table from before AUTOINCREMENT, whose highest line (id 7) was deleted
+    legacy = str(CreateTable(CartItem.__table__).compile(dialect=engine.dialect)).replace(" AUTOINCREMENT", "")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE cart_items"))
+        conn.execute(text(legacy))
+        conn.execute(insert(CartLineRemoval.__table__).values(
+            cart_id=cart_id, line_type=CartLineRemoval.ITEM, line_id=7, version=1, removed_at=datetime.utcnow()))
+
+    init_db()
+
+    with engine.connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'cart_items'")).scalar()
+    added = client.post("/api/cart/items", headers=alice, json={"product_id": product.id, "quantity": 1}).json()
+    assert "AUTOINCREMENT" in ddl
+    assert added["items"][0]["id"] > 7
@@ -0,0 +1,44 @@
+"""Catalog ETags follow writes made outside this process."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core import catalog
+from app.database import engine
+
+
+def write_from_another_process(sql: str, **params):
+    """Change products without this process's change tracking, then let the validator TTL pass."""
+    with engine.begin() as conn:
+        conn.execute(text(sql), params)
+    catalog._validators.clear()
+
+
+def test_unchanged_catalog_is_not_modified(client, make_product):
+    make_product()
+    etag = client.get("/api/products").headers["ETag"]
+
+    assert client.get("/api/products", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_update_by_another_process_changes_etag_and_body(client, make_product):
+    product = make_product(price=10.0)
+    first = client.get("/api/products")
+
+    write_from_another_process("UPDATE products SET price = 12.5, updated_at = :now WHERE id = :id",
+                               now=datetime.utcnow() + timedelta(seconds=1), id=product.id)
+    second = client.get("/api/products", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["products"][0]["price"] == 12.5
+
+
+def test_delete_by_another_process_changes_etag(client, make_product):
+    make_product(name="Kept")
+    removed = make_product(name="Removed")
+    etag = client.get("/api/products/facets").headers["ETag"]
+
+    write_from_another_process("DELETE FROM products WHERE id = :id", id=removed.id)
+
+    assert client.get("/api/products/facets", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,43 @@
+"""Conditional requests against content-coded catalog responses."""
+import pytest
+
+
+@pytest.fixture
+def catalog(make_product):
+    """Enough products for the product list to be stored compressed."""
+    for i in range(10):
+        make_product(name=f"Product {i}")
+
+
+def test_each_coding_has_its_own_strong_etag(client, catalog):
+    identity = client.get("/api/products", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/products", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == identity.headers["ETag"][:-1] + '-gzip"'
+    assert gzipped.json() == identity.json()
+
+
+@pytest.mark.parametrize("coding", ["identity", "gzip"])
+@pytest.mark.parametrize("weak", [False, True])
+def test_every_variant_etag_revalidates(client, catalog, coding, weak):
+    etag = client.get("/api/products", headers={"Accept-Encoding": coding}).headers["ETag"]
+
+    response = client.get("/api/products", headers={
+        "Accept-Encoding": coding,
+        "If-None-Match": f"W/{etag}" if weak else etag,
+    })
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_stale_variant_etag_does_not_revalidate(client, catalog, make_product):
+    etag = client.get("/api/products", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    make_product(name="New Product")
+
+    response = client.get("/api/products", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
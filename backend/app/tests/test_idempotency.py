@@ -0,0 +1,68 @@
+"""Idempotency-Key handling on order creation."""
+
+
+def test_retry_replays_the_first_order(client, db, make_product, order_payload):
+    product = make_product(stock=5)
+    body = order_payload((product.id, 2), guest_email="ada@example.com")
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    first = client.post("/api/orders/guest", json=body, headers=headers)
+    retry = client.post("/api/orders/guest", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    db.refresh(product)
+    assert product.stock == 3
+
+
+def test_same_key_with_a_different_body_is_rejected(client, make_product, order_payload):
+    product = make_product(stock=5)
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    client.post("/api/orders/guest", json=order_payload((product.id, 1), guest_email="ada@example.com"), headers=headers)
+    response = client.post("/api/orders/guest", json=order_payload((product.id, 2), guest_email="ada@example.com"),
+                           headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_guests_sharing_a_key_do_not_collide(client, db, make_product, order_payload):
+    product = make_product(stock=5)
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    ada = client.post("/api/orders/guest", json=order_payload((product.id, 1), guest_email="ada@example.com"),
+                      headers=headers)
+    bob = client.post("/api/orders/guest", json=order_payload((product.id, 1), guest_email="bob@example.com"),
+                      headers=headers)
+
+    assert ada.status_code == bob.status_code == 201
+    assert "Idempotent-Replayed" not in bob.headers
+    assert bob.json()["id"] != ada.json()["id"]
+    assert bob.json()["guest_email"] == "bob@example.com"
+    db.refresh(product)
+    assert product.stock == 3
+
+
+def test_guest_email_is_normalized_for_the_scope(client, make_product, order_payload):
+    product = make_product(stock=5)
+    headers = {"Idempotency-Key": "checkout-1"}
+    body = order_payload((product.id, 1), guest_email="ada@example.com")
+
+    first = client.post("/api/orders/guest", json=body, headers=headers)
+    retry = client.post("/api/orders/guest", json={**body, "guest_email": "ADA@example.com"}, headers=headers)
+
+    # Same caller, but the body differs, so the key is not replayed for it
+    assert first.status_code == 201
+    assert retry.status_code == 422
+
+
+def test_users_sharing_a_key_do_not_collide(client, make_product, order_payload, user_headers):
+    product = make_product(stock=5)
+    body = order_payload((product.id, 1))
+
+    ada = client.post("/api/orders", json=body, headers={**user_headers("ada"), "Idempotency-Key": "k"})
+    bob = client.post("/api/orders", json=body, headers={**user_headers("bob"), "Idempotency-Key": "k"})
+
+    assert ada.status_code == bob.status_code == 201
+    assert bob.json()["id"] != ada.json()["id"]
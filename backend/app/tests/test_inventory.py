@@ -0,0 +1,61 @@
+"""Concurrent stock decrements never oversell."""
+import threading
+
+from app.core.exceptions import OutOfStockError
+from app.core.inventory import decrement_stock
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.product import Product
+
+
+def run_concurrently(threads: int, target) -> None:
+    """Run target(index) on several threads released at the same time."""
+    barrier = threading.Barrier(threads)
+
+    def run(index: int):
+        barrier.wait()
+        target(index)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def test_concurrent_decrements_sell_exactly_the_stock(db, make_product):
+    stock, threads, per_thread = 5, 16, 3
+    product = make_product(stock=stock)
+    sold = []
+
+    def buy(_: int):
+        for _ in range(per_thread):
+            with SessionLocal() as session:
+                try:
+                    decrement_stock(session, [(product.id, 1)])
+                    session.commit()
+                    sold.append(1)
+                except OutOfStockError:
+                    pass
+
+    run_concurrently(threads, buy)
+
+    db.refresh(product)
+    assert product.stock == 0
+    assert len(sold) == stock
+
+
+def test_concurrent_orders_never_oversell(client, db, make_product, order_payload):
+    stock, threads = 3, 12
+    product = make_product(stock=stock)
+    statuses = []
+
+    def order(index: int):
+        body = order_payload((product.id, 1), guest_email=f"buyer{index}@example.com")
+        statuses.append(client.post("/api/orders/guest", json=body).status_code)
+
+    run_concurrently(threads, order)
+
+    assert sorted(statuses) == [201] * stock + [400] * (threads - stock)
+    assert db.query(Order).count() == stock
+    assert db.query(Product.stock).filter(Product.id == product.id).scalar() == 0
@@ -0,0 +1,151 @@
+"""Order numbers: format, uniqueness, sequence rollover and clock steps."""
+import logging
+import multiprocessing
+import re
+import threading
+
+import pytest
+
+from app.core import order_numbers as module
+from app.core.order_numbers import (
+    ORDER_NUMBER_PREFIX,
+    PROCESS_BITS,
+    SEQUENCE_BITS,
+    WORKER_BITS,
+    OrderNumberGenerator,
+    order_numbers,
+)
+from app.models.order import Order
+
+FORMAT = re.compile(rf"^{ORDER_NUMBER_PREFIX}[0-9A-Z]{{16}}$")
+
+
+def decode(number: str) -> tuple[int, int, int, int]:
+    """Split an order number into (milliseconds, worker ID, process ID, sequence)."""
+    value = int(number[len(ORDER_NUMBER_PREFIX):], 36)
+    sequence = value & ((1 << SEQUENCE_BITS) - 1)
+    value >>= SEQUENCE_BITS
+    process_id = value & ((1 << PROCESS_BITS) - 1)
+    value >>= PROCESS_BITS
+    worker_id = value & ((1 << WORKER_BITS) - 1)
+    return value >> WORKER_BITS, worker_id, process_id, sequence
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances the clock."""
+
+    def __init__(self, seconds: float):
+        self.now = seconds
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.001)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(1_800_000_000.0)
+    monkeypatch.setattr(module, "time", fake)
+    return fake
+
+
+def generate_batch(count: int) -> list[str]:
+    """Generate numbers with the process-wide generator (also run in child processes)."""
+    return [order_numbers.generate() for _ in range(count)]
+
+
+def test_format_fits_the_order_number_column():
+    number = OrderNumberGenerator(worker_id=255).generate()
+
+    assert FORMAT.match(number)
+    assert len(number) <= Order.__table__.c.order_number.type.length
+    assert decode(number)[1] == 255
+
+
+def test_threads_get_unique_increasing_numbers():
+    threads, per_thread = 8, 5000
+    generator = OrderNumberGenerator(worker_id=1)
+    results = [None] * threads
+
+    def worker(index: int):
+        results[index] = [generator.generate() for _ in range(per_thread)]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    numbers = [number for batch in results for number in batch]
+    assert len(set(numbers)) == threads * per_thread
+    assert all(batch == sorted(batch) for batch in results)
+
+
+def test_sequence_rollover_waits_for_the_next_millisecond(clock):
+    generator = OrderNumberGenerator(worker_id=1)
+    per_ms = 1 << SEQUENCE_BITS
+
+    numbers = [generator.generate() for _ in range(per_ms + 1)]
+    decoded = [decode(number) for number in numbers]
+
+    assert len(set(numbers)) == per_ms + 1
+    assert numbers == sorted(numbers)
+    assert {ms for ms, *_ in decoded[:per_ms]} == {decoded[0][0]}
+    assert [sequence for *_, sequence in decoded[:per_ms]] == list(range(per_ms))
+    assert decoded[per_ms][0] == decoded[0][0] + 1
+    assert decoded[per_ms][3] == 0
+
+
+def test_clock_moving_backwards_keeps_numbers_increasing(clock):
+    generator = OrderNumberGenerator(worker_id=1)
+    before = [generator.generate() for _ in range(3)]
+
+    clock.now -= 5.0
+    after = [generator.generate() for _ in range(3)]
+
+    numbers = before + after
+    assert numbers == sorted(numbers)
+    assert len(set(numbers)) == len(numbers)
+    assert {decode(number)[0] for number in numbers} == {decode(before[0])[0]}
+
+
+def test_hosts_with_distinct_worker_ids_do_not_collide(clock):
+    hosts = [OrderNumberGenerator(worker_id=1), OrderNumberGenerator(worker_id=2)]
+
+    numbers = [host.generate() for _ in range(100) for host in hosts]
+
+    assert len(set(numbers)) == len(numbers)
+
+
+def test_worker_id_must_fit():
+    with pytest.raises(ValueError):
+        OrderNumberGenerator(worker_id=1 << WORKER_BITS)
+
+
+def test_hostname_worker_id_is_logged(caplog, monkeypatch):
+    monkeypatch.setattr(module.socket, "gethostname", lambda: "web-1")
+
+    with caplog.at_level(logging.WARNING, logger=module.__name__):
+        hashed = OrderNumberGenerator()
+        OrderNumberGenerator(worker_id=hashed.worker_id)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        f"ORDER_WORKER_ID is not set, using worker ID {hashed.worker_id} from the hostname 'web-1'; "
+        "set a distinct ORDER_WORKER_ID per host if more than one creates orders"
+    ]
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_processes_get_unique_numbers(start_method):
+    # Use the parent's generator first, so forked children inherit its state
+    order_numbers.generate()
+    processes, per_process = 4, 2000
+
+    with multiprocessing.get_context(start_method).Pool(processes) as pool:
+        batches = pool.map(generate_batch, [per_process] * processes)
+
+    numbers = [number for batch in batches for number in batch]
+    assert len(set(numbers)) == processes * per_process
+    assert len({decode(batch[0])[2] for batch in batches}) == processes
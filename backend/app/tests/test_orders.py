@@ -0,0 +1,61 @@
+"""Order history: keyset pagination boundaries."""
+import pytest
+
+from app.api.routes.orders import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def place_orders(client, make_product, order_payload):
+    """Factory placing n orders of one unit each for a user."""
+    def place(headers: dict[str, str], count: int) -> list[int]:
+        product = make_product(stock=count)
+        return [
+            client.post("/api/orders", headers=headers, json=order_payload((product.id, 1))).json()["id"]
+            for _ in range(count)
+        ]
+
+    return place
+
+
+@pytest.mark.parametrize("view", ["full", "summary"])
+def test_a_full_last_page_has_no_next_cursor(client, user_headers, place_orders, view):
+    alice = user_headers("alice")
+    place_orders(alice, 3)
+
+    response = client.get("/api/orders", headers=alice, params={"limit": 3, "view": view})
+
+    assert len(response.json()) == 3
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_cursor_walks_every_order_once_newest_first(client, user_headers, place_orders):
+    alice = user_headers("alice")
+    order_ids = place_orders(alice, 5)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/orders", headers=alice, params=params)
+        pages.append([order["id"] for order in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [order_id for page in pages for order_id in page] == order_ids[::-1]
+
+
+def test_orders_of_other_users_are_not_listed(client, user_headers, place_orders):
+    alice, bob = user_headers("alice"), user_headers("bob")
+    place_orders(alice, 2)
+
+    response = client.get("/api/orders", headers=bob, params={"limit": 1})
+
+    assert response.json() == []
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_malformed_cursor_is_rejected(client, user_headers):
+    response = client.get("/api/orders", headers=user_headers("alice"), params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -0,0 +1,107 @@
+"""Product listing queries are served by the indexes in app.core.product_query.
+
+Every supported filter/sort combination is planned with EXPLAIN QUERY PLAN
+against an in-memory SQLite database; a query must use its expected index and
+must not sort in a temporary B-tree.
+"""
+import re
+from datetime import datetime
+from itertools import product as combinations
+
+import pytest
+from sqlalchemy import create_engine, inspect, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.product_query import SORT_FIELDS, ProductFilters, filter_products, sort_products
+from app.core.search import install_search_index
+from app.database import Base, engine, init_db
+from app.models.product import Product
+
+# Sample keyset position for each sort field
+CURSOR_POSITIONS = {
+    "price": 99.99,
+    "name": "Travel Pillow",
+    "created_at": datetime(2026, 1, 1),
+}
+
+CASES = list(combinations([None, "luggage"], [False, True], SORT_FIELDS, [False, True], [False, True]))
+
+
+@pytest.fixture(scope="module")
+def plan_db():
+    """Session on an in-memory database with only the products table and its indexes."""
+    plan_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=plan_engine, tables=[Product.__table__])
+    install_search_index(plan_engine)
+    with Session(plan_engine) as session:
+        yield session
+    plan_engine.dispose()
+
+
+def explain(db: Session, query) -> str:
+    """Return the EXPLAIN QUERY PLAN output of an ORM query as one string."""
+    sql = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def expected_plans(filters: ProductFilters, sort_by: str) -> dict[str, bool]:
+    """
+    Acceptable plans for a filter/sort combination.
+
+    Returns:
+        Mapping of index name to whether a temp B-tree sort is acceptable with it
+    """
+    prefix = "ix_products_category_" if filters.category else "ix_products_"
+    plans = {f"{prefix}{sort_by}_id": False}
+
+    # A price range with another sort key may instead be served by a range scan
+    # on the price index followed by a sort of the (bounded) matching rows
+    if filters.min_price is not None and sort_by != "price":
+        plans[f"{prefix}price_id"] = True
+
+    return plans
+
+
+@pytest.mark.parametrize(
+    "category, price_range, sort_by, descending, keyset",
+    CASES,
+    ids=[
+        f"{category or 'all'}-{'range' if price_range else 'any'}-{sort_by}-"
+        f"{'desc' if descending else 'asc'}-{'keyset' if keyset else 'offset'}"
+        for category, price_range, sort_by, descending, keyset in CASES
+    ],
+)
+def test_listing_uses_its_index(plan_db, category, price_range, sort_by, descending, keyset):
+    filters = ProductFilters(
+        category=category,
+        min_price=10.0 if price_range else None,
+        max_price=500.0 if price_range else None,
+    )
+    query, relevance = filter_products(plan_db, filters)
+    query = sort_products(query, sort_by, descending, relevance)
+    if keyset:
+        sort_key = tuple_(SORT_FIELDS[sort_by], Product.id)
+        position = (CURSOR_POSITIONS[sort_by], 100)
+        query = query.filter(sort_key < position if descending else sort_key > position)
+    else:
+        query = query.offset(24)
+
+    plans = expected_plans(filters, sort_by)
+    plan = explain(plan_db, query.limit(13))
+    used = [index for index in plans if re.search(rf"USING (COVERING )?INDEX {index}\b", plan)]
+
+    assert used, f"does not use {' or '.join(plans)}:\n{plan}"
+    assert plans[used[0]] or "TEMP B-TREE" not in plan, f"sorts in a temp B-tree:\n{plan}"
+
+
+def test_superseded_single_column_indexes_are_dropped():
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_category ON products (category)"))
+
+    init_db()
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("products")}
+    assert not indexes & {"ix_products_name", "ix_products_category"}
+    assert {"ix_products_name_id", "ix_products_category_name_id"} <= indexes
@@ -0,0 +1,149 @@
+"""Stock reservations: ownership, per-caller limits, conversion into orders and concurrent holds."""
+import threading
+
+import pytest
+
+from app.config import settings
+from app.core.exceptions import OutOfStockError
+from app.core.reservations import create_reservation, held_quantities
+from app.core.security import create_cart_token, create_service_token
+from app.database import SessionLocal
+
+
+def guest_headers() -> dict[str, str]:
+    return {"X-Cart-Token": create_cart_token()[1]}
+
+
+def reserve(client, headers, *items):
+    return client.post("/api/reservations", headers=headers,
+                       json={"items": [{"product_id": product_id, "quantity": quantity}
+                                       for product_id, quantity in items]})
+
+
+def test_only_the_owner_can_release_a_reservation(client, db, make_product, user_headers):
+    product = make_product(stock=5)
+    alice, bob = user_headers("alice"), user_headers("bob")
+    reservation_id = reserve(client, alice, (product.id, 2)).json()["reservation_id"]
+
+    assert client.delete(f"/api/reservations/{reservation_id}", headers=bob).status_code == 404
+    assert client.delete(f"/api/reservations/{reservation_id}", headers=guest_headers()).status_code == 404
+    assert held_quantities(db, [product.id]) == {product.id: 2}
+
+    assert client.delete(f"/api/reservations/{reservation_id}", headers=alice).status_code == 204
+    assert held_quantities(db, [product.id]) == {}
+
+
+def test_guest_releases_with_its_cart_token(client, db, make_product):
+    product = make_product(stock=5)
+    guest = guest_headers()
+    reservation_id = reserve(client, guest, (product.id, 1)).json()["reservation_id"]
+
+    assert client.delete(f"/api/reservations/{reservation_id}", headers=guest).status_code == 204
+    assert held_quantities(db, [product.id]) == {}
+
+
+def test_a_new_reservation_replaces_the_previous_one(client, db, make_product, user_headers):
+    product = make_product(stock=50)
+    alice = user_headers("alice")
+
+    for _ in range(3):
+        assert reserve(client, alice, (product.id, 4)).status_code == 201
+
+    assert held_quantities(db, [product.id]) == {product.id: 4}
+
+
+def test_quantities_are_capped_per_product_and_per_caller(client, db, make_product, user_headers):
+    products = [make_product(stock=100, name=f"Product {i}") for i in range(6)]
+    alice = user_headers("alice")
+
+    too_many_of_one = reserve(client, alice, (products[0].id, settings.STOCK_HOLD_MAX_PER_PRODUCT + 1))
+    too_many_in_total = reserve(client, alice, *[(product.id, settings.STOCK_HOLD_MAX_PER_PRODUCT)
+                                                 for product in products])
+
+    assert too_many_of_one.status_code == too_many_in_total.status_code == 400
+    assert held_quantities(db, [product.id for product in products]) == {}
+
+
+def test_checkout_service_reservations_are_not_capped(client, db, make_product, user_headers):
+    product = make_product(stock=100)
+    quantity = settings.STOCK_HOLD_MAX_PER_OWNER + 1
+    checkout = {**user_headers("alice"), "X-Service-Token": create_service_token("checkout")}
+    forged = {**user_headers("bob"), "X-Service-Token": create_service_token("other")}
+
+    assert reserve(client, forged, (product.id, quantity)).status_code == 400
+    assert reserve(client, checkout, (product.id, quantity)).status_code == 201
+    assert held_quantities(db, [product.id]) == {product.id: quantity}
+
+
+def test_order_converts_only_the_callers_reservation(client, db, make_product, user_headers, order_payload):
+    product = make_product(stock=3)
+    alice, bob = user_headers("alice"), user_headers("bob")
+    reservation_id = reserve(client, alice, (product.id, 2)).json()["reservation_id"]
+
+    # Bob can't use Alice's held units
+    stolen = client.post("/api/orders", headers=bob,
+                         json=order_payload((product.id, 2), reservation_id=reservation_id))
+    converted = client.post("/api/orders", headers=alice,
+                            json=order_payload((product.id, 2), reservation_id=reservation_id))
+
+    assert stolen.status_code == 400
+    assert converted.status_code == 201
+    assert held_quantities(db, [product.id]) == {}
+
+
+def test_guest_order_converts_the_reservation_of_its_cart_token(client, db, make_product, order_payload):
+    product = make_product(stock=2)
+    guest = guest_headers()
+    reservation_id = reserve(client, guest, (product.id, 2)).json()["reservation_id"]
+
+    response = client.post("/api/orders/guest", headers=guest,
+                           json=order_payload((product.id, 2), guest_email="ada@example.com",
+                                              reservation_id=reservation_id))
+
+    assert response.status_code == 201
+    assert held_quantities(db, [product.id]) == {}
+    db.refresh(product)
+    assert product.stock == 0
+
+
+def test_reservation_is_all_or_nothing(client, db, make_product, user_headers):
+    plenty, scarce = make_product(stock=10, name="Plenty"), make_product(stock=1, name="Scarce")
+
+    response = reserve(client, user_headers("alice"), (plenty.id, 2), (scarce.id, 2))
+
+    assert response.status_code == 400
+    assert "Scarce" in response.json()["detail"]
+    assert held_quantities(db, [plenty.id, scarce.id]) == {}
+
+
+def test_concurrent_reservations_never_hold_more_than_the_stock(make_product):
+    stock, threads = 7, 16
+    product = make_product(stock=stock)
+    barrier = threading.Barrier(threads)
+    held = []
+
+    def reserve_one(owner: int):
+        with SessionLocal() as session:
+            barrier.wait()
+            try:
+                create_reservation(session, f"guest:{owner}", [(product.id, 1)])
+                session.commit()
+                held.append(owner)
+            except OutOfStockError:
+                pass
+
+    workers = [threading.Thread(target=reserve_one, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with SessionLocal() as session:
+        assert held_quantities(session, [product.id]) == {product.id: stock}
+    assert len(held) == stock
+
+
+@pytest.mark.parametrize("quantity", [0, -1])
+def test_quantities_must_be_positive(client, make_product, quantity):
+    product = make_product()
+    assert reserve(client, guest_headers(), (product.id, quantity)).status_code == 422
@@ -0,0 +1,73 @@
+"""Full-text product search: prefix and stemmed matches, relevance order and index sync."""
+import pytest
+from sqlalchemy import text
+
+from app.core.catalog import publish_products_changed
+from app.core.product_query import ProductFilters, filter_products, sort_products
+from app.core.search import FTS_TABLE, _indexed_dialects
+
+
+@pytest.fixture(autouse=True)
+def require_fts5():
+    if "sqlite" not in _indexed_dialects:
+        pytest.skip("SQLite was built without FTS5")
+
+
+def search(client, query, **params):
+    response = client.get("/api/products", params={"search": query, **params})
+    assert response.status_code == 200
+    return [product["name"] for product in response.json()["products"]]
+
+
+def indexed_names(db, search_text):
+    """Names of the products the index matches, bypassing the listing cache."""
+    query, relevance = filter_products(db, ProductFilters(search=search_text))
+    return [product.name for product in sort_products(query, "relevance", False, relevance)]
+
+
+def test_tokens_match_as_prefixes(client, make_product):
+    make_product(name="Travelling Pillow")
+    make_product(name="Packing Cubes")
+
+    assert search(client, "travel pil") == ["Travelling Pillow"]
+    assert search(client, "PACK") == ["Packing Cubes"]
+    assert search(client, "pillows cubes") == []
+
+
+def test_words_match_their_stems(client, make_product):
+    make_product(name="Running Shoes")
+    make_product(name="Hiking Boots")
+
+    assert search(client, "runs") == ["Running Shoes"]
+    assert search(client, "hiked boot") == ["Hiking Boots"]
+
+
+def test_name_hits_rank_above_description_hits(client, db, make_product):
+    description_hit = make_product(name="Daypack")
+    make_product(name="Waterproof Jacket")
+    description_hit.description = "A light daypack with a waterproof cover"
+    db.commit()
+    publish_products_changed()
+
+    assert search(client, "waterproof") == ["Waterproof Jacket", "Daypack"]
+    assert search(client, "waterproof", sort_by="name", sort_order="asc") == ["Daypack", "Waterproof Jacket"]
+
+
+def test_index_follows_product_updates_and_deletes(db, make_product):
+    product = make_product(name="Canvas Tote")
+    assert indexed_names(db, "canvas") == ["Canvas Tote"]
+
+    product.name = "Leather Tote"
+    db.commit()
+    assert indexed_names(db, "canvas") == []
+    assert indexed_names(db, "leather") == ["Leather Tote"]
+
+    product.description = "Fits a laptop"
+    db.commit()
+    assert indexed_names(db, "laptop") == ["Leather Tote"]
+
+    db.delete(product)
+    db.commit()
+    # Deleted rows would be dropped by the join to products, so ask the index itself
+    matched = db.execute(text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'leather'")).all()
+    assert matched == []
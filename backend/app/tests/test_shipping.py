@@ -0,0 +1,34 @@
+"""Shipping and tax quotes agree with cart pricing."""
+from app.models.promo_code import PromoCode
+
+
+def test_quote_matches_the_cart_totals(client, db, make_product):
+    db.add(PromoCode(code="SAVE10", discount_percentage=10))
+    db.commit()
+    product = make_product(stock=5, price=40.0)
+    cart = client.post("/api/cart/items", json={"product_id": product.id, "quantity": 1})
+    totals = client.get("/api/cart", params={"zip_code": "94105", "promo_code": "SAVE10"},
+                        headers={"X-Cart-Token": cart.headers["X-Cart-Token"]}).json()["totals"]
+
+    quote = client.post("/api/shipping/calculate",
+                        json={"zip_code": "94105", "subtotal": 40.0, "promo_code": "save10"}).json()
+
+    assert quote["discount_amount"] == totals["discount_amount"] == 4.0
+    # Tax applies to the discounted subtotal: 7.25% of 36.00
+    assert quote["tax_amount"] == totals["tax_amount"] == 2.61
+    assert quote["total"] == totals["total_amount"] == 40.0 - 4.0 + 5.99 + 2.61
+
+
+def test_quote_without_promo_code(client):
+    quote = client.post("/api/shipping/calculate", json={"zip_code": "10001", "subtotal": 60.0}).json()
+
+    assert quote["state"] == "NY"
+    assert quote["discount_amount"] == 0.0
+    assert quote["shipping_cost"] == quote["shipping_amount"] == 0.0
+    assert quote["total"] == round(60.0 + quote["tax_amount"], 2)
+
+
+def test_invalid_zip_and_promo_code_are_rejected(client):
+    assert client.post("/api/shipping/calculate", json={"zip_code": "00000", "subtotal": 10.0}).status_code == 400
+    assert client.post("/api/shipping/calculate",
+                       json={"zip_code": "94105", "subtotal": 10.0, "promo_code": "NOPE"}).status_code == 400
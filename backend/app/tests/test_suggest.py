@@ -0,0 +1,65 @@
+"""Product name suggestions follow writes made in and outside this process."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core import catalog
+from app.database import engine
+
+
+def write_from_another_process(sql: str, **params):
+    """Change products without this process's change tracking, then let the validator TTL pass."""
+    with engine.begin() as conn:
+        conn.execute(text(sql), params)
+    catalog._validators.clear()
+
+
+def suggest(client, q: str) -> list[str]:
+    return [suggestion["name"] for suggestion in client.get("/api/products/suggest", params={"q": q}).json()["suggestions"]]
+
+
+def test_prefix_of_any_word_matches(client, make_product):
+    make_product(name="Carry-On Spinner")
+    make_product(name="Packing Cubes")
+
+    assert suggest(client, "spin") == ["Carry-On Spinner"]
+    assert suggest(client, "carry sp") == ["Carry-On Spinner"]
+    assert suggest(client, "cubes sp") == []
+
+
+def test_writes_in_this_process_are_picked_up(client, db, make_product):
+    product = make_product(name="Travel Pillow")
+    assert suggest(client, "pill") == ["Travel Pillow"]
+
+    product.name = "Travel Blanket"
+    db.commit()
+    make_product(name="Pillowcase")
+
+    assert suggest(client, "pill") == ["Pillowcase"]
+    assert suggest(client, "blank") == ["Travel Blanket"]
+
+
+def test_rename_by_another_process_is_picked_up(client, make_product):
+    product = make_product(name="Travel Pillow")
+    assert suggest(client, "pill") == ["Travel Pillow"]
+
+    write_from_another_process("UPDATE products SET name = 'Travel Blanket', updated_at = :now WHERE id = :id",
+                               now=datetime.utcnow() + timedelta(seconds=1), id=product.id)
+
+    assert suggest(client, "pill") == []
+    assert suggest(client, "blank") == ["Travel Blanket"]
+
+
+def test_insert_and_delete_by_another_process_are_picked_up(client, make_product):
+    removed = make_product(name="Luggage Tag")
+    assert suggest(client, "lug") == ["Luggage Tag"]
+
+    write_from_another_process("DELETE FROM products WHERE id = :id", id=removed.id)
+    assert suggest(client, "lug") == []
+
+    write_from_another_process(
+        "INSERT INTO products (name, description, price, category, image_url, stock, created_at, updated_at) "
+        "VALUES ('Luggage Scale', '', 15.0, 'accessories', '', 5, :now, :now)",
+        now=datetime.utcnow() + timedelta(seconds=2),
+    )
+    assert suggest(client, "lug") == ["Luggage Scale"]
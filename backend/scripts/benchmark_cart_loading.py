@@ -0,0 +1,126 @@
+"""Benchmark cart loading: chained joinedloads vs the shared selectin cart loader.
+
+For each cart size, a cart with N items and N saved items is loaded both ways
+against a temporary SQLite database. Reports the statements issued, the rows
+they return and the load time.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cart_store import load_cart
+from app.database import Base
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.models.saved_item import SavedItem
+from app.models.user import User
+
+ROUNDS = 20
+
+
+def joined_load(db: Session, cart_id: int) -> Cart:
+    """Cart reload as previously copy-pasted into every cart route."""
+    return db.query(Cart)\
+        .filter(Cart.id == cart_id)\
+        .options(
+            joinedload(Cart.items).joinedload(CartItem.product),
+            joinedload(Cart.saved_items).joinedload(SavedItem.product)
+        )\
+        .first()
+
+
+class StatementLog:
+    """Records the statements executed on an engine, to replay them for row counts."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def rows(self) -> int:
+        """Replay the recorded statements on a raw connection and count returned rows."""
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            return sum(len(cursor.execute(statement, parameters).fetchall())
+                       for statement, parameters in self.statements)
+        finally:
+            connection.close()
+
+
+def populate(engine, size: int) -> int:
+    """Create a cart with `size` items and `size` saved items; return its id."""
+    with Session(engine) as db:
+        products = [
+            Product(name=f"Product {i}", description="Benchmark product " * 20, price=10.0 + i,
+                    category="bags", image_url="https://example.com/p.png", stock=100)
+            for i in range(size * 2)
+        ]
+        user = User(username="shopper", email="shopper@example.com", hashed_password="x")
+        db.add_all([*products, user])
+        db.flush()
+
+        cart = Cart(user_id=user.id)
+        cart.items = [CartItem(product_id=product.id, quantity=1) for product in products[:size]]
+        cart.saved_items = [SavedItem(product_id=product.id, quantity=1) for product in products[size:]]
+        db.add(cart)
+        db.commit()
+        return cart.id
+
+
+def measure(engine, cart_id: int, loader) -> tuple[int, int, float]:
+    """
+    Load the cart ROUNDS times with fresh sessions.
+
+    Returns:
+        Tuple of (statements, rows, milliseconds) per load
+    """
+    log = StatementLog(engine)
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        log.statements.clear()
+        with Session(engine) as db:
+            start = time.perf_counter()
+            cart = loader(db, cart_id)
+            # Touch every relationship so lazy loads would be counted
+            for item in [*cart.items, *cart.saved_items]:
+                item.product.name
+            elapsed += time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", log._record)
+    return len(log.statements), log.rows(), elapsed * 1000 / ROUNDS
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 30, 100],
+                        help="Numbers of items (and saved items) per cart")
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'loader':<8} {'statements':>10} {'rows':>8} {'ms':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            cart_id = populate(engine, size)
+
+            for label, loader in [("joined", joined_load), ("selectin", load_cart)]:
+                statements, rows, ms = measure(engine, cart_id, loader)
+                print(f"{size:>5} {label:<8} {statements:>10} {rows:>8} {ms:>8.2f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
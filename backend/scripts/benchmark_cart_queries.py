@@ -0,0 +1,189 @@
+"""Count database round trips per cart mutation: legacy read-check-write path vs upserts.
+
+Runs each scenario against a temporary SQLite database and reports the SQL
+statements and commits issued per request, including the cart reload that
+every mutation returns.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+# Add parent directory to path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, joinedload
+
+from app.api.deps import CartOwner
+from app.api.routes import cart as cart_routes
+from app.core.exceptions import OutOfStockError
+from app.database import Base
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.models.saved_item import SavedItem
+from app.models.user import User
+from app.schemas.cart import CartItemCreate, CartItemUpdate
+
+ROUNDS = 200
+
+
+def legacy_get_or_create_cart(db: Session, user: User) -> Cart:
+    """Cart lookup as implemented before the upsert path (commits on creation)."""
+    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+    if not cart:
+        cart = Cart(user_id=user.id)
+        db.add(cart)
+        db.commit()
+        db.refresh(cart)
+    return cart
+
+
+def legacy_reload(db: Session, cart_id: int) -> Cart:
+    """Cart reload as implemented before the upsert path."""
+    return db.query(Cart)\
+        .filter(Cart.id == cart_id)\
+        .options(
+            joinedload(Cart.items).joinedload(CartItem.product),
+            joinedload(Cart.saved_items).joinedload(SavedItem.product)
+        )\
+        .first()
+
+
+def legacy_add_to_cart(item_data: CartItemCreate, user: User, since: Optional[int], db: Session) -> Cart:
+    """add_to_cart as implemented before the upsert path."""
+    cart = legacy_get_or_create_cart(db, user)
+    product = db.query(Product).filter(Product.id == item_data.product_id).first()
+    if not product:
+        raise OutOfStockError("Product not found")
+
+    existing_item = db.query(CartItem)\
+        .filter(CartItem.cart_id == cart.id, CartItem.product_id == item_data.product_id)\
+        .first()
+    if existing_item:
+        new_quantity = existing_item.quantity + item_data.quantity
+        if new_quantity > product.stock:
+            raise OutOfStockError(f"Only {product.stock} units available")
+        existing_item.quantity = new_quantity
+    else:
+        if item_data.quantity > product.stock:
+            raise OutOfStockError(f"Only {product.stock} units available")
+        db.add(CartItem(cart_id=cart.id, product_id=item_data.product_id, quantity=item_data.quantity))
+
+    db.commit()
+    return legacy_reload(db, cart.id)
+
+
+def legacy_update_cart_item(item_id: int, item_data: CartItemUpdate, user: User, since: Optional[int], db: Session) -> Cart:
+    """update_cart_item as implemented before the upsert path."""
+    cart = legacy_get_or_create_cart(db, user)
+    cart_item = db.query(CartItem)\
+        .filter(CartItem.id == item_id, CartItem.cart_id == cart.id)\
+        .first()
+    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+    if item_data.quantity > product.stock:
+        raise OutOfStockError(f"Only {product.stock} units available")
+    cart_item.quantity = item_data.quantity
+    db.commit()
+    return legacy_reload(db, cart.id)
+
+
+class RoundTripCounter:
+    """Counts statements executed on an engine and commits issued by sessions."""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_statement)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_statement(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def run_scenarios(engine, counter: RoundTripCounter, add, update) -> dict[str, tuple[float, float, float]]:
+    """
+    Run each cart scenario ROUNDS times with fresh users.
+
+    Returns:
+        Mapping of scenario name to (statements, commits, milliseconds) per request
+    """
+    with Session(engine) as db:
+        users = [User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(ROUNDS)]
+        db.add_all(users)
+        db.commit()
+        user_ids = [user.id for user in users]
+
+    def measure(step) -> tuple[float, float, float]:
+        counter.reset()
+        elapsed = 0.0
+        for user_id in user_ids:
+            with Session(engine) as db:
+                user = db.get(User, user_id)
+                counter.statements -= 1  # the user lookup done by the auth dependency
+                start = time.perf_counter()
+                step(db, user)
+                elapsed += time.perf_counter() - start
+        return counter.statements / ROUNDS, counter.commits / ROUNDS, elapsed * 1000 / ROUNDS
+
+    def item_id(db: Session, user: User) -> int:
+        return db.query(CartItem.id).join(Cart).filter(Cart.user_id == user.id).first()[0]
+
+    results = {}
+    results["add (new cart)"] = measure(lambda db, user: add(CartItemCreate(product_id=1, quantity=1), user, since=None, db=db))
+    results["add (new item)"] = measure(lambda db, user: add(CartItemCreate(product_id=2, quantity=1), user, since=None, db=db))
+    results["add (increment)"] = measure(lambda db, user: add(CartItemCreate(product_id=2, quantity=1), user, since=None, db=db))
+
+    def update_step(db: Session, user: User):
+        target = item_id(db, user)
+        counter.statements -= 1  # item id lookup is setup, not part of the request
+        update(target, CartItemUpdate(quantity=3), user, since=None, db=db)
+
+    results["update quantity"] = measure(update_step)
+    return results
+
+
+def main():
+    """Main function to run the benchmark."""
+    rows = {}
+    for label, add, update in [
+        ("legacy", legacy_add_to_cart, legacy_update_cart_item),
+        ("upsert",
+         lambda item_data, user, since, db: cart_routes.add_to_cart(item_data, CartOwner(user=user), since=since, db=db),
+         lambda item_id, item_data, user, since, db: cart_routes.update_cart_item(
+             item_id, item_data, CartOwner(user=user), since=since, db=db)),
+    ]:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            with Session(engine) as db:
+                db.add_all(
+                    Product(name=f"Product {i}", description="Benchmark product", price=10.0,
+                            category="bags", image_url="https://example.com/p.png", stock=1000)
+                    for i in range(1, 3)
+                )
+                db.commit()
+
+            counter = RoundTripCounter(engine)
+            for scenario, measured in run_scenarios(engine, counter, add, update).items():
+                rows.setdefault(scenario, {})[label] = measured
+            engine.dispose()
+
+    print(f"{'scenario':<18} {'legacy stmts':>12} {'upsert stmts':>12} {'legacy commits':>14} "
+          f"{'upsert commits':>14} {'legacy ms':>10} {'upsert ms':>10}")
+    for scenario, measured in rows.items():
+        (ls, lc, lt), (us, uc, ut) = measured["legacy"], measured["upsert"]
+        print(f"{scenario:<18} {ls:>12.1f} {us:>12.1f} {lc:>14.1f} {uc:>14.1f} {lt:>10.2f} {ut:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark full-text product search against the legacy ILIKE scan."""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.core.search import apply_search, ilike_search_filter, install_search_index
+from app.database import Base
+from app.models.product import Product, ProductCategory
+
+WORDS = [
+    "rolling", "hardside", "spinner", "carry-on", "duffel", "backpack", "leather", "weekender",
+    "packing", "cubes", "compression", "toiletry", "organizer", "passport", "wallet", "travel",
+    "pillow", "adapter", "charger", "laptop", "sleeve", "waterproof", "lightweight", "expandable",
+    "anti-theft", "neck", "eye", "mask", "luggage", "tag", "scale", "lock", "bottle", "foldable",
+    "camera", "sling", "messenger", "tote", "garment", "bag", "cable", "power", "bank", "desk",
+]
+
+QUERIES = ["backpack", "leather wallet", "travel pil", "waterproof laptop sleeve", "cubes"]
+
+BATCH_SIZE = 10_000
+
+
+def populate(engine, size: int) -> None:
+    """Insert `size` synthetic products in batches."""
+    rnd = random.Random(size)
+    categories = [category.value for category in ProductCategory]
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        for start in range(0, size, BATCH_SIZE):
+            rows = []
+            for _ in range(min(BATCH_SIZE, size - start)):
+                rows.append({
+                    "name": " ".join(rnd.sample(WORDS, 3)).title(),
+                    "description": " ".join(rnd.choices(WORDS, k=25)),
+                    "price": round(rnd.uniform(5, 500), 2),
+                    "category": rnd.choice(categories),
+                    "image_url": "https://example.com/product.jpg",
+                    "stock": rnd.randint(0, 100),
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            conn.execute(insert(Product), rows)
+
+
+def time_query(db: Session, search: str, use_index: bool, repeat: int, page_size: int) -> float:
+    """Return the mean wall time in ms of a count plus first page for `search`."""
+    elapsed = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query = db.query(Product)
+        if use_index:
+            query, relevance = apply_search(query, search)
+            query.count()
+            query.order_by(relevance, Product.id).limit(page_size).all()
+        else:
+            query = query.filter(ilike_search_filter(search))
+            query.count()
+            query.order_by(Product.created_at.desc()).limit(page_size).all()
+        elapsed += time.perf_counter() - start
+        db.expunge_all()
+    return elapsed / repeat * 1000
+
+
+def run(size: int, repeat: int, page_size: int) -> None:
+    """Build a database with `size` products and print timings for both paths."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine, tables=[Product.__table__])
+        install_search_index(engine)
+
+        build_start = time.perf_counter()
+        populate(engine, size)
+        print(f"\n{size:,} products (built in {time.perf_counter() - build_start:.1f}s)")
+        print(f"  {'query':<28}{'ILIKE ms':>12}{'FTS ms':>12}{'speedup':>10}")
+
+        with Session(engine) as db:
+            for search in QUERIES:
+                ilike_ms = time_query(db, search, False, repeat, page_size)
+                fts_ms = time_query(db, search, True, repeat, page_size)
+                print(f"  {search:<28}{ilike_ms:>12.2f}{fts_ms:>12.2f}{ilike_ms / fts_ms:>9.1f}x")
+
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+def main():
+    """Main function to run the search benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Catalog sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query")
+    parser.add_argument("--page-size", type=int, default=12, help="Rows fetched per query")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeat, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
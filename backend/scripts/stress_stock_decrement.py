@@ -0,0 +1,152 @@
+"""Stress the order stock decrement on one hot product from many threads.
+
+Each thread repeatedly takes one unit of the same product, in its own
+transaction, until the product sells out. Runs the legacy read-check-write
+path and the guarded UPDATE of app.core.inventory.decrement_stock, and
+reports units sold, final stock and units oversold for each. Part of the
+stock is held by an open reservation, which must never be sold.
+
+Runs against a temporary SQLite database by default. Pass --database-url to
+run against another database (e.g. PostgreSQL, where the legacy path loses
+updates); the script only touches the product and hold it creates.
+
+Exit status is 1 if the guarded path oversold or lost an update.
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import OutOfStockError
+from app.core.inventory import decrement_stock
+from app.database import Base
+from app.models.product import Product
+from app.models.stock_hold import StockHold
+
+THREADS = 32
+STOCK = 200
+HELD = 20
+
+
+def legacy_decrement(db: Session, product_id: int) -> None:
+    """Stock decrement as implemented before the guarded UPDATE (ignores holds)."""
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if product.stock < 1:
+        raise OutOfStockError()
+    product.stock -= 1
+
+
+def guarded_decrement(db: Session, product_id: int) -> None:
+    """Stock decrement as done by create_order."""
+    decrement_stock(db, [(product_id, 1)])
+
+
+def hammer(engine, product_id: int, decrement) -> tuple[Counter, float]:
+    """
+    Take units from THREADS threads until every thread sees the product sold out.
+
+    Returns:
+        Tuple of (outcome counts, elapsed seconds)
+    """
+    outcomes = Counter()
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(THREADS)
+
+    def worker():
+        start_barrier.wait()
+        while True:
+            with Session(engine) as db:
+                try:
+                    decrement(db, product_id)
+                    db.commit()
+                    outcome = "sold"
+                except OutOfStockError:
+                    outcome = "sold out"
+                except OperationalError:
+                    # Lock timeouts and serialization failures; retry
+                    db.rollback()
+                    outcome = "retried"
+            with lock:
+                outcomes[outcome] += 1
+            if outcome == "sold out":
+                return
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, time.perf_counter() - start
+
+
+def run(database_url: str, label: str, decrement) -> dict:
+    """Create a hot product with a hold, hammer it and clean up."""
+    engine = create_engine(database_url, connect_args={"timeout": 30} if database_url.startswith("sqlite") else {})
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        product = Product(name=f"Stress {label}", description="Stress test product", price=10.0,
+                          category="bags", image_url="https://example.com/p.png", stock=STOCK)
+        db.add(product)
+        db.flush()
+        db.add(StockHold(reservation_id=f"stress-{label}", product_id=product.id, quantity=HELD,
+                         expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.commit()
+        product_id = product.id
+
+    outcomes, elapsed = hammer(engine, product_id, decrement)
+
+    with Session(engine) as db:
+        final_stock = db.get(Product, product_id).stock
+        db.query(StockHold).filter(StockHold.product_id == product_id).delete()
+        db.query(Product).filter(Product.id == product_id).delete()
+        db.commit()
+    engine.dispose()
+
+    return {
+        "sold": outcomes["sold"],
+        "retried": outcomes["retried"],
+        "final stock": final_stock,
+        # Units sold beyond the unheld stock, or decrements lost to concurrent writes
+        "oversold": max(outcomes["sold"] - (STOCK - HELD), 0),
+        "lost updates": (STOCK - final_stock) != outcomes["sold"],
+        "seconds": elapsed,
+    }
+
+
+def main():
+    """Main function to run the stress test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to run against (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    print(f"{THREADS} threads, stock {STOCK}, {HELD} held by a reservation")
+    print(f"{'path':<8} {'sold':>6} {'retried':>8} {'final stock':>12} {'oversold':>9} {'lost updates':>13} {'seconds':>8}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/stress.db"
+        for label, decrement in [("legacy", legacy_decrement), ("guarded", guarded_decrement)]:
+            result = results[label] = run(database_url, label, decrement)
+            print(f"{label:<8} {result['sold']:>6} {result['retried']:>8} {result['final stock']:>12} "
+                  f"{result['oversold']:>9} {str(result['lost updates']):>13} {result['seconds']:>8.2f}")
+
+    guarded = results["guarded"]
+    if guarded["oversold"] or guarded["lost updates"] or guarded["final stock"] != HELD:
+        print("FAIL: guarded decrement oversold or lost updates")
+        sys.exit(1)
+    print("OK: guarded decrement sold exactly the unheld stock")
+
+
+if __name__ == "__main__":
+    main()
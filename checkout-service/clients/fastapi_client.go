@@ -3,24 +3,38 @@ package clients
 import (
 	"bytes"
 	"checkout-service/models"
+	"crypto/hmac"
+	"crypto/sha256"
+	"encoding/base64"
 	"encoding/json"
 	"fmt"
 	"io"
 	"net/http"
+	"time"
 )
 
 type FastAPIClient struct {
-	baseURL string
-	client  *http.Client
+	baseURL      string
+	client       *http.Client
+	serviceToken string
 }
 
-func NewFastAPIClient(baseURL string) *FastAPIClient {
+func NewFastAPIClient(baseURL string, secretKey string) *FastAPIClient {
 	return &FastAPIClient{
-		baseURL: baseURL,
-		client:  &http.Client{},
+		baseURL:      baseURL,
+		client:       &http.Client{},
+		serviceToken: serviceToken(secretKey, "checkout"),
 	}
 }
 
+// serviceToken derives the token identifying this service to the API, the
+// same way the API does (app.core.security.create_service_token).
+func serviceToken(secretKey string, service string) string {
+	mac := hmac.New(sha256.New, []byte(secretKey))
+	mac.Write([]byte("service:" + service))
+	return base64.RawURLEncoding.EncodeToString(mac.Sum(nil))
+}
+
 func (c *FastAPIClient) GetProduct(productID int) (*models.Product, error) {
 	url := fmt.Sprintf("%s/api/products/%d", c.baseURL, productID)
 
@@ -43,65 +57,128 @@ func (c *FastAPIClient) GetProduct(productID int) (*models.Product, error) {
 	return &product, nil
 }
 
-func (c *FastAPIClient) CreateOrder(orderReq models.OrderCreateRequest, token string) (*models.OrderResponse, error) {
-	url := fmt.Sprintf("%s/api/orders", c.baseURL)
+// Reservations belong to the caller: the user of token, or else a new guest
+// whose cart token is returned on the reservation for releasing or
+// converting it. The service token exempts them from the per-caller caps.
+func (c *FastAPIClient) CreateReservation(reservationReq models.ReservationRequest, token string) (*models.Reservation, error) {
+	url := fmt.Sprintf("%s/api/reservations", c.baseURL)
 
-	jsonData, err := json.Marshal(orderReq)
+	jsonData, err := json.Marshal(reservationReq)
 	if err != nil {
-		return nil, fmt.Errorf("failed to marshal order: %w", err)
+		return nil, fmt.Errorf("failed to marshal reservation: %w", err)
 	}
 
 	req, err := http.NewRequest("POST", url, bytes.NewBuffer(jsonData))
 	if err != nil {
 		return nil, fmt.Errorf("failed to create request: %w", err)
 	}
-
 	req.Header.Set("Content-Type", "application/json")
-	req.Header.Set("Authorization", fmt.Sprintf("Bearer %s", token))
+	req.Header.Set("X-Service-Token", c.serviceToken)
+	if token != "" {
+		req.Header.Set("Authorization", fmt.Sprintf("Bearer %s", token))
+	}
 
 	resp, err := c.client.Do(req)
 	if err != nil {
-		return nil, fmt.Errorf("failed to create order: %w", err)
+		return nil, fmt.Errorf("failed to reserve stock: %w", err)
 	}
 	defer resp.Body.Close()
 
 	if resp.StatusCode != http.StatusCreated {
 		body, _ := io.ReadAll(resp.Body)
-		return nil, fmt.Errorf("failed to create order: status %d, body: %s", resp.StatusCode, string(body))
+		return nil, fmt.Errorf("failed to reserve stock: status %d, body: %s", resp.StatusCode, string(body))
 	}
 
-	var orderResp models.OrderResponse
-	if err := json.NewDecoder(resp.Body).Decode(&orderResp); err != nil {
-		return nil, fmt.Errorf("failed to decode order response: %w", err)
+	var reservation models.Reservation
+	if err := json.NewDecoder(resp.Body).Decode(&reservation); err != nil {
+		return nil, fmt.Errorf("failed to decode reservation: %w", err)
+	}
+	if token == "" {
+		reservation.CartToken = resp.Header.Get("X-Cart-Token")
 	}
 
-	return &orderResp, nil
+	return &reservation, nil
 }
 
-func (c *FastAPIClient) CreateGuestOrder(orderReq models.OrderCreateRequest) (*models.OrderResponse, error) {
-	url := fmt.Sprintf("%s/api/orders/guest", c.baseURL)
+func (c *FastAPIClient) ReleaseReservation(reservation *models.Reservation, token string) error {
+	url := fmt.Sprintf("%s/api/reservations/%s", c.baseURL, reservation.ReservationID)
 
-	jsonData, err := json.Marshal(orderReq)
+	req, err := http.NewRequest("DELETE", url, nil)
 	if err != nil {
-		return nil, fmt.Errorf("failed to marshal order: %w", err)
+		return fmt.Errorf("failed to create request: %w", err)
+	}
+	if token != "" {
+		req.Header.Set("Authorization", fmt.Sprintf("Bearer %s", token))
+	} else {
+		req.Header.Set("X-Cart-Token", reservation.CartToken)
 	}
 
-	req, err := http.NewRequest("POST", url, bytes.NewBuffer(jsonData))
+	resp, err := c.client.Do(req)
 	if err != nil {
-		return nil, fmt.Errorf("failed to create request: %w", err)
+		return fmt.Errorf("failed to release reservation: %w", err)
 	}
+	defer resp.Body.Close()
 
-	req.Header.Set("Content-Type", "application/json")
+	if resp.StatusCode != http.StatusNoContent && resp.StatusCode != http.StatusNotFound {
+		body, _ := io.ReadAll(resp.Body)
+		return fmt.Errorf("failed to release reservation: status %d, body: %s", resp.StatusCode, string(body))
+	}
 
-	resp, err := c.client.Do(req)
+	return nil
+}
+
+// Order creation is retried on transport errors. Every attempt sends the
+// same Idempotency-Key, so the API replays the first attempt's order
+// instead of creating another one.
+const orderCreateAttempts = 3
+
+func (c *FastAPIClient) CreateOrder(orderReq models.OrderCreateRequest, token string, idempotencyKey string) (*models.OrderResponse, error) {
+	url := fmt.Sprintf("%s/api/orders", c.baseURL)
+	return c.postOrder(url, orderReq, token, "", idempotencyKey, "order")
+}
+
+// cartToken identifies the guest owning the order's reservation, if any.
+func (c *FastAPIClient) CreateGuestOrder(orderReq models.OrderCreateRequest, cartToken string, idempotencyKey string) (*models.OrderResponse, error) {
+	url := fmt.Sprintf("%s/api/orders/guest", c.baseURL)
+	return c.postOrder(url, orderReq, "", cartToken, idempotencyKey, "guest order")
+}
+
+func (c *FastAPIClient) postOrder(url string, orderReq models.OrderCreateRequest, token string, cartToken string, idempotencyKey string, kind string) (*models.OrderResponse, error) {
+	jsonData, err := json.Marshal(orderReq)
 	if err != nil {
-		return nil, fmt.Errorf("failed to create guest order: %w", err)
+		return nil, fmt.Errorf("failed to marshal order: %w", err)
+	}
+
+	var resp *http.Response
+	for attempt := 1; ; attempt++ {
+		req, err := http.NewRequest("POST", url, bytes.NewReader(jsonData))
+		if err != nil {
+			return nil, fmt.Errorf("failed to create request: %w", err)
+		}
+
+		req.Header.Set("Content-Type", "application/json")
+		req.Header.Set("Idempotency-Key", idempotencyKey)
+		if token != "" {
+			req.Header.Set("Authorization", fmt.Sprintf("Bearer %s", token))
+		}
+		if cartToken != "" {
+			req.Header.Set("X-Cart-Token", cartToken)
+		}
+
+		resp, err = c.client.Do(req)
+		if err == nil {
+			break
+		}
+		if attempt == orderCreateAttempts {
+			return nil, fmt.Errorf("failed to create %s: %w", kind, err)
+		}
+		time.Sleep(time.Duration(attempt) * 100 * time.Millisecond)
 	}
 	defer resp.Body.Close()
 
 	if resp.StatusCode != http.StatusCreated {
 		body, _ := io.ReadAll(resp.Body)
-		return nil, fmt.Errorf("failed to create guest order: status %d, body: %s", resp.StatusCode, string(body))
+		return nil, fmt.Errorf("failed to create %s: status %d, body: %s", kind, resp.StatusCode, string(body))
 	}
 
 	var orderResp models.OrderResponse
@@ -15,7 +15,7 @@ import (
 func main() {
 	cfg := config.Load()
 
-	fapiClient := clients.NewFastAPIClient(cfg.FastAPIBaseURL)
+	fapiClient := clients.NewFastAPIClient(cfg.FastAPIBaseURL, cfg.SecretKey)
 	addressValidator := services.NewAddressValidator(cfg.ValidatorAPIURL)
 	inventoryChecker := services.NewInventoryChecker(fapiClient)
 	checkoutService := services.NewCheckoutService(addressValidator, inventoryChecker, fapiClient)
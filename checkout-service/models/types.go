@@ -54,6 +54,23 @@ type Product struct {
 	Stock int     `json:"stock"`
 }
 
+type ReservationItem struct {
+	ProductID int `json:"product_id"`
+	Quantity  int `json:"quantity"`
+}
+
+type ReservationRequest struct {
+	Items []ReservationItem `json:"items"`
+}
+
+type Reservation struct {
+	ReservationID string            `json:"reservation_id"`
+	ExpiresAt     string            `json:"expires_at"`
+	Items         []ReservationItem `json:"items"`
+	// Guest cart token the reservation was made with (guest checkouts only)
+	CartToken string `json:"-"`
+}
+
 type OrderItemCreate struct {
 	ProductID    int     `json:"product_id"`
 	ProductName  string  `json:"product_name"`
@@ -94,6 +111,7 @@ type OrderCreateRequest struct {
 	TaxAmount               float64           `json:"tax_amount"`
 	ShippingAmount          float64           `json:"shipping_amount"`
 	TotalAmount             float64           `json:"total_amount"`
+	ReservationID           string            `json:"reservation_id,omitempty"`
 	Items                   []OrderItemCreate `json:"items"`
 }
 
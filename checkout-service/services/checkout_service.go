@@ -3,6 +3,9 @@ package services
 import (
 	"checkout-service/clients"
 	"checkout-service/models"
+	"crypto/rand"
+	"encoding/hex"
+	"fmt"
 	"log"
 	"time"
 )
@@ -25,9 +28,37 @@ func NewCheckoutService(
 	}
 }
 
+// newIdempotencyKey returns a random key identifying one checkout's order
+// creation, shared by all of its retries.
+func newIdempotencyKey() string {
+	b := make([]byte, 16)
+	if _, err := rand.Read(b); err != nil {
+		log.Printf("Warning: Failed to generate idempotency key: %v", err)
+		return fmt.Sprintf("%x", time.Now().UnixNano())
+	}
+	return hex.EncodeToString(b)
+}
+
 func (cs *CheckoutService) ProcessCheckout(req *models.CheckoutRequest, token string) (*models.CheckoutResponse, error) {
 	startTime := time.Now()
 
+	// Hold stock first, so a sold-out checkout fails before address validation
+	log.Println("Reserving stock...")
+	invStart := time.Now()
+
+	reservation, err := cs.inventoryChecker.Reserve(req.Items, token)
+	if err != nil {
+		return nil, err
+	}
+	ordered := false
+	defer func() {
+		if !ordered {
+			cs.inventoryChecker.Release(reservation, token)
+		}
+	}()
+
+	log.Printf("Stock reservation took: %v", time.Since(invStart))
+
 	log.Println("Starting address validation...")
 	addrStart := time.Now()
 
@@ -43,15 +74,6 @@ func (cs *CheckoutService) ProcessCheckout(req *models.CheckoutRequest, token st
 
 	log.Printf("Address validation took: %v", time.Since(addrStart))
 
-	log.Println("Starting inventory check...")
-	invStart := time.Now()
-
-	if err := cs.inventoryChecker.ValidateStock(req.Items); err != nil {
-		return nil, err
-	}
-
-	log.Printf("Inventory check took: %v", time.Since(invStart))
-
 	orderReq := models.OrderCreateRequest{
 		ShippingFirstName:     req.ShippingAddress.FirstName,
 		ShippingLastName:      req.ShippingAddress.LastName,
@@ -84,6 +106,9 @@ func (cs *CheckoutService) ProcessCheckout(req *models.CheckoutRequest, token st
 		ShippingAmount:        req.ShippingAmount,
 		TotalAmount:           req.TotalAmount,
 	}
+	if reservation != nil {
+		orderReq.ReservationID = reservation.ReservationID
+	}
 
 	for _, item := range req.Items {
 		orderReq.Items = append(orderReq.Items, models.OrderItemCreate{
@@ -96,10 +121,11 @@ func (cs *CheckoutService) ProcessCheckout(req *models.CheckoutRequest, token st
 	}
 
 	log.Println("Creating order...")
-	orderResp, err := cs.fapiClient.CreateOrder(orderReq, token)
+	orderResp, err := cs.fapiClient.CreateOrder(orderReq, token, newIdempotencyKey())
 	if err != nil {
 		return nil, err
 	}
+	ordered = true
 
 	log.Println("Clearing cart...")
 	if err := cs.fapiClient.ClearCart(token); err != nil {
@@ -119,6 +145,23 @@ func (cs *CheckoutService) ProcessCheckout(req *models.CheckoutRequest, token st
 func (cs *CheckoutService) ProcessGuestCheckout(req *models.CheckoutRequest) (*models.CheckoutResponse, error) {
 	startTime := time.Now()
 
+	// Hold stock first, so a sold-out checkout fails before address validation
+	log.Println("Reserving stock...")
+	invStart := time.Now()
+
+	reservation, err := cs.inventoryChecker.Reserve(req.Items, "")
+	if err != nil {
+		return nil, err
+	}
+	ordered := false
+	defer func() {
+		if !ordered {
+			cs.inventoryChecker.Release(reservation, "")
+		}
+	}()
+
+	log.Printf("Stock reservation took: %v", time.Since(invStart))
+
 	log.Println("Starting guest checkout - address validation...")
 	addrStart := time.Now()
 
@@ -134,15 +177,6 @@ func (cs *CheckoutService) ProcessGuestCheckout(req *models.CheckoutRequest) (*m
 
 	log.Printf("Address validation took: %v", time.Since(addrStart))
 
-	log.Println("Starting inventory check...")
-	invStart := time.Now()
-
-	if err := cs.inventoryChecker.ValidateStock(req.Items); err != nil {
-		return nil, err
-	}
-
-	log.Printf("Inventory check took: %v", time.Since(invStart))
-
 	orderReq := models.OrderCreateRequest{
 		GuestEmail:            req.GuestEmail,
 		ShippingFirstName:     req.ShippingAddress.FirstName,
@@ -176,6 +210,9 @@ func (cs *CheckoutService) ProcessGuestCheckout(req *models.CheckoutRequest) (*m
 		ShippingAmount:        req.ShippingAmount,
 		TotalAmount:           req.TotalAmount,
 	}
+	if reservation != nil {
+		orderReq.ReservationID = reservation.ReservationID
+	}
 
 	for _, item := range req.Items {
 		orderReq.Items = append(orderReq.Items, models.OrderItemCreate{
@@ -188,10 +225,15 @@ func (cs *CheckoutService) ProcessGuestCheckout(req *models.CheckoutRequest) (*m
 	}
 
 	log.Println("Creating guest order...")
-	orderResp, err := cs.fapiClient.CreateGuestOrder(orderReq)
+	cartToken := ""
+	if reservation != nil {
+		cartToken = reservation.CartToken
+	}
+	orderResp, err := cs.fapiClient.CreateGuestOrder(orderReq, cartToken, newIdempotencyKey())
 	if err != nil {
 		return nil, err
 	}
+	ordered = true
 
 	// Note: We don't clear cart for guest users as they don't have a server-side cart
 
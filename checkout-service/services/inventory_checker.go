@@ -3,8 +3,7 @@ package services
 import (
 	"checkout-service/clients"
 	"checkout-service/models"
-	"fmt"
-	"time"
+	"log"
 )
 
 type InventoryChecker struct {
@@ -17,22 +16,32 @@ func NewInventoryChecker(fapiClient *clients.FastAPIClient) *InventoryChecker {
 	}
 }
 
-func (ic *InventoryChecker) ValidateStock(items []models.CartItem) error {
+// Reserve holds stock for the items until the order is created or the hold
+// expires. The API checks stock against other checkouts' holds, so a
+// successful reservation means the order will not fail for lack of stock.
+// The reservation belongs to the user of token, or to a new guest if empty.
+func (ic *InventoryChecker) Reserve(items []models.CartItem, token string) (*models.Reservation, error) {
+	if len(items) == 0 {
+		return nil, nil
+	}
+
+	reservationReq := models.ReservationRequest{}
 	for _, item := range items {
-		product, err := ic.fapiClient.GetProduct(item.ProductID)
-		if err != nil {
-			return fmt.Errorf("failed to get product %d: %w", item.ProductID, err)
-		}
+		reservationReq.Items = append(reservationReq.Items, models.ReservationItem{
+			ProductID: item.ProductID,
+			Quantity:  item.Quantity,
+		})
+	}
 
-		if product.Stock < item.Quantity {
-			return fmt.Errorf(
-				"insufficient stock for %s: requested %d, available %d",
-				product.Name, item.Quantity, product.Stock,
-			)
-		}
+	return ic.fapiClient.CreateReservation(reservationReq, token)
+}
 
-		time.Sleep(20 * time.Millisecond)
+// Release gives held stock back when checkout fails after the reservation.
+func (ic *InventoryChecker) Release(reservation *models.Reservation, token string) {
+	if reservation == nil {
+		return
+	}
+	if err := ic.fapiClient.ReleaseReservation(reservation, token); err != nil {
+		log.Printf("Warning: Failed to release reservation: %v", err)
 	}
-
-	return nil
 }
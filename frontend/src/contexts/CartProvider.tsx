@@ -303,7 +303,8 @@ export const CartProvider: React.FC<CartProviderProps> = ({ children }) => {
         throw new Error(promoCode.message || 'Invalid promo code')
       }
 
-      setState((prev) => ({ ...prev, promoCode }))
+      // Tax depends on the discount, so a previous calculation no longer applies
+      setState((prev) => ({ ...prev, promoCode, shippingTax: null }))
     } catch (error: any) {
       const errorMessage = error.message || 'Failed to apply promo code'
       setState((prev) => ({ ...prev, error: errorMessage }))
@@ -315,7 +316,7 @@ export const CartProvider: React.FC<CartProviderProps> = ({ children }) => {
    * Remove promo code
    */
   const removePromoCode = useCallback((): void => {
-    setState((prev) => ({ ...prev, promoCode: null }))
+    setState((prev) => ({ ...prev, promoCode: null, shippingTax: null }))
   }, [])
 
   /**
@@ -327,7 +328,8 @@ export const CartProvider: React.FC<CartProviderProps> = ({ children }) => {
 
       try {
         const subtotal = getSubtotal()
-        const shippingTax = await cartService.calculateShippingTax(zipCode, subtotal)
+        const promoCode = state.promoCode?.is_valid ? state.promoCode.code : undefined
+        const shippingTax = await cartService.calculateShippingTax(zipCode, subtotal, promoCode)
         setState((prev) => ({ ...prev, shippingTax }))
       } catch (error: any) {
         const errorMessage = error.message || 'Failed to calculate shipping'
@@ -335,7 +337,7 @@ export const CartProvider: React.FC<CartProviderProps> = ({ children }) => {
         throw new Error(errorMessage)
       }
     },
-    [state.cart, state.guestCart]
+    [state.cart, state.guestCart, state.promoCode]
   )
 
   /**
@@ -41,6 +41,14 @@ export class ApiClient {
    * Make an HTTP request with automatic token injection
    */
   private async request<T>(endpoint: string, config: RequestConfig = {}): Promise<T> {
+    const { data } = await this.send<T>(endpoint, config)
+    return data
+  }
+
+  /**
+   * Make an HTTP request, returning the parsed body and the response headers
+   */
+  private async send<T>(endpoint: string, config: RequestConfig = {}): Promise<{ data: T; headers: Headers }> {
     const { requiresAuth = false, headers = {}, ...restConfig } = config
 
     const requestHeaders: Record<string, string> = {
@@ -66,7 +74,7 @@ export class ApiClient {
 
       // Handle 204 No Content
       if (response.status === 204) {
-        return null as T
+        return { data: null as T, headers: response.headers }
       }
 
       // Parse response JSON
@@ -80,7 +88,7 @@ export class ApiClient {
         )
       }
 
-      return data as T
+      return { data: data as T, headers: response.headers }
     } catch (error) {
       if (error instanceof ApiError) {
         throw error
@@ -101,6 +109,18 @@ export class ApiClient {
     return this.request<T>(endpoint, { ...config, method: 'GET' })
   }
 
+  /**
+   * Make a GET request, also returning one response header (e.g. a pagination cursor)
+   */
+  async getWithHeader<T>(
+    endpoint: string,
+    header: string,
+    config?: RequestConfig,
+  ): Promise<{ data: T; header: string | null }> {
+    const { data, headers } = await this.send<T>(endpoint, { ...config, method: 'GET' })
+    return { data, header: headers.get(header) }
+  }
+
   /**
    * Make a POST request
    */
@@ -100,11 +100,11 @@ export const cartService = {
   },
 
   /**
-   * Calculate shipping and tax based on ZIP code and subtotal
+   * Calculate shipping and tax based on ZIP code, subtotal and promo code
    * No authentication required
    */
-  async calculateShippingTax(zipCode: string, subtotal: number): Promise<ShippingTaxInfo> {
-    const data: CalculateShippingTaxRequest = { zip_code: zipCode, subtotal }
+  async calculateShippingTax(zipCode: string, subtotal: number, promoCode?: string): Promise<ShippingTaxInfo> {
+    const data: CalculateShippingTaxRequest = { zip_code: zipCode, subtotal, promo_code: promoCode }
     return apiClient.post<ShippingTaxInfo>('/api/shipping/calculate', data)
   },
 }
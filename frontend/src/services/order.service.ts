@@ -1,9 +1,30 @@
 import { apiClient } from './api'
 import { Order } from '@/types/checkout.types'
 
+// Largest page GET /api/orders serves
+const ORDER_PAGE_SIZE = 100
+
 class OrderService {
+  /**
+   * Load the whole order history, following the API's X-Next-Cursor pages
+   */
   async getUserOrders(): Promise<Order[]> {
-    return apiClient.get<Order[]>('/api/orders', { requiresAuth: true })
+    const orders: Order[] = []
+    let cursor: string | null = null
+    do {
+      const params = new URLSearchParams({ limit: String(ORDER_PAGE_SIZE) })
+      if (cursor) {
+        params.set('cursor', cursor)
+      }
+      const page: { data: Order[]; header: string | null } = await apiClient.getWithHeader<Order[]>(
+        `/api/orders?${params}`,
+        'X-Next-Cursor',
+        { requiresAuth: true },
+      )
+      orders.push(...page.data)
+      cursor = page.header
+    } while (cursor)
+    return orders
   }
 
   async getOrder(orderId: number): Promise<Order> {
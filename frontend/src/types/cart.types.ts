@@ -51,6 +51,8 @@ export interface ShippingTaxInfo {
   tax_rate: number
   shipping_cost: number
   subtotal: number
+  promo_code: string | null
+  discount_amount: number
   tax_amount: number
   shipping_amount: number
   total: number
@@ -119,4 +121,5 @@ export interface ValidatePromoCodeRequest {
 export interface CalculateShippingTaxRequest {
   zip_code: string
   subtotal: number
+  promo_code?: string
 }